@@ -1,10 +1,12 @@
 import pandas as pd
-import yfinance as yf
 import requests
 import os
 import time
 from io import StringIO
-from github import Github 
+from github_klient import ziskej_klienta
+from storage_engine import cesta_oddilu
+from sklad_cen import ziskej_sklad
+from registr_instrumentu import ziskej_registr
 
 # --- KONFIGURACE ---
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
@@ -14,17 +16,32 @@ TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
 TARGET_OWNER = 'Attis'
 
 # --- FUNKCE PRO GITHUB ---
-def download_csv_from_github(filename):
-    """Stáhne aktuální CSV data přímo z GitHubu."""
+def download_csv_from_github(filename, owner=None):
+    """
+    Stáhne aktuální CSV data přímo z GitHubu.
+    S 'owner' stáhne jen oddíl uživatele (data/<Owner>_<tabulka>.csv),
+    pokud soubor ještě není rozdělený, vezme kombinovaný CSV a vyfiltruje ho.
+    """
+    if owner:
+        df = _stahni_csv(cesta_oddilu(filename, owner))
+        if df is not None: return df
+        df = _stahni_csv(filename)
+        if df is not None and 'Owner' in df.columns:
+            df = df[df['Owner'].astype(str) == str(owner)].copy()
+        return df
+    return _stahni_csv(filename)
+
+def _stahni_csv(filename):
+    """Stáhne jeden CSV soubor (bez tokenu / při chybě lokální kopie)."""
     if not GITHUB_TOKEN:
         print("⚠️ GITHUB_TOKEN chybí. Zkouším číst lokální soubor.")
         if os.path.exists(filename): return pd.read_csv(filename)
         return None
 
     try:
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_repo(REPO_NAZEV)
-        contents = repo.get_contents(filename)
+        klient = ziskej_klienta(GITHUB_TOKEN, REPO_NAZEV)  # Sdílený klient pro celý běh bota
+        klient.pockej_na_limit()
+        contents = klient.repo().get_contents(filename)
         csv_data = contents.decoded_content.decode("utf-8")
         return pd.read_csv(StringIO(csv_data))
     except Exception as e:
@@ -66,17 +83,21 @@ def check_alerts_batch(df_targets):
     """
     tickers = df_targets['Ticker'].unique().tolist()
     # Přidáme měny pro jistotu
-    tickers_download = list(set(tickers + ["CZK=X", "EURUSD=X"]))
+    registr = ziskej_registr()
+    fx = registr.fx_pary(tickers)
+    tickers_download = list(set(tickers + ["CZK=X", "EURUSD=X"] + fx))
     
     print(f"🚀 Turbo Sken: Stahuji data pro {len(tickers_download)} tickerů...")
     
-    # Stahujeme 2 měsíce, abychom měli dost dat pro RSI
+    # 2 měsíce kvůli RSI, ze skladu cen (z Yahoo jen to, co chybí)
     try:
-        batch = yf.download(tickers_download, period="2mo", group_by='ticker', progress=False)
+        batch = ziskej_sklad().close(tickers_download, "2mo")
     except Exception as e:
         print(f"❌ Chyba stahování: {e}")
         return []
 
+    # Poslední FX kurzy pro převod kotací (pence, CHF, ...) do měny aplikace, ve které jsou cíle
+    fx_ceny = {p: float(batch[p].dropna().iloc[-1]) for p in fx if p in batch.columns and batch[p].notna().any()}
     alerts = []
 
     for index, row in df_targets.iterrows():
@@ -86,19 +107,19 @@ def check_alerts_batch(df_targets):
         
         # Extrakce dat z batche
         try:
-            if len(tickers_download) > 1:
-                if tk in batch.columns.levels[0]:
-                    hist = batch[tk]['Close'].dropna()
-                else:
-                    print(f"⚠️ Data pro {tk} nejsou v batchi.")
-                    continue
+            if tk in batch.columns:
+                hist = batch[tk].dropna()
             else:
-                hist = batch['Close'].dropna()
+                print(f"⚠️ Data pro {tk} nejsou v batchi.")
+                continue
 
             if hist.empty: continue
             
-            # Poslední cena a RSI
-            price = float(hist.iloc[-1])
+            # Poslední cena (v měně aplikace) a RSI (z kotací - na měřítku nezáleží)
+            price = registr.do_meny_aplikace(tk, float(hist.iloc[-1]), fx_ceny)
+            if price is None:
+                print(f"⚠️ Chybí kurz pro převod {tk}.")
+                continue
             
             # RSI potřebuje aspoň 14 dní
             rsi = 50.0
@@ -106,10 +127,8 @@ def check_alerts_batch(df_targets):
                 rsi_series = calculate_rsi_series(hist)
                 rsi = float(rsi_series.iloc[-1])
 
-            # Měna (jednoduchý odhad)
-            curr = "USD"
-            if ".PR" in tk: curr = "CZK"
-            elif ".DE" in tk: curr = "EUR"
+            # Měna (registr instrumentů)
+            curr = registr.mena(tk)
 
             # --- VYHODNOCENÍ ---
             signal = None
@@ -141,7 +160,7 @@ def run_alert_bot():
     print("👀 Spouštím Turbo Alert Bot...")
     
     # 1. Načtení Watchlistu
-    df_w = download_csv_from_github("watchlist.csv")
+    df_w = download_csv_from_github("watchlist.csv", TARGET_OWNER)
     if df_w is None or df_w.empty:
         print("❌ Watchlist je prázdný nebo nedostupný.")
         return
@@ -168,3 +187,5 @@ def run_alert_bot():
 
 if __name__ == "__main__":
     run_alert_bot()
+    if GITHUB_TOKEN:
+        print(f"📊 GitHub API limit: {ziskej_klienta(GITHUB_TOKEN, REPO_NAZEV).stav_limitu()}")
@@ -0,0 +1,74 @@
+"""
+Benchmark parsování CSV: původní pd.read_csv + převod sloupec po sloupci
+vs. registr schémat (schema.parsuj_csv, pyarrow engine, explicitní typy).
+
+Spuštění:  python benchmark_schema.py [pocet_radku]   (výchozí 1 000 000)
+"""
+import sys
+import time
+from io import StringIO
+import numpy as np
+import pandas as pd
+from schema import parsuj_csv
+
+SOUBOR = "history_data.csv"
+
+
+def vytvor_historii(radku):
+    """Syntetická historie prodejů ve formátu history_data.csv."""
+    rng = np.random.default_rng(42)
+    tickery = np.array(["AAPL", "MSFT", "NVDA", "CEZ.PR", "ADS.DE", "KO", "PFE", "GC=F", "TSLA", "AMZN"] * 30)
+    tickery = np.char.add(tickery, np.repeat(np.arange(30).astype(str), 10))  # 300 tickerů
+    datum = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 10 * 365 * 86400, radku), unit="s")
+    df = pd.DataFrame({
+        "Ticker": rng.choice(tickery, radku),
+        "Kusu": rng.integers(1, 100, radku).astype(float),
+        "Prodejka": rng.uniform(1, 1000, radku).round(4),
+        "Zisk": rng.normal(0, 200, radku).round(4),
+        "Mena": rng.choice(["USD", "CZK", "EUR"], radku),
+        "Datum": datum.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        "Owner": rng.choice(["Attis", "Bob", "Eva", "admin"], radku),
+    })
+    return df.to_csv(index=False)
+
+
+def puvodni_parser(text):
+    """Chování nacti_csv před registrem schémat."""
+    df = pd.read_csv(StringIO(text))
+    for col in ['Datum', 'Date']:
+        if col in df.columns: df[col] = pd.to_datetime(df[col], errors='coerce')
+    numeric_cols = ['Pocet', 'Cena', 'Castka', 'Kusu', 'Prodejka', 'Zisk', 'TotalUSD', 'Investice', 'Target', 'TargetBuy', 'TargetSell']
+    for col in numeric_cols:
+        if col in df.columns: df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
+    df['Owner'] = df['Owner'].astype(str)
+    return df
+
+
+def zmer(nazev, funkce, text, opakovani=3):
+    casy = []
+    for _ in range(opakovani):
+        start = time.perf_counter()
+        df = funkce(text)
+        casy.append(time.perf_counter() - start)
+    pamet = df.memory_usage(deep=True).sum() / 1024 ** 2
+    print(f"{nazev:<28} {min(casy):8.2f} s {pamet:10.1f} MB")
+    return df
+
+
+def main():
+    radku = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"📦 Generuji syntetickou historii ({radku:,} řádků)...")
+    text = vytvor_historii(radku)
+    print(f"   CSV: {len(text) / 1024 ** 2:.1f} MB\n")
+    print(f"{'Parser':<28} {'čas':>10} {'paměť DF':>13}")
+    stary = zmer("pd.read_csv + převody", puvodni_parser, text)
+    novy = zmer("schema.parsuj_csv (pyarrow)", lambda t: parsuj_csv(t, SOUBOR), text)
+
+    # Kontrola, že výsledek je stejný (až na typy kategorií)
+    assert len(stary) == len(novy)
+    assert np.allclose(stary['Zisk'], novy['Zisk'])
+    assert (stary['Datum'].values == novy['Datum'].values.astype(stary['Datum'].dtype)).all()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,19 @@
 import pandas as pd
-import yfinance as yf
 import requests
 import os
 import random
 import datetime
 import time
-import json
 import google.generativeai as genai
 import matplotlib
 import matplotlib.pyplot as plt
 from io import StringIO
-from github import Github
+from github_klient import ziskej_klienta
+from storage_engine import cesta_oddilu
+from sklad_cen import ziskej_sklad
+import trzni_cache
+from yahoo_klient import yahoo_fast_info
+from registr_instrumentu import ziskej_registr
 
 # Nastavíme backend pro servery bez monitoru
 matplotlib.use('Agg')
@@ -26,17 +29,32 @@ TARGET_OWNER = 'Attis'
 REPO_NAZEV = "Poutniiik/Moje-Investice"
 
 # --- FUNKCE PRO GITHUB ---
-def download_csv_from_github(filename):
-    """Stáhne aktuální CSV data přímo z GitHubu."""
+def download_csv_from_github(filename, owner=None):
+    """
+    Stáhne aktuální CSV data přímo z GitHubu.
+    S 'owner' stáhne jen oddíl uživatele (data/<Owner>_<tabulka>.csv),
+    pokud soubor ještě není rozdělený, vezme kombinovaný CSV a vyfiltruje ho.
+    """
+    if owner:
+        df = _stahni_csv(cesta_oddilu(filename, owner))
+        if df is not None: return df
+        df = _stahni_csv(filename)
+        if df is not None and 'Owner' in df.columns:
+            df = df[df['Owner'].astype(str) == str(owner)].copy()
+        return df
+    return _stahni_csv(filename)
+
+def _stahni_csv(filename):
+    """Stáhne jeden CSV soubor (bez tokenu / při chybě lokální kopie)."""
     if not GITHUB_TOKEN:
         print("⚠️ GITHUB_TOKEN chybí. Zkouším číst lokální soubor.")
         if os.path.exists(filename): return pd.read_csv(filename)
         return None
 
     try:
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_repo(REPO_NAZEV)
-        contents = repo.get_contents(filename)
+        klient = ziskej_klienta(GITHUB_TOKEN, REPO_NAZEV)  # Sdílený klient pro celý běh bota
+        klient.pockej_na_limit()
+        contents = klient.repo().get_contents(filename)
         csv_data = contents.decoded_content.decode("utf-8")
         return pd.read_csv(StringIO(csv_data))
     except Exception as e:
@@ -97,39 +115,40 @@ def get_batch_data(tickers):
     
     # Přidáme měny a indexy, pokud tam nejsou
     all_tickers = list(set(tickers + ["CZK=X", "EURUSD=X", "^GSPC"]))
+    registr = ziskej_registr()
+    fx = registr.fx_pary(all_tickers)
     
     try:
-        # Hromadné stažení (To je to zrychlení!)
-        batch = yf.download(all_tickers, period="2d", group_by='ticker', progress=False)
+        # Hromadně přes sklad cen (sdílený s webem, stahuje se jen chybějící)
+        posledni = ziskej_sklad().posledni_ceny(all_tickers + fx, "5d")
+        fx_ceny = {p: posledni.get(p, {}).get("price") for p in fx}
         
         for t in all_tickers:
             price = 0.0
             change = 0.0
-            try:
-                # Zkusíme vytáhnout data z batche
-                if len(all_tickers) > 1:
-                    if t in batch.columns.levels[0]:
-                        hist = batch[t]['Close'].dropna()
-                else:
-                    hist = batch['Close'].dropna()
-
-                if not hist.empty:
-                    price = float(hist.iloc[-1])
-                    if len(hist) >= 2:
-                        prev = float(hist.iloc[-2])
-                        change = ((price - prev) / prev) * 100
-            except: pass
+            prev = None
+            zdroj = "yahoo"
+            if t in posledni:
+                price = posledni[t]["price"]
+                prev = posledni[t]["prev"]
+                if prev:
+                    change = ((price - prev) / prev) * 100
             
             # Fallback
             if price == 0:
                 try:
-                    t_obj = yf.Ticker(t)
-                    price = float(t_obj.fast_info.last_price)
+                    price = float(yahoo_fast_info(t)["last_price"])
                     change = 0.0
+                    zdroj = "yahoo-fast_info"
                 except: pass
             
-            if price > 0:
-                data[t] = {"price": price, "change": change}
+            # Do měny aplikace (pence / 100, cizí měna přes FX pár do USD); bez kurzu cenu vynecháme
+            price = registr.do_meny_aplikace(t, price, fx_ceny) if price > 0 else None
+            if price:
+                if prev: prev = registr.do_meny_aplikace(t, prev, fx_ceny)
+                data[t] = {"price": price, "change": change, "prev_close": prev,
+                           "currency": registr.mena(t),
+                           "asof": time.time(), "source": zdroj}
                 
     except Exception as e:
         print(f"⚠️ Chyba batch download: {e}")
@@ -140,6 +159,10 @@ def get_batch_data(tickers):
 def save_history_local(total_usd):
     """Uloží historii lokálně pro graf."""
     filename = "value_history.csv"
+    # Po migraci na oddíly zapisujeme jen do svého souboru (data/<Owner>_value_history.csv)
+    oddil = cesta_oddilu(filename, TARGET_OWNER)
+    if os.path.exists(oddil):
+        filename = oddil
     df_hist = download_csv_from_github(filename)
     if df_hist is None: df_hist = pd.DataFrame(columns=["Date", "TotalUSD", "Owner"])
     
@@ -170,16 +193,8 @@ def create_chart(df_hist):
 
 # --- CACHE WARMER ---
 def save_market_cache(market_data):
-    """Uloží JSON pro rychlý start webu."""
-    cache = {
-        "timestamp": time.time(),
-        "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "usd_czk": market_data.get("CZK=X", {}).get("price", 24.0),
-        "eur_usd": market_data.get("EURUSD=X", {}).get("price", 1.08),
-        "prices": market_data
-    }
-    with open("market_cache.json", "w") as f:
-        json.dump(cache, f)
+    """Uloží JSON pro rychlý start webu (formát v2, atomicky - web může zrovna číst)."""
+    trzni_cache.zapis(market_data)
     print("💾 Cache uložena.")
 
 # --- ZÁLOHOVÁNÍ (TIME MACHINE) ---
@@ -196,7 +211,7 @@ def main():
     print("🚀 TURBO BOT STARTUJE...")
     
     # 1. Načtení portfolia
-    df = download_csv_from_github("portfolio_data.csv")
+    df = download_csv_from_github("portfolio_data.csv", TARGET_OWNER)
     if df is None or df.empty: return
     
     # Filtrování
@@ -220,7 +235,7 @@ def main():
     sp500_change = market_data.get("^GSPC", {}).get("change", 0.0)
     
     # Agregace portfolia
-    grouped = my_df.groupby('Ticker')['Pocet'].sum()
+    grouped = my_df.groupby('Ticker', observed=True)['Pocet'].sum()
     
     weighted_change = 0
     portfolio_items = [] # Seznam pro detailní výpis
@@ -235,11 +250,12 @@ def main():
             val_usd = 0
             val_czk = 0
             
-            # Měny
-            if t.endswith(".PR"): # CZK
+            # Měny (z registru instrumentů)
+            mena = ziskej_registr().mena(t)
+            if mena == "CZK":
                 val_czk = p * kusy
                 val_usd = val_czk / usd_czk
-            elif t.endswith(".DE"): # EUR
+            elif mena == "EUR":
                 val_usd = p * kusy * eur_usd
                 val_czk = val_usd * usd_czk
             else: # USD
@@ -310,3 +326,5 @@ def main():
 
 if __name__ == "__main__":
     main()
+    if GITHUB_TOKEN:
+        print(f"📊 GitHub API limit: {ziskej_klienta(GITHUB_TOKEN, REPO_NAZEV).stav_limitu()}")
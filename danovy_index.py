@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# ==========================================
+# 🧾 DAŇOVÝ INDEX LOTŮ (časový test 3 roky)
+# ==========================================
+# Loty seřazené podle (ticker, datum nákupu) s předpočítaným datem osvobození.
+# Status Free / Mix / Zdanit, kusy osvobozené dnes i datum, kdy se osvobodí další lot,
+# vzniknou pro všechny tickery jedním porovnáním pole dat a bincountem po tickerech.
+
+LIMIT_DANE_DNI = 1095  # Časový test: 3 roky držení
+
+
+class DanovyIndex:
+    """
+    df: loty (Ticker, Pocet, Datum). Lot bez platného data (NaT) se bere jako osvobozený
+    (stejně jako dřívější smyčka v calculate_all_data).
+    """
+
+    def __init__(self, df, limit_dni=LIMIT_DANE_DNI):
+        datum = pd.to_datetime(df["Datum"], errors="coerce")
+        kody, tickery = pd.factorize(df["Ticker"], sort=True)
+        poradi = np.lexsort((datum.values, kody))  # Podle tickeru, v rámci tickeru od nejstaršího
+        poradi = poradi[kody[poradi] >= 0]  # Lot bez tickeru (NaN) groupby taky vynechá
+
+        self.tickery = pd.Index(tickery, name="Ticker")
+        self.kody = kody[poradi]
+        self.datum = datum.values[poradi]
+        self.osvobozeni = (datum + pd.Timedelta(days=limit_dni)).values[poradi]
+        self.pocet = pd.to_numeric(df["Pocet"], errors="coerce").fillna(0).to_numpy(dtype=float)[poradi]
+
+    def volne(self, dnes=None):
+        """Bool pole (v pořadí indexu): lot už splnil časový test."""
+        dnes = np.datetime64(pd.Timestamp(dnes or datetime.now()))
+        return ~(self.osvobozeni > dnes)  # NaT > x je False -> osvobozený
+
+    def stav(self, dnes=None):
+        """
+        Returns: DataFrame (index Ticker) se sloupci
+        Dan ("🟢 Free" / "🟠 Mix" / "🔴 Zdanit"), KusyBezDane, DalsiOsvobozeni (NaT = vše volné)
+        """
+        n = len(self.tickery)
+        volne = self.volne(dnes)
+        lotu = np.bincount(self.kody, minlength=n)
+        volnych = np.bincount(self.kody, weights=volne, minlength=n)
+        kusy_volne = np.bincount(self.kody, weights=self.pocet * volne, minlength=n)
+
+        # Nejbližší osvobození = první zamčený lot tickeru (loty jsou seřazené podle data)
+        dalsi = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+        zamcene = np.flatnonzero(~volne)
+        kody_zamcene, prvni = np.unique(self.kody[zamcene], return_index=True)
+        dalsi[kody_zamcene] = self.osvobozeni[zamcene[prvni]]
+
+        return pd.DataFrame({
+            "Dan": np.select([volnych == lotu, volnych == 0], ["🟢 Free", "🔴 Zdanit"], "🟠 Mix"),
+            "KusyBezDane": kusy_volne,
+            "DalsiOsvobozeni": pd.to_datetime(dalsi),
+        }, index=self.tickery)
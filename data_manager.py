@@ -1,10 +1,17 @@
 import streamlit as st
 import pandas as pd
-from github import Github
-from io import StringIO
+from github import InputGitTreeElement
 import hashlib
 import time
+import base64
+import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from storage_engine import GitHubUloziste, SQLiteUloziste, ZmenaUzivatele, KonfliktZapisu
+from schema import parsuj_csv, preved_typy, sloupce_schematu, bez_kategorii
+from github_klient import ziskej_klienta
 
 # --- KONSTANTY (Databáze) ---
 REPO_NAZEV = "Poutniiik/Moje-Investice" 
@@ -19,6 +26,12 @@ SOUBOR_STATS = "user_stats.csv"
 SOUBOR_STRATEGIE = "strategy_history.csv"
 RISK_FREE_RATE = 0.04 
 
+# Datasety s Owner sloupcem se ukládají po uživatelích (data/<Owner>_<tabulka>.csv)
+ODDILOVE_SOUBORY = {
+    SOUBOR_DATA, SOUBOR_HISTORIE, SOUBOR_CASH, SOUBOR_VYVOJ,
+    SOUBOR_WATCHLIST, SOUBOR_DIVIDENDY, SOUBOR_STATS, SOUBOR_STRATEGIE,
+}
+
 # --- PŘIPOJENÍ (GitHub) ---
 try: 
     if "github" in st.secrets:
@@ -28,22 +41,41 @@ try:
 except Exception: 
     GITHUB_TOKEN = ""
 
+# --- REŽIM ÚLOŽIŠTĚ ---
+# "sqlite" = lokální databáze + GitHub jako replika na pozadí (výchozí)
+# "github" = původní režim, každé čtení/zápis jde přímo na GitHub
+try:
+    REZIM_ULOZISTE = st.secrets["storage"]["mode"] if "storage" in st.secrets else os.environ.get("INVESTICE_STORAGE", "sqlite")
+except Exception:
+    REZIM_ULOZISTE = os.environ.get("INVESTICE_STORAGE", "sqlite")
+
+@st.cache_resource(show_spinner=False)
+def get_github_klient():
+    """Jeden GitHub klient na proces: pool spojení, repo handle a hlídání rate limitu."""
+    return ziskej_klienta(GITHUB_TOKEN, REPO_NAZEV)
+
 def get_repo(): 
     if not GITHUB_TOKEN: 
         st.error("⚠️ GitHub Token nenalezen v Secrets. Ukládání nebude fungovat.")
         return None
     try:
-        return Github(GITHUB_TOKEN).get_repo(REPO_NAZEV)
+        return get_github_klient().repo()
     except Exception as e:
         st.error(f"Chyba při připojení k repozitáři: {e}")
         return None
 
+def stav_github_limitu():
+    """Zbývající kvóta GitHub API a kolik jsme kvůli ní čekali (pro Nastavení)."""
+    if not GITHUB_TOKEN:
+        return None
+    return get_github_klient().stav_limitu()
+
 def zasifruj(text): 
     return hashlib.sha256(str(text).encode()).hexdigest()
 
 # --- DATABÁZOVÉ FUNKCE (CRUD) ---
 
-def uloz_csv_bezpecne(df, nazev_souboru, zprava):
+def _uloz_na_github(df, nazev_souboru, zprava):
     """
     Vylepšená verze ukládání s ochranou proti výpadkům sítě.
     Returns: True při úspěchu, False při selhání.
@@ -54,10 +86,12 @@ def uloz_csv_bezpecne(df, nazev_souboru, zprava):
         return False
 
     csv_content = df.to_csv(index=False)
+    klient = get_github_klient()
     
     pokusy = 3
     for i in range(pokusy):
         try:
+            klient.pockej_na_limit()
             contents = repo.get_contents(nazev_souboru)
             repo.update_file(contents.path, zprava, csv_content, contents.sha)
             return True 
@@ -71,75 +105,413 @@ def uloz_csv_bezpecne(df, nazev_souboru, zprava):
                     st.warning(f"⚠️ Pokus {i+1}/{pokusy}: Chyba vytvoření souboru: {create_err}")
             else:
                 st.warning(f"⚠️ Pokus {i+1}/{pokusy}: GitHub neodpovídá, zkouším znovu... ({e})")
-                time.sleep(1) 
+                klient.pockej_po_chybe(e, i)
     
     st.error(f"❌ CHYBA UKLÁDÁNÍ: Soubor {nazev_souboru} se nepodařilo uložit.")
     return False
 
+def _sha_blobu(obsah):
+    """Git blob SHA obsahu (stejná, jakou vrací contents API) -> nová verze bez dalšího čtení."""
+    data = obsah.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def _uloz_vice_na_github(zmeny, zprava, ocekavane_sha=None):
+    """
+    Uloží více CSV najednou jako JEDEN commit přes git tree API.
+    Buď se změní všechny soubory, nebo žádný (ref se posune až na konci).
+    ocekavane_sha: {soubor: SHA, ze které zápis vychází (None = soubor nesmí existovat)}.
+    Pokud se některý soubor mezitím změnil, vyhodí KonfliktZapisu (volající sloučí a zkusí znovu).
+    Returns: {soubor: nová blob SHA} při úspěchu, False při selhání.
+    """
+    repo = get_repo()
+    if not repo:
+        st.error("❌ CRITICAL: Nelze se připojit ke GitHubu. Data NEULOŽENA!")
+        return False
+
+    obsahy = {nazev: df.to_csv(index=False) for nazev, df in zmeny.items()}
+    prvky = [
+        InputGitTreeElement(path=nazev, mode="100644", type="blob", content=obsah)
+        for nazev, obsah in obsahy.items()
+    ]
+
+    klient = get_github_klient()
+    pokusy = 3
+    for i in range(pokusy):
+        try:
+            klient.pockej_na_limit()
+            ref = repo.get_git_ref(f"heads/{repo.default_branch}")
+            rodic = repo.get_git_commit(ref.object.sha)
+            if ocekavane_sha is not None:
+                # Optimistická kontrola: vycházíme ze stejných verzí, jaké jsou teď na větvi?
+                aktualni = {p.path: p.sha for p in repo.get_git_tree(rodic.tree.sha, recursive=True).tree}
+                konflikty = [n for n in obsahy if n in ocekavane_sha and aktualni.get(n) != ocekavane_sha[n]]
+                if konflikty:
+                    raise KonfliktZapisu(konflikty)
+            strom = repo.create_git_tree(prvky, rodic.tree)
+            commit = repo.create_git_commit(zprava, strom, [rodic])
+            ref.edit(commit.sha)  # Bez force: když mezitím přibyl jiný commit, zkusíme znovu (i s kontrolou SHA)
+            return {nazev: _sha_blobu(obsah) for nazev, obsah in obsahy.items()}
+        except KonfliktZapisu:
+            raise
+        except Exception as e:
+            st.warning(f"⚠️ Pokus {i+1}/{pokusy}: Commit se nepovedl, zkouším znovu... ({e})")
+            klient.pockej_po_chybe(e, i)
+
+    st.error(f"❌ CHYBA UKLÁDÁNÍ: Soubory {', '.join(zmeny)} se nepodařilo uložit.")
+    return False
+
+def _nacti_z_githubu(nazev_souboru):
+    """Syrové CSV z GitHubu (bez převodu typů)."""
+    repo = get_repo()
+    if not repo: raise Exception("No repo")
+    get_github_klient().pockej_na_limit()
+    file = repo.get_contents(nazev_souboru)
+    return parsuj_csv(file.decoded_content, nazev_souboru)
+
+# --- PODMÍNĚNÉ STAHOVÁNÍ (ETag / SHA) ---
+_ETAGY = {}  # soubor -> (etag, sha)
+
+def _nacti_z_githubu_podminene(nazev_souboru, znama_sha):
+    """
+    Levná revalidace: pošle If-None-Match s posledním ETagem.
+    GitHub odpoví 304 (bez dat a bez čerpání limitu), pokud se soubor nezměnil.
+    Returns: (sha, df) nebo (sha, None), když je známá verze stále aktuální.
+    """
+    if not GITHUB_TOKEN: raise Exception("No token")
+    url = f"https://api.github.com/repos/{REPO_NAZEV}/contents/{nazev_souboru}"
+    headers = {"Accept": "application/vnd.github+json"}
+
+    etag, sha = _ETAGY.get(nazev_souboru, (None, None))
+    if etag and znama_sha is not None and znama_sha == sha:
+        headers["If-None-Match"] = etag
+
+    klient = get_github_klient()
+    r = klient.get(url, headers=headers, timeout=10)
+    if r.status_code == 304:
+        CACHE_STATISTIKY["revalidace_304"] += 1
+        return sha, None
+    r.raise_for_status()
+
+    data = r.json()
+    nova_sha = data["sha"]
+    _ETAGY[nazev_souboru] = (r.headers.get("ETag"), nova_sha)
+    if nova_sha == znama_sha:
+        return nova_sha, None
+
+    if data.get("encoding") == "base64" and data.get("content"):
+        text = base64.b64decode(data["content"]).decode("utf-8")
+    else:
+        # Soubory nad 1 MB contents API nevrací -> stáhneme blob napřímo
+        r_blob = klient.get(
+            f"https://api.github.com/repos/{REPO_NAZEV}/git/blobs/{nova_sha}",
+            headers={"Accept": "application/vnd.github.raw"},
+            timeout=30
+        )
+        r_blob.raise_for_status()
+        text = r_blob.content.decode("utf-8")
+    return nova_sha, parsuj_csv(text, nazev_souboru)
+
+def _nacti_zdroj_db(nazev_souboru):
+    """Počáteční naplnění lokální DB: GitHub, bez tokenu lokální CSV (vývoj)."""
+    if not GITHUB_TOKEN and os.path.exists(nazev_souboru):
+        with open(nazev_souboru, "rb") as f:
+            return parsuj_csv(f.read(), nazev_souboru)
+    return _nacti_z_githubu(nazev_souboru)
+
+def _seznam_na_githubu(adresar):
+    """Cesty souborů v adresáři repozitáře (jedno API volání). Neexistující adresář = []."""
+    repo = get_repo()
+    if not repo: raise Exception("No repo")
+    try:
+        get_github_klient().pockej_na_limit()
+        return [c.path for c in repo.get_contents(adresar)]
+    except Exception as e:
+        if "404" in str(e):
+            return []
+        raise
+
+def _github_zdroj():
+    """GitHub jako úložiště / zdroj repliky. Bez tokenu (lokální vývoj) bez oddílů nad lokálními CSV."""
+    if not GITHUB_TOKEN:
+        return GitHubUloziste(_nacti_zdroj_db, _uloz_na_github, _uloz_vice_na_github)
+    return GitHubUloziste(
+        _nacti_z_githubu, _uloz_na_github, _uloz_vice_na_github, _nacti_z_githubu_podminene,
+        seznam_funkce=_seznam_na_githubu, oddilove=ODDILOVE_SOUBORY
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_uloziste():
+    """Jedna instance úložiště na proces (sdílená všemi sessions)."""
+    zdroj = _github_zdroj()
+    if REZIM_ULOZISTE == "github":
+        return zdroj
+    # Replika zapisuje přes zdroj, takže oddíly uživatelů jdou do data/<Owner>_<tabulka>.csv
+    # a souběžné změny jiné instance se při konfliktu sloučí (a vrátí se i do lokální DB).
+    # S tokenem se tabulky periodicky ověřují proti GitHubu (ETag), takže změny jiné instance
+    # nebo bota se do lokální DB dostanou i bez vlastního zápisu.
+    return SQLiteUloziste(
+        zdroj.nacti, _uloz_na_github, zapis_vice_zdroj=zdroj.zapis_vice_se_sloucenim, oddilove=ODDILOVE_SOUBORY,
+        revalidace_zdroj=zdroj.nacti_pokud_zmeneno if GITHUB_TOKEN else None
+    )
+
+# --- TRANSAKCE (více souborů = jeden zápis) ---
+# Každá Streamlit session běží ve vlastním vlákně, proto thread-local.
+_TRANSAKCE = threading.local()
+
+@contextmanager
+def transakce(zprava):
+    """
+    Sesbírá všechny uloz_csv / uloz_data_uzivatele uvnitř bloku a uloží je
+    najednou (GitHub: jeden commit, SQLite: jedna DB transakce).
+    Při výjimce uvnitř bloku se neuloží nic.
+
+        with transakce("Prodej AAPL"):
+            uloz_data_uzivatele(df_p, user, SOUBOR_DATA)
+            uloz_data_uzivatele(df_cash, user, SOUBOR_CASH)
+    """
+    if getattr(_TRANSAKCE, "zmeny", None) is not None:
+        # Vnořená transakce se přidá do té vnější
+        yield
+        return
+
+    _TRANSAKCE.zmeny = {}
+    try:
+        yield
+        zmeny = _TRANSAKCE.zmeny
+    finally:
+        _TRANSAKCE.zmeny = None
+
+    if zmeny and not get_uloziste().zapis_vice(zmeny, zprava):
+        raise RuntimeError(f"Transakce '{zprava}' se nepodařilo uložit.")
+    for nazev_souboru, zmena in (zmeny or {}).items():
+        zneplatni_data(nazev_souboru, zmena.owner if isinstance(zmena, ZmenaUzivatele) else None)
+
+def _pridej_do_transakce(nazev_souboru, zmena):
+    """Odloží zápis do běžící transakce (DataFrame celého souboru nebo ZmenaUzivatele)."""
+    zmeny = _TRANSAKCE.zmeny
+    stara = zmeny.get(nazev_souboru)
+    if (stara is None or isinstance(zmena, pd.DataFrame)
+            or (isinstance(stara, ZmenaUzivatele) and stara.owner == zmena.owner)):
+        zmeny[nazev_souboru] = zmena
+        return
+    # Dvě různé změny téhož souboru -> složíme z nich celý soubor
+    full = nacti_csv(nazev_souboru)
+    full = full[full['Owner'] != zmena.owner]
+    zmeny[nazev_souboru] = pd.concat([full, zmena.df], ignore_index=True)
+
+def uloz_csv_bezpecne(df, nazev_souboru, zprava):
+    """
+    Uloží celý dataset do aktivního úložiště.
+    V režimu SQLite je to lokální zápis, na GitHub se dostane až replikací.
+    Uvnitř transakce() se zápis jen odloží do společného commitu.
+    Returns: True při úspěchu, False při selhání.
+    """
+    if getattr(_TRANSAKCE, "zmeny", None) is not None:
+        _pridej_do_transakce(nazev_souboru, df.copy())
+        return True
+    try:
+        ok = get_uloziste().zapis(df, nazev_souboru, zprava)
+    except Exception as e:
+        st.error(f"❌ CHYBA UKLÁDÁNÍ: Soubor {nazev_souboru} se nepodařilo uložit. ({e})")
+        return False
+    zneplatni_data(nazev_souboru)
+    return ok
+
 def uloz_csv(df, nazev_souboru, zprava):
     """WRAPPER: Pro zpětnou kompatibilitu."""
     return uloz_csv_bezpecne(df, nazev_souboru, zprava)
 
+# --- CACHE NAČTENÝCH DAT (sdílená pro celý proces) ---
+# soubor -> {"verze": SHA / číslo zápisu, "df": otypovaný DataFrame}
+_CSV_CACHE = {}
+_CSV_CACHE_ZAMEK = threading.Lock()
+CACHE_STATISTIKY = {"hit": 0, "miss": 0, "revalidace_304": 0, "zneplatneni": 0}
+
+def statistiky_cache():
+    """Kolik čtení obsloužila cache a kolik muselo znovu stahovat/parsovat."""
+    stats = dict(CACHE_STATISTIKY)
+    celkem = stats["hit"] + stats["miss"]
+    stats["hit_rate"] = (stats["hit"] / celkem) if celkem else 0.0
+    stats["souboru_v_cache"] = len(_CSV_CACHE)
+    return stats
+
+def _preved_typy(df, nazev_souboru):
+    """
+    Převede typy sloupců a doplní chybějící sloupce podle registru schémat (schema.py).
+    Kategorie (Ticker, Owner, Mena, Typ) aplikace dostane jako obyčejný text: concat s novým
+    řádkem, groupby a porovnání se pak chovají jako dřív. Kategorie drží jen sdílená cache.
+    """
+    return bez_kategorii(preved_typy(df, nazev_souboru))
+
+def _prazdny_df(nazev_souboru):
+    """Prázdná tabulka se správnými sloupci (když soubor / oddíl uživatele ještě neexistuje)."""
+    cols = sloupce_schematu(nazev_souboru) or ["Ticker", "Pocet", "Cena", "Datum", "Owner", "Sektor", "Poznamka"]
+    return pd.DataFrame(columns=cols)
+
+def _nacti_s_cache(nazev_souboru, owner=None):
+    """
+    Zeptá se úložiště, jestli se soubor (nebo jen oddíl uživatele 'owner') změnil;
+    parsuje jen při změně.
+    """
+    klic = nazev_souboru if owner is None else (nazev_souboru, str(owner))
+    with _CSV_CACHE_ZAMEK:
+        zaznam = _CSV_CACHE.get(klic)
+    znama_verze = zaznam["verze"] if zaznam else None
+
+    if owner is None:
+        verze, df_raw = get_uloziste().nacti_pokud_zmeneno(nazev_souboru, znama_verze)
+    else:
+        verze, df_raw = get_uloziste().nacti_uzivatele_pokud_zmeneno(nazev_souboru, str(owner), znama_verze)
+    if df_raw is None and zaznam is not None:
+        CACHE_STATISTIKY["hit"] += 1
+        return bez_kategorii(zaznam["df"])
+
+    CACHE_STATISTIKY["miss"] += 1
+    if df_raw.empty:
+        # Nový uživatel / prázdný soubor -> aspoň známé sloupce
+        df_raw = df_raw.reindex(columns=list(dict.fromkeys(list(_prazdny_df(nazev_souboru).columns) + list(df_raw.columns))))
+    df = preved_typy(df_raw, nazev_souboru)  # V cache jako kategorie (paměť)
+    if verze is not None:
+        with _CSV_CACHE_ZAMEK:
+            _CSV_CACHE[klic] = {"verze": verze, "df": df}
+    return bez_kategorii(df)
+
+# --- CÍLENÉ ZNEPLATNĚNÍ CACHE (místo st.cache_data.clear()) ---
+# Zápis do datasetu zneplatní jen to, co se z něj (a z dat daného uživatele) počítá.
+# Tržní cache (ceny, fundamenty, výnosy, zprávy) na datech uživatelů nezávisí, takže přežijí.
+_ZAVISLOSTI = {}  # soubor -> [cachovaná funkce / callback(soubor, owner)]
+_GENERACE = {}    # (soubor, owner) -> počet zneplatnění (součást klíče odvozených cache)
+_GENERACE_ZAMEK = threading.Lock()
+
+def zavisi_na(*soubory):
+    """
+    Dekorátor: funkce (st.cache_data nebo obyčejný callback) je odvozená z daných datasetů.
+    Cachovaná funkce se při zápisu do nich vyčistí celá; když má být cache po uživatelích,
+    stačí jí místo registrace předat generace_dat(soubor, user) jako argument.
+    """
+    def obal(funkce):
+        for nazev_souboru in soubory:
+            _ZAVISLOSTI.setdefault(nazev_souboru, []).append(funkce)
+        return funkce
+    return obal
+
+def generace_dat(nazev_souboru, owner=None):
+    """Číslo verze dat (soubor, uživatel) -> předej ho cachované funkci jako argument a cache se sama obnoví."""
+    with _GENERACE_ZAMEK:
+        return _GENERACE.get((nazev_souboru, None if owner is None else str(owner)), 0)
+
+def zneplatni_data(nazev_souboru, owner=None):
+    """Zneplatní cache odvozené z datasetu 'nazev_souboru' (s 'owner' jen pro toho uživatele)."""
+    owner = None if owner is None else str(owner)
+    with _GENERACE_ZAMEK:
+        for klic in {(nazev_souboru, owner), (nazev_souboru, None)}:
+            _GENERACE[klic] = _GENERACE.get(klic, 0) + 1
+    with _CSV_CACHE_ZAMEK:
+        _CSV_CACHE.pop(nazev_souboru, None)
+        if owner is None:
+            for klic in [k for k in _CSV_CACHE if isinstance(k, tuple) and k[0] == nazev_souboru]:
+                del _CSV_CACHE[klic]
+        else:
+            _CSV_CACHE.pop((nazev_souboru, owner), None)
+    for funkce in _ZAVISLOSTI.get(nazev_souboru, []):
+        try:
+            if hasattr(funkce, "clear"):
+                funkce.clear()
+            else:
+                funkce(nazev_souboru, owner)
+        except Exception as e:
+            print(f"⚠️ Zneplatnění cache {getattr(funkce, '__name__', funkce)} selhalo: {e}")
+    CACHE_STATISTIKY["zneplatneni"] += 1
+
 def nacti_csv(nazev_souboru):
-    """Načte data z GitHubu a převede typy na správné formáty."""
+    """Načte data z aktivního úložiště (přes cache) a převede typy na správné formáty."""
     try:
-        repo = get_repo()
-        if not repo: raise Exception("No repo")
-        file = repo.get_contents(nazev_souboru)
-        df = pd.read_csv(StringIO(file.decoded_content.decode("utf-8")))
-        
-        for col in ['Datum', 'Date']:
-            if col in df.columns: df[col] = pd.to_datetime(df[col], errors='coerce')
-        
-        numeric_cols = ['Pocet', 'Cena', 'Castka', 'Kusu', 'Prodejka', 'Zisk', 'TotalUSD', 'Investice', 'Target', 'TargetBuy', 'TargetSell']
-        for col in numeric_cols:
-            if col in df.columns: df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
-            
-        if nazev_souboru == SOUBOR_WATCHLIST:
-             if 'Target' in df.columns and 'TargetBuy' not in df.columns:
-                 df['TargetBuy'] = df['Target']
-             
-             if 'TargetBuy' not in df.columns: df['TargetBuy'] = 0.0
-             if 'TargetSell' not in df.columns: df['TargetSell'] = 0.0
-             
-             if 'Target' in df.columns: df = df.drop(columns=['Target'])
-        
-        if nazev_souboru == SOUBOR_DATA:
-            if 'Sektor' not in df.columns: df['Sektor'] = "Doplnit"
-            if 'Poznamka' not in df.columns: df['Poznamka'] = ""
-        
-        if 'Owner' not in df.columns: df['Owner'] = "admin"
-        
-        df['Owner'] = df['Owner'].astype(str)
-        return df
+        zmeny = getattr(_TRANSAKCE, "zmeny", None)
+        if zmeny is not None and nazev_souboru in zmeny:
+            # Uvnitř transakce vidíme vlastní neuložené zápisy
+            zmena = zmeny[nazev_souboru]
+            if isinstance(zmena, ZmenaUzivatele):
+                full = _nacti_s_cache(nazev_souboru)
+                full = full[full['Owner'] != zmena.owner]
+                return _preved_typy(pd.concat([full, zmena.df], ignore_index=True), nazev_souboru)
+            return _preved_typy(zmena.copy(), nazev_souboru)
+        return _nacti_s_cache(nazev_souboru)
+    except Exception:
+        return _prazdny_df(nazev_souboru)
+
+def nacti_csv_uzivatele(nazev_souboru, username):
+    """
+    Načte jen data jednoho uživatele (jeho oddíl), cena je O(vlastní data).
+    Náhrada za nacti_csv(...).query(f"Owner=='{user}'").
+    """
+    owner = str(username)
+    try:
+        zmeny = getattr(_TRANSAKCE, "zmeny", None)
+        if zmeny is not None and nazev_souboru in zmeny:
+            zmena = zmeny[nazev_souboru]
+            df = zmena.df if isinstance(zmena, ZmenaUzivatele) and zmena.owner == owner else None
+            if df is None:
+                full = nacti_csv(nazev_souboru)
+                df = full[full['Owner'] == owner]
+            return _preved_typy(df.copy(), nazev_souboru).reset_index(drop=True)
+        return _nacti_s_cache(nazev_souboru, owner)
     except Exception:
-        cols = ["Ticker", "Pocet", "Cena", "Datum", "Owner", "Sektor", "Poznamka"]
-        if nazev_souboru == SOUBOR_HISTORIE: cols = ["Ticker", "Kusu", "Prodejka", "Zisk", "Mena", "Datum", "Owner"]
-        if nazev_souboru == SOUBOR_CASH: cols = ["Typ", "Castka", "Mena", "Poznamka", "Datum", "Owner"]
-        if nazev_souboru == SOUBOR_VYVOJ: cols = ["Date", "TotalUSD", "Owner"]
-        if nazev_souboru == SOUBOR_WATCHLIST: cols = ["Ticker", "TargetBuy", "TargetSell", "Owner"]
-        if nazev_souboru == SOUBOR_DIVIDENDY: cols = ["Ticker", "Castka", "Mena", "Datum", "Owner"]
-        if nazev_souboru == SOUBOR_UZIVATELE: cols = ["username", "password", "recovery_key"]
-        if nazev_souboru == SOUBOR_STATS: cols = ["Owner", "XP", "LastLogin", "Level", "CompletedQuests"]
-        if nazev_souboru == SOUBOR_STRATEGIE: cols = ["Timestamp", "Owner", "Sentiment", "Advice"]
-        return pd.DataFrame(columns=cols)
+        return _prazdny_df(nazev_souboru)
 
 def uloz_data_uzivatele(user_df, username, nazev_souboru):
-    """Uloží data pouze pro konkrétního uživatele, aniž by smazala ostatní."""
-    full_df = nacti_csv(nazev_souboru)
-    full_df = full_df[full_df['Owner'] != str(username)]
-    if not user_df.empty:
-        user_df['Owner'] = str(username)
-        full_df = pd.concat([full_df, user_df], ignore_index=True)
-    
-    # 👇 KLÍČOVÁ OPRAVA: Musíme zachytit výsledek uložení a vrátit ho!
-    success = uloz_csv(full_df, nazev_souboru, f"Update {username}")
-    
-    # Vyčištění cache pro všechny funkce v aplikaci
-    st.cache_data.clear()
-    
+    """
+    Uloží data pouze pro konkrétního uživatele, aniž by smazala ostatní.
+    Úložiště zapíše jen rozdíl proti uloženým řádkům (nové / zmizelé řádky),
+    takže cena zápisu roste s velikostí změny, ne s velikostí databáze.
+    """
+    user_df['Owner'] = str(username)
+    zmena = ZmenaUzivatele(str(username), user_df.copy())
+
+    if getattr(_TRANSAKCE, "zmeny", None) is not None:
+        _pridej_do_transakce(nazev_souboru, zmena)
+        return True  # Cache se zneplatní až po uložení celé transakce
+
+    try:
+        success = get_uloziste().zapis_vice({nazev_souboru: zmena}, f"Update {username}")
+    except Exception as e:
+        st.error(f"❌ CHYBA UKLÁDÁNÍ: Soubor {nazev_souboru} se nepodařilo uložit. ({e})")
+        success = False
+
+    # Zneplatníme jen cache odvozené z tohoto souboru a uživatele (tržní data zůstanou),
+    # a jen po úspěšném uložení - stejně jako transakce()
+    if success:
+        zneplatni_data(nazev_souboru, username)
+
     return success
 
+def nacti_data_uzivatele_paralelne(user, soubory):
+    """
+    Studený start: načte všechny datasety uživatele NARÁZ ve vláknech.
+    soubory: {klic_v_session_state: SOUBOR_*}
+    Returns: ({klic: DataFrame uživatele}, {klic: doba načtení v sekundách})
+    """
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except Exception:
+        add_script_run_ctx, ctx = None, None
+
+    def _nacti_mereno(nazev_souboru):
+        # Vlákno dostane Streamlit kontext, aby st.error/st.warning uvnitř fungovaly
+        if add_script_run_ctx and ctx:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        start = time.perf_counter()
+        df = nacti_csv_uzivatele(nazev_souboru, user)
+        return df, time.perf_counter() - start
+
+    vysledky = {}
+    casy = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(soubory)), thread_name_prefix="nacitani") as pool:
+        futures = {klic: pool.submit(_nacti_mereno, nazev) for klic, nazev in soubory.items()}
+        for klic, future in futures.items():
+            vysledky[klic], casy[klic] = future.result()
+    return vysledky, casy
+
 def nacti_uzivatele(): 
     return nacti_csv(SOUBOR_UZIVATELE)
 
@@ -149,10 +521,9 @@ nacti_data_z_github = nacti_csv
 
 def ziskej_info(ticker):
     """Pomocná funkce pro získání ceny přes yfinance pro moduly."""
-    import yfinance as yf
+    from yahoo_klient import yahoo_fast_info
     try:
-        t = yf.Ticker(ticker)
-        price = t.fast_info.last_price if hasattr(t, 'fast_info') else 0
+        price = yahoo_fast_info(ticker)["last_price"] or 0
         return price, "USD", ticker
     except:
         return 0, "USD", ticker
@@ -1,11 +1,12 @@
 import pandas as pd
-import yfinance as yf
 import requests
 import os
 import datetime
 from datetime import timedelta
 from io import StringIO
-from github import Github, Auth  # Přidán Auth pro moderní volání
+from github_klient import ziskej_klienta
+from storage_engine import ODDILY_ADRESAR, vlastnik_oddilu
+from yahoo_klient import yahoo_atribut
 
 # --- KONFIGURACE ---
 # Používáme proměnné prostředí, které nastavuješ v GitHub Actions nebo Secrets
@@ -26,11 +27,10 @@ def download_csv_from_github(filename):
             return None
 
     try:
-        # Moderní způsob autentizace (opravuje DeprecationWarning)
-        auth = Auth.Token(GITHUB_TOKEN)
-        g = Github(auth=auth)
-        repo = g.get_repo(REPO_NAZEV)
-        contents = repo.get_contents(filename)
+        # Sdílený klient pro celý běh bota (pool spojení + hlídání limitu)
+        klient = ziskej_klienta(GITHUB_TOKEN, REPO_NAZEV)
+        klient.pockej_na_limit()
+        contents = klient.repo().get_contents(filename)
         csv_data = contents.decoded_content.decode("utf-8")
         return pd.read_csv(StringIO(csv_data))
     except Exception as e:
@@ -40,6 +40,29 @@ def download_csv_from_github(filename):
             return pd.read_csv(filename)
         return None
 
+def download_all_owners(filename):
+    """
+    Spojí oddíly všech uživatelů (data/<Owner>_<tabulka>.csv) do jedné tabulky.
+    Dokud soubor není rozdělený, vrátí původní kombinovaný CSV.
+    """
+    cesty = []
+    try:
+        if GITHUB_TOKEN:
+            klient = ziskej_klienta(GITHUB_TOKEN, REPO_NAZEV)
+            klient.pockej_na_limit()
+            cesty = [c.path for c in klient.repo().get_contents(ODDILY_ADRESAR)]
+        elif os.path.isdir(ODDILY_ADRESAR):
+            cesty = [f"{ODDILY_ADRESAR}/{f}" for f in os.listdir(ODDILY_ADRESAR)]
+    except Exception as e:
+        print(f"⚠️ Oddíly {filename} nenalezeny ({e}), čtu kombinovaný soubor.")
+
+    casti = [download_csv_from_github(c) for c in sorted(cesty) if vlastnik_oddilu(c, filename)]
+    casti = [c for c in casti if c is not None]
+    if casti:
+        print(f"📂 {filename}: {len(casti)} oddílů")
+        return pd.concat(casti, ignore_index=True)
+    return download_csv_from_github(filename)
+
 def load_all_tickers():
     """
     Načte unikátní tickery z Portfolia I Watchlistu.
@@ -47,13 +70,13 @@ def load_all_tickers():
     tickers = set()
     
     # 1. Portfolio
-    df_p = download_csv_from_github("portfolio_data.csv")
+    df_p = download_all_owners("portfolio_data.csv")
     if df_p is not None and not df_p.empty and 'Ticker' in df_p.columns:
         tickers.update(df_p['Ticker'].unique())
         print(f"✅ Načteno z portfolia: {len(df_p['Ticker'].unique())} tickerů")
 
     # 2. Watchlist
-    df_w = download_csv_from_github("watchlist.csv")
+    df_w = download_all_owners("watchlist.csv")
     if df_w is not None and not df_w.empty and 'Ticker' in df_w.columns:
         tickers.update(df_w['Ticker'].unique())
         print(f"✅ Načteno z watchlistu: {len(df_w['Ticker'].unique())} tickerů")
@@ -73,9 +96,8 @@ def get_earnings_date(ticker, start_date, end_date):
         if "=" in ticker or "^" in ticker:
             return None
 
-        t = yf.Ticker(ticker)
-        # Získáme tabulku budoucích earnings
-        earnings = t.earnings_dates
+        # Získáme tabulku budoucích earnings (přes Yahoo bránu - limit, backoff)
+        earnings = yahoo_atribut(ticker, "earnings_dates")
         
         if earnings is None or earnings.empty:
             return None
@@ -166,3 +188,5 @@ def run_check():
 
 if __name__ == "__main__":
     run_check()
+    if GITHUB_TOKEN:
+        print(f"📊 GitHub API limit: {ziskej_klienta(GITHUB_TOKEN, REPO_NAZEV).stav_limitu()}")
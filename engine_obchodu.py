@@ -1,15 +1,77 @@
 import pandas as pd
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 import streamlit as st # Potřebujeme pro session state, pokud s ním pracujeme
 from data_manager import (
     uloz_data_uzivatele, 
+    transakce,
     SOUBOR_DATA, 
     SOUBOR_CASH, 
     SOUBOR_HISTORIE
 )
-# Funkce ziskej_info importujeme až uvnitř funkcí nebo si ji vyžádáme jako parametr, 
-# abychom se vyhnuli kruhovým importům. Pro teď použijeme utils.
-from utils import ziskej_info, ziskej_sektor_tickeru
+from utils import ziskej_sektor_tickeru, ziskej_tabuli_cen
+from registr_instrumentu import ziskej_registr
+from jadro_dat import aktualizuj_jadro
+from kniha_lotu import KnihaLotu, FIFO
+
+# --- LATENCE OBCHODŮ ---
+# Histogram doby provedení podle typu obchodu (nákup / prodej / směna).
+# Obchod nesahá na síť kromě jednoho zápisu do úložiště, 'zapis_ms' ukazuje jeho podíl.
+HRANICE_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+_LATENCE = {}
+_LATENCE_ZAMEK = threading.Lock()
+
+def _zaznamenej_latenci(typ, celkem_s, zapis_s):
+    with _LATENCE_ZAMEK:
+        h = _LATENCE.setdefault(typ, {"pocet": 0, "soucet_ms": 0.0, "zapis_ms": 0.0, "max_ms": 0.0,
+                                      "kose": [0] * (len(HRANICE_MS) + 1)})
+        ms = celkem_s * 1000
+        h["pocet"] += 1
+        h["soucet_ms"] += ms
+        h["zapis_ms"] += zapis_s * 1000
+        h["max_ms"] = max(h["max_ms"], ms)
+        h["kose"][sum(ms > hranice for hranice in HRANICE_MS)] += 1
+
+@contextmanager
+def _mereni(typ):
+    """Změří obchod; do slovníku 'zapis' se ukládá doba zápisu do úložiště."""
+    start = time.perf_counter()
+    zapis = {"s": 0.0}
+    try:
+        yield zapis
+    finally:
+        _zaznamenej_latenci(typ, time.perf_counter() - start, zapis["s"])
+
+def histogram_latence():
+    """
+    Returns: {typ: {"pocet", "prumer_ms", "zapis_ms" (průměr), "max_ms", "kose": {"≤5 ms": n, ...}}}
+    """
+    popisky = [f"≤{h} ms" for h in HRANICE_MS] + [f">{HRANICE_MS[-1]} ms"]
+    with _LATENCE_ZAMEK:
+        return {
+            typ: {"pocet": h["pocet"], "prumer_ms": h["soucet_ms"] / h["pocet"], "zapis_ms": h["zapis_ms"] / h["pocet"],
+                  "max_ms": h["max_ms"], "kose": dict(zip(popisky, h["kose"]))}
+            for typ, h in _LATENCE.items() if h["pocet"]
+        }
+
+# --- KOTACE BEZ ČEKÁNÍ NA SÍŤ ---
+def ziskej_kotaci(ticker):
+    """
+    Cena, měna a denní změna pro obchodní formulář / CLI:
+    LIVE_DATA ze session -> sdílená tabule kurzů (i zastaralá cena, obnoví se na pozadí)
+    -> měna z registru instrumentů. Na síť se čeká jen u tickeru, který tabule vůbec nezná.
+    Returns: (cena nebo None, měna, změna)
+    """
+    ticker = str(ticker).upper().strip()
+    mena = ziskej_registr().mena(ticker)
+    info = st.session_state.get('LIVE_DATA', {}).get(ticker)
+    if not info:
+        info = ziskej_tabuli_cen().ziskej([ticker], cekat=False).get(ticker)
+    if not info or not info.get('price'):
+        return None, mena, 0
+    return info['price'], info.get('curr') or mena, info.get('change', 0)
 
 # --- ATOMICKÁ FUNKCE: POHYB PENĚZ ---
 def pohyb_penez(castka, mena, typ, poznamka, user, df_cash_temp):
@@ -22,12 +84,16 @@ def pohyb_penez(castka, mena, typ, poznamka, user, df_cash_temp):
 
 # --- ATOMICKÁ FUNKCE: PROVEDENÍ NÁKUPU ---
 def proved_nakup(ticker, kusy, cena, user):
+    with _mereni("nákup") as zapis:
+        return _proved_nakup(ticker, kusy, cena, user, zapis)
+
+def _proved_nakup(ticker, kusy, cena, user, zapis):
     # Musíme načíst data ze Session State, protože funkce žije teď bokem
     df_p = st.session_state['df'].copy()
     df_cash_temp = st.session_state['df_cash'].copy()
     
-    # Zjistíme měnu (použijeme utils funkci)
-    _, mena, _ = ziskej_info(ticker)
+    # Zjistíme měnu (registr instrumentů - bez sítě)
+    mena = ziskej_registr().mena(ticker)
     
     cost = kusy * cena
     
@@ -39,23 +105,26 @@ def proved_nakup(ticker, kusy, cena, user):
         df_cash_temp = pohyb_penez(-cost, mena, "Nákup", ticker, user, df_cash_temp)
         
         # Krok 2: Připsání akcií (lokálně)
-        # Zjistíme sektor automaticky
+        # Zjistíme sektor automaticky (registr, bez sítě; neznámý se doplní na pozadí
+        # a výpočet portfolia ho pak vezme z registru)
         sektor_akcie = ziskej_sektor_tickeru(ticker)
         d = pd.DataFrame([{"Ticker": ticker, "Pocet": kusy, "Cena": cena, "Datum": datetime.now(), "Owner": user, "Sektor": sektor_akcie, "Poznamka": "CLI/Auto"}])
         df_p = pd.concat([df_p, d], ignore_index=True)
         
-        # Krok 3: Uložení
+        # Krok 3: Uložení (oba soubory v jednom commitu - všechno, nebo nic)
         try:
-            uloz_data_uzivatele(df_p, user, SOUBOR_DATA)
-            uloz_data_uzivatele(df_cash_temp, user, SOUBOR_CASH)
+            start = time.perf_counter()
+            with transakce(f"Nákup {ticker} ({user})"):
+                uloz_data_uzivatele(df_p, user, SOUBOR_DATA)
+                uloz_data_uzivatele(df_cash_temp, user, SOUBOR_CASH)
+            zapis["s"] = time.perf_counter() - start
             
             # Aktualizace Session State
             st.session_state['df'] = df_p
             st.session_state['df_cash'] = df_cash_temp
             
-            # Invalidace (nastavíme timestamp na starý, aby se při refresh přepočítalo)
-            if 'data_core' in st.session_state:
-                del st.session_state['data_core'] # Jednoduše smažeme cache
+            # Jádro se jen upraví o změněný ticker a hotovost (bez plného přepočtu)
+            aktualizuj_jadro([ticker])
             
             return True, f"✅ Koupeno: {kusy}x {ticker} za {cena:,.2f} {mena}"
         except Exception as e:
@@ -64,38 +133,27 @@ def proved_nakup(ticker, kusy, cena, user):
         return False, f"❌ Nedostatek {mena} (Potřeba: {cost:,.2f}, Máš: {aktualni_zustatek:,.2f})"
 
 # --- ATOMICKÁ FUNKCE: PROVEDENÍ PRODEJE ---
-def proved_prodej(ticker, kusy, cena, user, mena_input):
-    df_p = st.session_state['df'].copy()
+def proved_prodej(ticker, kusy, cena, user, mena_input, metoda=FIFO):
+    with _mereni("prodej") as zapis:
+        return _proved_prodej(ticker, kusy, cena, user, mena_input, zapis, metoda)
+
+def _proved_prodej(ticker, kusy, cena, user, mena_input, zapis, metoda=FIFO):
+    df_p = st.session_state['df']
     df_h = st.session_state['df_hist'].copy()
     df_cash_temp = st.session_state['df_cash'].copy()
-    
-    df_t = df_p[df_p['Ticker'] == ticker].sort_values('Datum')
 
     final_mena = mena_input
     if final_mena is None or final_mena == "N/A":
-        final_mena = "USD" # Fallback
+        final_mena = ziskej_registr().mena(ticker) # Fallback z registru instrumentů
 
-    if df_t.empty or df_t['Pocet'].sum() < kusy:
-        return False, "Nedostatek kusů."
-
-    zbyva, zisk, trzba = kusy, 0, kusy * cena
-    df_p_novy = df_p.copy()
-
-    # Logika odebrání kusů (FIFO)
-    indices_to_drop = []
-    
-    for idx, row in df_t.iterrows():
-        if zbyva <= 0: break
-        ukrojeno = min(row['Pocet'], zbyva)
-        zisk += (cena - row['Cena']) * ukrojeno
-        
-        if ukrojeno == row['Pocet']:
-            indices_to_drop.append(idx)
-        else:
-            df_p_novy.at[idx, 'Pocet'] -= ukrojeno
-        zbyva -= ukrojeno
+    # Párování s loty (FIFO / LIFO / nejdražší / daňově optimální) jen nad loty tohoto tickeru
+    try:
+        vyber = KnihaLotu(df_p[df_p['Ticker'] == ticker]).vyber(ticker, kusy, cena, metoda)
+    except ValueError as e:
+        return False, str(e)
 
-    df_p_novy = df_p_novy.drop(indices_to_drop)
+    zisk, trzba = float(vyber['Zisk'].sum()), kusy * cena
+    df_p_novy = KnihaLotu.aplikuj(df_p, vyber)
 
     # Krok 1: Záznam do historie
     new_h = pd.DataFrame([{"Ticker": ticker, "Kusu": kusy, "Prodejka": cena, "Zisk": zisk, "Mena": final_mena, "Datum": datetime.now(), "Owner": user}])
@@ -104,17 +162,20 @@ def proved_prodej(ticker, kusy, cena, user, mena_input):
     # Krok 2: Připsání hotovosti
     df_cash_temp = pohyb_penez(trzba, final_mena, "Prodej", f"Prodej {ticker}", user, df_cash_temp)
     
-    # Krok 3: Uložení
+    # Krok 3: Uložení (tři soubory v jednom commitu - všechno, nebo nic)
     try:
-        uloz_data_uzivatele(df_p_novy, user, SOUBOR_DATA)
-        uloz_data_uzivatele(df_h, user, SOUBOR_HISTORIE)
-        uloz_data_uzivatele(df_cash_temp, user, SOUBOR_CASH)
+        start = time.perf_counter()
+        with transakce(f"Prodej {ticker} ({user})"):
+            uloz_data_uzivatele(df_p_novy, user, SOUBOR_DATA)
+            uloz_data_uzivatele(df_h, user, SOUBOR_HISTORIE)
+            uloz_data_uzivatele(df_cash_temp, user, SOUBOR_CASH)
+        zapis["s"] = time.perf_counter() - start
         
         st.session_state['df'] = df_p_novy
         st.session_state['df_hist'] = df_h
         st.session_state['df_cash'] = df_cash_temp
         
-        if 'data_core' in st.session_state: del st.session_state['data_core']
+        aktualizuj_jadro([ticker])
         
         return True, f"Prodáno! +{trzba:,.2f} {final_mena} (Zisk: {zisk:,.2f})"
     except Exception as e:
@@ -122,6 +183,10 @@ def proved_prodej(ticker, kusy, cena, user, mena_input):
 
 # --- ATOMICKÁ FUNKCE: PROVEDENÍ SMĚNY ---
 def proved_smenu(castka, z_meny, do_meny, user):
+    with _mereni("směna") as zapis:
+        return _proved_smenu(castka, z_meny, do_meny, user, zapis)
+
+def _proved_smenu(castka, z_meny, do_meny, user, zapis):
     # Potřebujeme kurzy. Zkusíme je vzít z cache, jinak default
     kurzy = {"CZK": 20.85, "EUR": 1.16} 
     if 'data_core' in st.session_state:
@@ -144,9 +209,12 @@ def proved_smenu(castka, z_meny, do_meny, user):
     
     # Krok 2: Uložení
     try:
-        uloz_data_uzivatele(df_cash_temp, user, SOUBOR_CASH)
+        start = time.perf_counter()
+        with transakce(f"Směna {z_meny}->{do_meny} ({user})"):
+            uloz_data_uzivatele(df_cash_temp, user, SOUBOR_CASH)
+        zapis["s"] = time.perf_counter() - start
         st.session_state['df_cash'] = df_cash_temp
-        if 'data_core' in st.session_state: del st.session_state['data_core']
+        aktualizuj_jadro()
         return True, f"Směněno: {vysledna:,.2f} {do_meny}"
     except Exception as e:
         return False, f"❌ Chyba zápisu transakce (SMĚNA): {e}"
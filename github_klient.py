@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from github import Github, Auth, GithubException, RateLimitExceededException
+
+# --- KONFIGURACE ---
+VELIKOST_POOLU = 10      # Souběžná keep-alive spojení na api.github.com
+REZERVA_LIMITU = 200     # Pod tímto zbytkem začneme požadavky rozkládat až do resetu
+MAX_CEKANI = 60          # Nejdelší pauza před jedním požadavkem (s)
+
+
+class GitHubKlient:
+    """
+    Jeden dlouho žijící klient na proces:
+    - sdílený HTTP pool (PyGithub i přímé volání contents API),
+    - repo handle se zjistí jen jednou,
+    - sleduje X-RateLimit-Remaining a při docházejícím limitu zpomalí PŘEDEM,
+      místo slepého opakování po chybě.
+    """
+
+    def __init__(self, token, repo_nazev, velikost_poolu=VELIKOST_POOLU):
+        self.token = token
+        self.repo_nazev = repo_nazev
+        self._zamek = threading.Lock()
+        self._repo = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=velikost_poolu, pool_maxsize=velikost_poolu)
+        self.session.mount("https://", adapter)
+
+        self.github = Github(auth=Auth.Token(token), pool_size=velikost_poolu) if token else None
+
+        # Metriky limitu (zbývá / limit / reset = unix čas obnovení)
+        self._zbyva = None
+        self._limit = None
+        self._reset = None
+        self.statistiky = {"pozadavku": 0, "zpomaleni": 0, "cekani_s": 0.0, "limit_chyb": 0}
+
+    # --- REPO ---
+    def repo(self):
+        """Repo handle (zjistí se jen jednou, pak se sdílí)."""
+        if self.github is None:
+            raise RuntimeError("GitHub token chybí.")
+        with self._zamek:
+            if self._repo is None:
+                self._repo = self.github.get_repo(self.repo_nazev)
+            return self._repo
+
+    # --- LIMIT ---
+    def _zaznamenej(self, zbyva, limit, reset):
+        with self._zamek:
+            if zbyva is not None: self._zbyva = int(zbyva)
+            if limit is not None: self._limit = int(limit)
+            if reset is not None: self._reset = float(reset)
+
+    def zaznamenej_hlavicky(self, headers):
+        """Převezme X-RateLimit-* z odpovědi (requests nebo GithubException)."""
+        if not headers:
+            return
+        h = {str(k).lower(): v for k, v in headers.items()}
+        self._zaznamenej(h.get("x-ratelimit-remaining"), h.get("x-ratelimit-limit"), h.get("x-ratelimit-reset"))
+
+    def _aktualizuj_z_pygithub(self):
+        # requester.rate_limiting se plní z hlaviček každé odpovědi PyGithubu (bez dalšího volání)
+        if self.github is None:
+            return
+        try:
+            zbyva, limit = self.github.requester.rate_limiting
+            if limit >= 0:
+                self._zaznamenej(zbyva, limit, self.github.requester.rate_limiting_resettime)
+        except Exception:
+            pass
+
+    def _cekani(self):
+        """Kolik počkat před dalším požadavkem, aby limit vydržel do resetu."""
+        with self._zamek:
+            zbyva, reset = self._zbyva, self._reset
+        if zbyva is None or reset is None or zbyva > REZERVA_LIMITU:
+            return 0.0
+        do_resetu = max(0.0, reset - time.time())
+        if zbyva <= 0:
+            return do_resetu + 1
+        return do_resetu / zbyva  # Zbytek limitu rovnoměrně rozložíme do resetu
+
+    def pockej_na_limit(self):
+        """Volá se PŘED každým požadavkem."""
+        self._aktualizuj_z_pygithub()
+        cekani = min(self._cekani(), MAX_CEKANI)
+        with self._zamek:
+            self.statistiky["pozadavku"] += 1
+            if cekani > 0:
+                self.statistiky["zpomaleni"] += 1
+                self.statistiky["cekani_s"] += cekani
+        if cekani > 0:
+            time.sleep(cekani)
+
+    def pockej_po_chybe(self, chyba, pokus):
+        """
+        Pauza před dalším pokusem: při vyčerpaném limitu do resetu,
+        jinak exponenciální backoff (0.5 s, 1 s, 2 s ...) s jitterem.
+        """
+        hlavicky = getattr(chyba, "headers", None)
+        self.zaznamenej_hlavicky(hlavicky)
+        je_limit = isinstance(chyba, RateLimitExceededException) or (
+            isinstance(chyba, GithubException) and chyba.status in (403, 429)
+            and self._zbyva is not None and self._zbyva <= 0
+        )
+        if je_limit:
+            with self._zamek:
+                self.statistiky["limit_chyb"] += 1
+            cekani = min(self._cekani() or 1.0, MAX_CEKANI)
+        else:
+            cekani = min(8.0, 0.5 * 2 ** pokus) * random.uniform(0.8, 1.2)
+        with self._zamek:
+            self.statistiky["cekani_s"] += cekani
+        time.sleep(cekani)
+
+    # --- PŘÍMÉ HTTP ---
+    def get(self, url, headers=None, **kwargs):
+        """GET přes sdílený pool s autorizací a sledováním limitu."""
+        self.pockej_na_limit()
+        h = {"Authorization": f"Bearer {self.token}"}
+        h.update(headers or {})
+        r = self.session.get(url, headers=h, **kwargs)
+        self.zaznamenej_hlavicky(r.headers)
+        return r
+
+    def stav_limitu(self):
+        """Metriky pro UI / logy: zbývající kvóta, reset a kolik jsme čekali."""
+        self._aktualizuj_z_pygithub()
+        with self._zamek:
+            stav = dict(self.statistiky)
+            stav.update({
+                "zbyva": self._zbyva,
+                "limit": self._limit,
+                "reset_za_s": max(0.0, self._reset - time.time()) if self._reset else None,
+            })
+        return stav
+
+
+# --- SINGLETON PRO BOTY ---
+_KLIENTI = {}
+_KLIENTI_ZAMEK = threading.Lock()
+
+
+def ziskej_klienta(token, repo_nazev):
+    """Jeden klient na (token, repo) v celém procesu (boti nemají st.cache_resource)."""
+    with _KLIENTI_ZAMEK:
+        klic = (token, repo_nazev)
+        if klic not in _KLIENTI:
+            _KLIENTI[klic] = GitHubKlient(token, repo_nazev)
+        return _KLIENTI[klic]
@@ -0,0 +1,62 @@
+import os
+import threading
+from datetime import timedelta
+from requests.adapters import HTTPAdapter
+
+# ==========================================
+# 🌐 SDÍLENÁ HTTP SESSION (keep-alive + cache odpovědí na disku)
+# ==========================================
+# Jedna session na proces pro RSS, Fear & Greed a další GET dotazy mimo Yahoo.
+# Odpovědi se drží v SQLite (HTTP_CACHE_CESTA), takže restart webu i boti spuštění
+# cronem vidí teplou cache. Expirace je po endpointech, co v tabulce není, se necachuje.
+# yfinance 1.x tuto session nepoužije (vyžaduje curl_cffi a sdílí si vlastní pool),
+# odpovědi Yahoo proto cachuje Yahoo brána (yahoo_klient) se stejnou expirací.
+
+HTTP_CACHE_CESTA = os.environ.get("HTTP_CACHE_DB", "http_cache.sqlite")
+VELIKOST_POOLU = 10
+
+EXPIRACE_URL = {
+    "news.google.com/rss/*": timedelta(minutes=15),
+    "servis.idnes.cz/rss*": timedelta(minutes=15),
+    "www.investicniweb.cz/rss*": timedelta(minutes=15),
+    "production.dataviz.cnn.io/*": timedelta(hours=1),
+    "api.alternative.me/*": timedelta(hours=1),
+    "assets*.lottiefiles.com/*": timedelta(days=7),
+}
+
+# Yahoo (druh volání v bráně -> sekundy): kotace krátce, fundamenty den, kalendáře 12 h
+EXPIRACE_YAHOO = {
+    "fast_info": 60,
+    "info": 24 * 3600,
+    "calendar": 12 * 3600,
+    "earnings_dates": 12 * 3600,
+    "insider_transactions": 12 * 3600,
+}
+
+_SESSION = None
+_SESSION_ZAMEK = threading.Lock()
+
+
+def ziskej_session():
+    """
+    Sdílená requests session s cache (requests-cache, SQLite) a poolem spojení.
+    Bez nainstalovaného requests-cache obyčejná requests.Session (jen keep-alive).
+    """
+    global _SESSION
+    with _SESSION_ZAMEK:
+        if _SESSION is None:
+            try:
+                import requests_cache
+                _SESSION = requests_cache.CachedSession(
+                    HTTP_CACHE_CESTA, backend="sqlite",
+                    expire_after=requests_cache.DO_NOT_CACHE,  # Necachovat nic, co není v EXPIRACE_URL
+                    urls_expire_after=EXPIRACE_URL,
+                    stale_if_error=True,  # Výpadek zdroje = poslední uložená odpověď
+                )
+            except ImportError:
+                import requests
+                _SESSION = requests.Session()
+            adapter = HTTPAdapter(pool_connections=VELIKOST_POOLU, pool_maxsize=VELIKOST_POOLU)
+            _SESSION.mount("https://", adapter)
+            _SESSION.mount("http://", adapter)
+        return _SESSION
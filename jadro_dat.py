@@ -0,0 +1,97 @@
+import pandas as pd
+import streamlit as st
+from ocenovani import ocen_portfolio, kurz_do_usd
+from kniha_toku import ziskej_knihu_toku
+from registr_instrumentu import ziskej_registr
+from utils import ziskej_tabuli_cen
+
+# ==========================================
+# ⚙️ PŘÍRŮSTKOVÁ AKTUALIZACE DATOVÉHO JÁDRA
+# ==========================================
+# Po obchodu / dividendě / změně watchlistu se nepřepočítává celé portfolio:
+# přecení se jen dotčené tickery (jejich loty) a jejich řádky se vymění ve vdf,
+# součty se upraví o rozdíl a hotovost se přepočte z df_cash v session.
+# Plný přepočet (calculate_all_data) zůstává pro obnovu cen a ruční editaci dat.
+
+
+def _cash_usd(zustatky, kurzy):
+    return (zustatky.get('USD', 0)) + (zustatky.get('CZK', 0) / kurzy.get("CZK", 20.85)) + (zustatky.get('EUR', 0) * kurzy.get("EUR", 1.16))
+
+
+def _investice_usd(radky, kurzy):
+    return float((radky['Investice'] * kurz_do_usd(radky['Měna'], kurzy)).sum()) if not radky.empty else 0.0
+
+
+def _dopln_kotace(tickery):
+    """Kotace nových tickerů do LIVE_DATA z tabule kurzů (známé hned, i zastaralé)."""
+    live = st.session_state.setdefault('LIVE_DATA', {})
+    chybi = [t for t in tickery if t not in live]
+    if chybi:
+        live.update(ziskej_tabuli_cen().ziskej(chybi, cekat=False))
+    return live
+
+
+def aktualizuj_jadro(tickery=(), watchlist=()):
+    """
+    Aplikuje změnu na st.session_state['data_core'] bez plného přepočtu.
+    tickery: tickery portfolia, jejichž loty se změnily (nákup / prodej)
+    watchlist: tickery přidané na watchlist (jen doplní kotace)
+    Hotovost (zůstatky, cash_usd) se přepočte vždy - je to součet pár měn.
+    Bez jádra neudělá nic (příští běh ho spočítá celé).
+    """
+    core = st.session_state.get('data_core')
+    if core is None:
+        return False
+    kurzy = core['kurzy']
+    tickery = list(dict.fromkeys(str(t) for t in tickery))
+    nove = list(dict.fromkeys(list(tickery) + [str(t) for t in watchlist]))
+    if nove:
+        live = _dopln_kotace(nove)
+        tabule = ziskej_tabuli_cen()
+        aktualni = core.get('verze_cen') == tabule.verze_pro(core.get('tickery_cen', []))
+        core['tickery_cen'] = list(dict.fromkeys(list(core.get('tickery_cen', [])) + nove))
+        # Nové tickery na tabuli nesmí hned vyvolat plný přepočet (verze se mění jen obnovou cen);
+        # obnova cen, která mezitím proběhla u ostatních tickerů, se ale nezamaskuje
+        if aktualni:
+            core['verze_cen'] = tabule.verze_pro(core['tickery_cen'])
+    else:
+        live = st.session_state.get('LIVE_DATA', {})
+
+    if tickery:
+        df = st.session_state['df']
+        vdf = core['vdf']
+        stare = vdf[vdf['Ticker'].isin(tickery)] if not vdf.empty else pd.DataFrame()
+        registr = ziskej_registr()
+        nove_radky, hod_usd, _, _ = ocen_portfolio(
+            df[df['Ticker'].isin(tickery)], live, kurzy, core.get('fundament_data', {}),
+            sektor_funkce=registr.sektor, zeme_funkce=registr.zeme
+        )
+        if not nove_radky.empty:
+            nove_radky = nove_radky[nove_radky['Ticker'].astype(str).isin(tickery)]
+            hod_usd = float(nove_radky['HodnotaUSD'].sum())
+
+        # Součty o rozdíl (staré řádky ven, nové dovnitř)
+        core['celk_hod_usd'] += hod_usd - (float(stare['HodnotaUSD'].sum()) if not stare.empty else 0.0)
+        core['celk_inv_usd'] += _investice_usd(nove_radky, kurzy) - _investice_usd(stare, kurzy)
+
+        zbytek = vdf[~vdf['Ticker'].isin(tickery)] if not vdf.empty else vdf
+        casti = [c for c in (zbytek, nove_radky) if not c.empty]
+        vdf = pd.concat(casti, ignore_index=True).sort_values('Ticker', ignore_index=True) if casti else pd.DataFrame()
+        core['vdf'] = vdf
+        core['viz_data_list'] = vdf.to_dict('records')
+        celk = core['celk_hod_usd']
+        core['vahy'] = (vdf.set_index('Ticker')['HodnotaUSD'] / celk).rename("Váha") if celk and not vdf.empty else pd.Series(dtype=float)
+
+        # Denní změna proti včerejšku (historie vývoje se zapíše až při plném přepočtu)
+        hist = core['hist_vyvoje']
+        if len(hist) > 1:
+            vcera = hist.iloc[-2]['TotalUSD']
+            if pd.notnull(vcera) and vcera > 0:
+                core['zmena_24h'] = celk - vcera
+                core['pct_24h'] = core['zmena_24h'] / vcera * 100
+
+    df_cash = st.session_state.get('df_cash', pd.DataFrame())
+    zustatky = df_cash.groupby('Mena', observed=True)['Castka'].sum().to_dict() if not df_cash.empty else {}
+    core['cash_usd'] = _cash_usd(zustatky, kurzy)
+    ziskej_knihu_toku()  # Kniha toků se dotáhne jen o nově zapsané řádky
+    return True
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from danovy_index import LIMIT_DANE_DNI
+
+# ==========================================
+# 📒 KNIHA LOTŮ (párování prodeje s nákupy)
+# ==========================================
+# Loty každého tickeru jako pole (index řádku v df, kusy, nákupní cena, datum) seřazená podle data.
+# Prodej se spáruje jedním cumsum + searchsorted přes loty v pořadí zvolené metody,
+# výsledkem je realizovaný zisk po lotech. Portfolio se nekopíruje: nové df vznikne
+# jedním dropem spotřebovaných lotů (+ úpravou nanejvýš jednoho částečného lotu).
+
+FIFO = "FIFO"           # Nejstarší loty první (dosavadní chování)
+LIFO = "LIFO"           # Nejnovější loty první
+NEJDRAZSI = "NEJDRAZSI" # Nejvyšší nákupní cena první (nejmenší zisk / největší ztráta)
+DANOVE = "DANOVE"       # Nejdřív loty po časovém testu (osvobozené), pak zdanitelné od nejdražšího
+METODY = {FIFO: "FIFO (nejstarší)", LIFO: "LIFO (nejnovější)", NEJDRAZSI: "Nejdražší první", DANOVE: "Daňově optimální"}
+
+_EPS = 1e-9  # Tolerance pro float kusy (lot spotřebovaný celý)
+
+
+class KnihaLotu:
+    """
+    df: loty (Ticker, Pocet, Cena, Datum). Pole se drží seřazená podle (ticker, datum nákupu),
+    loty jednoho tickeru jsou souvislý úsek [zacatek, konec).
+    """
+
+    def __init__(self, df):
+        datum = pd.to_datetime(df["Datum"], errors="coerce")
+        kody, tickery = pd.factorize(df["Ticker"], sort=True)
+        poradi = np.lexsort((datum.values, kody))
+        poradi = poradi[kody[poradi] >= 0]
+
+        self.tickery = pd.Index(tickery, name="Ticker")
+        self.index = df.index.values[poradi]
+        self.pocet = pd.to_numeric(df["Pocet"], errors="coerce").fillna(0).to_numpy(dtype=float)[poradi]
+        self.cena = pd.to_numeric(df["Cena"], errors="coerce").fillna(0).to_numpy(dtype=float)[poradi]
+        self.datum = datum.values[poradi]
+        hranice = np.searchsorted(kody[poradi], np.arange(len(tickery) + 1))
+        self._useky = {t: (hranice[i], hranice[i + 1]) for i, t in enumerate(tickery)}
+
+    def kusy(self, ticker):
+        zacatek, konec = self._useky.get(ticker, (0, 0))
+        return float(self.pocet[zacatek:konec].sum())
+
+    def _poradi(self, zacatek, konec, metoda, dnes):
+        """Pořadí lotů úseku (relativní indexy) podle metody výběru."""
+        n = konec - zacatek
+        if metoda == FIFO:
+            return np.arange(n)
+        if metoda == LIFO:
+            return np.arange(n)[::-1]
+        cena = self.cena[zacatek:konec]
+        if metoda == NEJDRAZSI:
+            return np.argsort(-cena, kind="stable")
+        if metoda == DANOVE:
+            dnes = np.datetime64(pd.Timestamp(dnes or datetime.now()))
+            osvobozeni = self.datum[zacatek:konec] + np.timedelta64(LIMIT_DANE_DNI, "D")
+            zamceny = (osvobozeni > dnes).astype(int)  # NaT > x je False -> osvobozený (jako DanovyIndex)
+            # Klíče lexsortu: poslední je primární -> volné loty (od nejstaršího), pak zamčené od nejdražšího
+            return np.lexsort((np.where(zamceny == 1, -cena, 0.0), zamceny))
+        raise ValueError(f"Neznámá metoda výběru lotů: {metoda}")
+
+    def vyber(self, ticker, kusy, cena_prodeje, metoda=FIFO, dnes=None):
+        """
+        Spáruje prodej `kusy` kusů za `cena_prodeje` s loty tickeru.
+        Returns: DataFrame spotřebovaných lotů (Index, Datum, NakupniCena, Ukrojeno, Zbyva, Zisk)
+        v pořadí spotřeby. Vyhodí ValueError, pokud je kusů málo.
+        """
+        zacatek, konec = self._useky.get(ticker, (0, 0))
+        if kusy <= 0 or self.pocet[zacatek:konec].sum() < kusy - _EPS:
+            raise ValueError("Nedostatek kusů.")
+
+        p = zacatek + self._poradi(zacatek, konec, metoda, dnes)
+        pocet = self.pocet[p]
+        kum = np.cumsum(pocet)
+        posledni = min(int(np.searchsorted(kum, kusy - _EPS)), len(p) - 1)  # Lot, ve kterém se prodej zastaví
+        p, pocet, kum = p[:posledni + 1], pocet[:posledni + 1], kum[:posledni + 1]
+
+        ukrojeno = np.minimum(pocet, kusy - (kum - pocet))
+        zbyva = pocet - ukrojeno
+        zbyva[zbyva < _EPS] = 0.0
+        return pd.DataFrame({
+            "Index": self.index[p],
+            "Datum": self.datum[p],
+            "NakupniCena": self.cena[p],
+            "Ukrojeno": ukrojeno,
+            "Zbyva": zbyva,
+            "Zisk": (cena_prodeje - self.cena[p]) * ukrojeno,
+        })
+
+    @staticmethod
+    def aplikuj(df, vyber):
+        """Nové df po prodeji: celé loty pryč, částečným se sníží Pocet (původní df se nemění)."""
+        cele = vyber["Zbyva"] == 0
+        df_novy = df.drop(vyber.loc[cele, "Index"])
+        for idx, zbyva in vyber.loc[~cele, ["Index", "Zbyva"]].itertuples(index=False):
+            df_novy.at[idx, "Pocet"] = zbyva
+        return df_novy
@@ -0,0 +1,111 @@
+import pandas as pd
+import streamlit as st
+from ocenovani import kurz_do_usd
+from storage_engine import klice_radku
+
+# ==========================================
+# 💰 KNIHA TOKŮ (realizovaný zisk a peněžní toky)
+# ==========================================
+# Průběžné součty po měnách: netto vklady, dividendy, realizovaný zisk z prodejů (history_data.csv)
+# a netto toky směn. Zápisy do df_cash / df_div / df_hist jsou přírůstkové (concat na konec),
+# takže se při synchronizaci zpracují jen nové řádky. Dashboard, PDF a Telegram čtou hotové
+# součty (pár měn) místo procházení celé historie. Plné sestavení jen po editaci / znovunačtení dat.
+
+TYPY_VKLAD = ("Vklad", "Deposit")
+TYPY_VYBER = ("Výběr", "Withdrawal")
+TYP_SMENA = "Směna"
+
+_ZDROJE = ("df_cash", "df_div", "df_hist")
+
+
+def _podpis(df, pozice):
+    """
+    Otisk celého řádku (typ, částka, měna, datum, poznámka...), podle kterého se pozná,
+    že se začátek tabulky nezměnil. Normalizace jako u delta zápisů úložiště (CSV / SQLite / paměť).
+    """
+    return klice_radku(df.iloc[[pozice]], sorted(df.columns, key=str)).iloc[0]
+
+
+def _po_menach(mena, castka):
+    return castka.groupby(mena.astype(str).values).sum().to_dict()
+
+
+class KnihaToku:
+    def __init__(self):
+        self.vklady = {}       # Netto vklady (vklady - výběry) po měnách
+        self.dividendy = {}
+        self.realizovano = {}  # Zisk z uzavřených obchodů (history_data.csv) po měnách
+        # Netto toky směn po měnách (odepsáno / připsáno). Nejsou to kurzový zisk: směna proběhne
+        # v aktuálním kurzu a historické kurzy se neukládají -> do tržního zisku se nezapočítávají
+        self.smena = {}
+        self._stav = {}        # zdroj -> (zpracováno řádků, otisk posledního zpracovaného)
+
+    @staticmethod
+    def _pricti(cil, prirustky):
+        for mena, castka in prirustky.items():
+            cil[mena] = cil.get(mena, 0.0) + float(castka)
+
+    def _zpracuj(self, zdroj, radky):
+        if zdroj == "df_cash":
+            typ = radky["Typ"].astype(str) if "Typ" in radky else pd.Series("", index=radky.index)
+            castka = pd.to_numeric(radky["Castka"], errors="coerce").fillna(0)
+            # Výběr se zapisuje záporně, starší řádky kladně -> znaménko podle typu
+            vklady = castka.abs().where(typ.isin(TYPY_VKLAD), 0) - castka.abs().where(typ.isin(TYPY_VYBER), 0)
+            maska = typ.isin(TYPY_VKLAD + TYPY_VYBER)
+            self._pricti(self.vklady, _po_menach(radky["Mena"][maska], vklady[maska]))
+            maska = typ == TYP_SMENA
+            self._pricti(self.smena, _po_menach(radky["Mena"][maska], castka[maska]))
+        elif zdroj == "df_div":
+            self._pricti(self.dividendy, _po_menach(radky["Mena"], pd.to_numeric(radky["Castka"], errors="coerce").fillna(0)))
+        else:
+            self._pricti(self.realizovano, _po_menach(radky["Mena"], pd.to_numeric(radky["Zisk"], errors="coerce").fillna(0)))
+
+    def synchronizuj(self, tabulky):
+        """
+        Zpracuje jen řádky přidané od minula. tabulky: {"df_cash": df, "df_div": df, "df_hist": df}
+        Returns: False, pokud se tabulka změnila jinak než přidáním na konec (pak je nutné sestavit znovu).
+        Kontroluje se počet řádků a otisk posledního zpracovaného; ruční editace starších řádků
+        knihu zahodí explicitně (invalidate_data_core).
+        """
+        nove = {}
+        for zdroj in _ZDROJE:
+            df = tabulky.get(zdroj)
+            if df is None: df = pd.DataFrame()
+            n_stare, otisk = self._stav.get(zdroj, (0, None))
+            if len(df) < n_stare or (n_stare and _podpis(df, n_stare - 1) != otisk):
+                return False
+            nove[zdroj] = (df, n_stare)
+
+        for zdroj, (df, n_stare) in nove.items():
+            if len(df) > n_stare:
+                self._zpracuj(zdroj, df.iloc[n_stare:])
+                self._stav[zdroj] = (len(df), _podpis(df, len(df) - 1))
+        return True
+
+    @staticmethod
+    def _czk(po_menach, kurzy):
+        if not po_menach: return 0.0
+        meny = list(po_menach)
+        kurz_czk = kurzy.get("CZK", 20.85)
+        return float(sum(pd.Series(po_menach).values * kurz_do_usd(meny, kurzy)) * kurz_czk)
+
+    def souhrn(self, kurzy):
+        """Součty přepočtené do CZK aktuálními kurzy (+ dividendy a toky směn po měnách)."""
+        return {
+            "vklady_czk": self._czk(self.vklady, kurzy),
+            "dividendy_czk": self._czk(self.dividendy, kurzy),
+            "realizovano_czk": self._czk(self.realizovano, kurzy),
+            "dividendy_po_menach": dict(self.dividendy),
+            "smena_po_menach": dict(self.smena),
+        }
+
+
+def ziskej_knihu_toku():
+    """Kniha toků uživatele v session, dotažená o nové řádky (nebo sestavená znovu)."""
+    tabulky = {zdroj: st.session_state.get(zdroj) for zdroj in _ZDROJE}
+    kniha = st.session_state.get('kniha_toku')
+    if kniha is None or not kniha.synchronizuj(tabulky):
+        kniha = KnihaToku()
+        kniha.synchronizuj(tabulky)
+        st.session_state['kniha_toku'] = kniha
+    return kniha
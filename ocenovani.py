@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from danovy_index import DanovyIndex, LIMIT_DANE_DNI
+
+# ==========================================
+# 🧮 OCEŇOVÁNÍ PORTFOLIA (vektorově)
+# ==========================================
+# Loty (portfolio_data) se seskupí po tickerech jedním groupby a spojí s tabulkou
+# kotací, kurzů a fundamentů. Hodnota, investice, zisk, hodnota v USD, daňový status
+# i váhy vzniknou po sloupcích - bez iterrows a bez filtrování df pro každý ticker.
+# Výstup má schéma dřívějších viz_data / vdf z calculate_all_data (+ sloupce daňového indexu na konci).
+
+SLOUPCE_VDF = ["Ticker", "Sektor", "HodnotaUSD", "Zisk", "Měna", "Hodnota", "Cena", "Kusy", "Průměr", "Dan",
+               "Investice", "Divi", "Dnes", "Země", "P/E", "Kapitalizace", "KusyBezDane", "DalsiOsvobozeni"]
+
+
+def _tabulka(data, index, sloupce):
+    """{ticker: {...}} -> DataFrame zarovnaný na index tickerů (chybějící = NaN)."""
+    tab = pd.DataFrame.from_dict(data or {}, orient="index")
+    return tab.reindex(index=index, columns=sloupce)
+
+
+def kurz_do_usd(meny, kurzy):
+    """Vektor koeficientů měna -> USD (CZK: 1/kurz, EUR: kurz EURUSD, jinak 1)."""
+    meny = np.asarray(meny, dtype=object)
+    return np.select(
+        [meny == "CZK", meny == "EUR"],
+        [1.0 / kurzy.get("CZK", 20.85), kurzy.get("EUR", 1.16)],
+        1.0,
+    )
+
+
+def ocen_portfolio(df, kotace, kurzy, fundamenty=None, sektor_funkce=None, zeme_funkce=None, dnes=None):
+    """
+    df: loty (Ticker, Pocet, Cena, Datum[, Sektor])
+    kotace: {ticker: {"price", "curr", "change"}} (LIVE_DATA)
+    fundamenty: {ticker: {"trailingPE", "marketCap", "vynos"}}
+    sektor_funkce / zeme_funkce: ticker -> sektor / země (registr instrumentů)
+    Returns: (vdf, celková hodnota v USD, celková investice v USD, váhy tickerů podle HodnotaUSD)
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(), 0, 0, pd.Series(dtype=float)
+    dnes = pd.Timestamp(dnes or datetime.now())
+
+    loty = pd.DataFrame({
+        "Ticker": df["Ticker"],
+        "Pocet": df["Pocet"],
+        "Cena": df["Cena"],
+        "_inv": df["Pocet"] * df["Cena"],
+    })
+    g = loty.groupby("Ticker", sort=True, observed=True).agg(Kusy=("Pocet", "sum"), Průměr=("Cena", "mean"), Investice=("_inv", "sum"))
+    tickery = g.index
+    dan = DanovyIndex(df, LIMIT_DANE_DNI).stav(dnes).reindex(tickery)
+
+    # Kotace (chybějící / nulová cena -> průměrná nákupní, aby hodnota nebyla 0)
+    kot = _tabulka(kotace, tickery, ["price", "curr", "change"])
+    cena = pd.to_numeric(kot["price"], errors="coerce")
+    cena = cena.where(cena.notna() & (cena != 0), g["Průměr"])
+    mena = kot["curr"].fillna("USD")
+
+    hodnota = g["Kusy"] * cena
+    k = kurz_do_usd(mena, kurzy)
+    hodnota_usd = hodnota * k
+
+    # Sektor z prvního lotu tickeru, prázdný -> registr (pokud ho už zná) / "Doplnit"
+    if "Sektor" in df.columns:
+        prvni = df.drop_duplicates("Ticker").set_index("Ticker")["Sektor"].reindex(tickery)
+        sektor = prvni.astype(object).where(prvni.notna() & (prvni.astype(str).str.strip() != ""), "Doplnit").astype(str)
+    else:
+        sektor = pd.Series("Doplnit", index=tickery)
+    if sektor_funkce is not None:
+        for t in sektor.index[sektor.isin(["Doplnit", "Neznámý"])]:
+            z_registru = sektor_funkce(t)
+            if z_registru != "Neznámý": sektor[t] = z_registru
+
+    fund = _tabulka(fundamenty, tickery, ["vynos", "trailingPE", "marketCap"])
+    kapitalizace = pd.to_numeric(fund["marketCap"], errors="coerce").fillna(0) / 1e9
+
+    vdf = pd.DataFrame({
+        "Ticker": tickery,
+        "Sektor": sektor.values,
+        "HodnotaUSD": hodnota_usd.values,
+        "Zisk": (hodnota - g["Investice"]).values,
+        "Měna": mena.values,
+        "Hodnota": hodnota.values,
+        "Cena": cena.values,
+        "Kusy": g["Kusy"].values,
+        "Průměr": g["Průměr"].values,
+        "Dan": dan["Dan"].values,
+        "Investice": g["Investice"].values,
+        "Divi": pd.to_numeric(fund["vynos"], errors="coerce").fillna(0).values,
+        "Dnes": pd.to_numeric(kot["change"], errors="coerce").fillna(0).values,
+        "Země": [zeme_funkce(t) for t in tickery] if zeme_funkce is not None else "United States",
+        "P/E": pd.to_numeric(fund["trailingPE"], errors="coerce").fillna(0).values,
+        "Kapitalizace": kapitalizace.values,
+        "KusyBezDane": dan["KusyBezDane"].values,
+        "DalsiOsvobozeni": dan["DalsiOsvobozeni"].values,
+    }, columns=SLOUPCE_VDF)
+
+    celk_hod_usd = float(hodnota_usd.sum())
+    celk_inv_usd = float((g["Investice"] * k).sum())
+    vahy = pd.Series(vdf["HodnotaUSD"].values / celk_hod_usd if celk_hod_usd else 0.0, index=tickery, name="Váha")
+    return vdf, celk_hod_usd, celk_inv_usd, vahy
@@ -0,0 +1,236 @@
+import sqlite3
+import threading
+import time
+from sklad_cen import SKLAD_CESTA
+
+# ==========================================
+# 🗃️ REGISTR INSTRUMENTŮ (měna, burza, sektor, země)
+# ==========================================
+# Metadata tickeru se zjistí jednou (Yahoo .info), uloží do SQLite vedle skladu cen
+# a pak je každý modul čte z paměti v O(1) bez sítě. Neznámý / starý ticker
+# dostane hned odhad podle přípony a doplní se na pozadí.
+# Nahrazuje odhady měny podle přípony roztroušené po utils, botech a výpočtu portfolia.
+
+OBNOVA_S = 30 * 86400  # Po jaké době se metadata tickeru obnoví (líně, na pozadí)
+
+# Přípona -> (měna, burza, země)
+PRIPONY = {
+    ".PR": ("CZK", "PRA", "Czechia"),
+    ".DE": ("EUR", "GER", "Germany"),
+    ".F": ("EUR", "FRA", "Germany"),
+    ".PA": ("EUR", "PAR", "France"),
+    ".AS": ("EUR", "AMS", "Netherlands"),
+    ".MI": ("EUR", "MIL", "Italy"),
+    ".L": ("GBp", "LSE", "United Kingdom"),
+    ".SW": ("CHF", "EBS", "Switzerland"),
+}
+
+# Aplikace drží hotovost, směny a kurzy jen v těchto měnách (kurz_do_usd, df_cash).
+# Kotace v jiné měně se převede do USD přes FX pár Yahoo (CHFUSD=X), kotace v setinách
+# (pence GBp / GBX, ...) se navíc vydělí 100 - jinak by LSE řádek byl 100x nadhodnocený.
+MENY_APLIKACE = ("USD", "CZK", "EUR")
+SETINY = {"GBp": ("GBP", 100), "GBX": ("GBP", 100), "ZAc": ("ZAR", 100), "ILA": ("ILS", 100)}
+
+# Sektory z Yahoo -> čeština (jako dřív v ziskej_sektor_tickeru)
+PREKLAD_SEKTORU = {
+    "Technology": "Technologie",
+    "Financial Services": "Finance",
+    "Energy": "Energie",
+    "Healthcare": "Zdravotnictví",
+    "Consumer Cyclical": "Zbytné spotřební",
+    "Industrials": "Průmysl",
+    "Communication Services": "Komunikace"
+}
+
+POLE = ["mena", "burza", "sektor", "zeme", "nazev"]
+
+
+def odhad(ticker):
+    """Metadata jen podle tvaru tickeru (bez sítě)."""
+    t = str(ticker).upper().strip()
+    if t.endswith("=X"):
+        # Měnový pár: CZK=X = USD/CZK (kotace v CZK), EURUSD=X kotace v USD
+        return {"mena": t[:-2][-3:], "burza": "CCY", "sektor": "", "zeme": "", "nazev": t}
+    if t.startswith("^") or t.endswith("=F"):
+        return {"mena": "USD", "burza": "", "sektor": "", "zeme": "", "nazev": t}
+    for pripona, (mena, burza, zeme) in PRIPONY.items():
+        if t.endswith(pripona):
+            return {"mena": mena, "burza": burza, "sektor": "Energy/Utilities (CZ)" if pripona == ".PR" else "",
+                    "zeme": zeme, "nazev": t}
+    return {"mena": "USD", "burza": "", "sektor": "", "zeme": "United States", "nazev": t}
+
+
+def prevod_kotace(mena):
+    """
+    Jak dostat cenu kotovanou v měně 'mena' do měny aplikace.
+    Returns: (měna aplikace, dělitel, FX pár do USD nebo None)
+    """
+    mena, delitel = SETINY.get(mena, (mena or "USD", 1))
+    if mena in MENY_APLIKACE:
+        return mena, delitel, None
+    return "USD", delitel, f"{mena}USD=X"
+
+
+def _stahni_yahoo(ticker):
+    from yahoo_klient import yahoo_info
+    return yahoo_info(ticker)
+
+
+class RegistrInstrumentu:
+    """
+    {ticker: {"mena", "burza", "sektor", "zeme", "nazev", "zdroj", "aktualizovano"}}
+    v paměti + tabulka 'instrumenty' v SQLite. stahni_funkce(ticker) -> dict jako Ticker.info.
+    """
+
+    def __init__(self, db_cesta=SKLAD_CESTA, stahni_funkce=_stahni_yahoo, obnova=OBNOVA_S):
+        self.db_cesta = db_cesta
+        self._stahni = stahni_funkce
+        self.obnova = obnova
+        self._zamek = threading.Lock()
+        self._ke_stazeni = set()
+        self._obohacovac = None
+        self.statistiky = {"dotazu": 0, "z_registru": 0, "odhadu": 0, "stazeni": 0, "chyb": 0}
+
+        con = self._pripoj()
+        try:
+            with con:
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS instrumenty (ticker TEXT PRIMARY KEY, mena TEXT, burza TEXT, "
+                    "sektor TEXT, zeme TEXT, nazev TEXT, zdroj TEXT, aktualizovano REAL)"
+                )
+            self._zaznamy = {
+                r[0]: dict(zip(POLE + ["zdroj", "aktualizovano"], r[1:]))
+                for r in con.execute(f"SELECT ticker, {', '.join(POLE)}, zdroj, aktualizovano FROM instrumenty")
+            }
+        finally:
+            con.close()
+
+    def _pripoj(self):
+        con = sqlite3.connect(self.db_cesta, timeout=30, check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    # --- ZÁPIS ---
+    def vloz_info(self, ticker, info, zdroj="yahoo"):
+        """Uloží metadata z odpovědi Ticker.info (lze volat i s .info staženým jinde - bez dalšího volání)."""
+        t = str(ticker).upper().strip()
+        if not info:
+            return None
+        zaklad = odhad(t)
+        zaznam = {
+            "mena": info.get("currency") or zaklad["mena"],
+            "burza": info.get("exchange") or zaklad["burza"],
+            "sektor": info.get("sector") or zaklad["sektor"],
+            "zeme": info.get("country") or zaklad["zeme"],
+            "nazev": info.get("longName") or info.get("shortName") or zaklad["nazev"],
+            "zdroj": zdroj,
+            "aktualizovano": time.time(),
+        }
+        with self._zamek:
+            self._zaznamy[t] = zaznam
+            con = self._pripoj()
+            try:
+                with con:
+                    con.execute(
+                        "INSERT OR REPLACE INTO instrumenty VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [t] + [zaznam[k] for k in POLE] + [zdroj, zaznam["aktualizovano"]],
+                    )
+            finally:
+                con.close()
+        return zaznam
+
+    def obohat(self, tickery):
+        """Synchronně doplní tickery, které v registru chybí nebo jsou staré (boti, prefetch)."""
+        ted = time.time()
+        for t in {str(t).upper().strip() for t in tickery if str(t).strip()}:
+            zaznam = self._zaznamy.get(t)
+            if zaznam and ted - (zaznam["aktualizovano"] or 0) < self.obnova:
+                continue
+            self.statistiky["stazeni"] += 1
+            try:
+                self.vloz_info(t, self._stahni(t))
+            except Exception as e:
+                self.statistiky["chyb"] += 1
+                print(f"⚠️ Registr instrumentů: {t} nejde doplnit ({e})")
+
+    # --- OBOHACENÍ NA POZADÍ ---
+    def _naplanuj(self, ticker):
+        with self._zamek:
+            self._ke_stazeni.add(ticker)
+            if self._obohacovac is None or not self._obohacovac.is_alive():
+                self._obohacovac = threading.Thread(target=self._smycka, name="registr-instrumentu", daemon=True)
+                self._obohacovac.start()
+
+    def _smycka(self):
+        while True:
+            with self._zamek:
+                tickery = sorted(self._ke_stazeni)
+                self._ke_stazeni.clear()
+                if not tickery:
+                    self._obohacovac = None
+                    return
+            self.obohat(tickery)
+
+    # --- ČTENÍ (O(1), bez sítě) ---
+    def instrument(self, ticker):
+        """Metadata tickeru; chybějící / staré se vrátí jako odhad a doplní na pozadí."""
+        t = str(ticker).upper().strip()
+        self.statistiky["dotazu"] += 1
+        zaznam = self._zaznamy.get(t)
+        if zaznam is None or time.time() - (zaznam["aktualizovano"] or 0) >= self.obnova:
+            self._naplanuj(t)
+        if zaznam is None:
+            self.statistiky["odhadu"] += 1
+            return {**odhad(t), "zdroj": "odhad", "aktualizovano": None}
+        self.statistiky["z_registru"] += 1
+        return zaznam
+
+    def prevod(self, ticker):
+        """(měna aplikace, dělitel, FX pár nebo None) pro ceny tickeru; kurzy a indexy se nepřevádí."""
+        t = str(ticker).upper().strip()
+        mena = self.instrument(t)["mena"]
+        if t.endswith("=X") or t.startswith("^"):
+            return (mena if mena in MENY_APLIKACE else "USD"), 1, None
+        return prevod_kotace(mena)
+
+    def mena(self, ticker):
+        """Měna, ve které aplikace ticker oceňuje a obchoduje (vždy jedna z MENY_APLIKACE)."""
+        return self.prevod(ticker)[0]
+
+    def fx_pary(self, tickery):
+        """FX páry, které je potřeba stáhnout spolu s cenami tickerů (prázdné pro USD/CZK/EUR)."""
+        return sorted({p for p in (self.prevod(t)[2] for t in tickery) if p})
+
+    def do_meny_aplikace(self, ticker, cena, fx_ceny):
+        """
+        Cena z kotace Yahoo převedená do měny aplikace (self.mena).
+        fx_ceny: {FX pár: kurz} pro páry z fx_pary. Returns: None, když potřebný kurz chybí.
+        """
+        _, delitel, par = self.prevod(ticker)
+        if par is None:
+            return cena / delitel
+        kurz = fx_ceny.get(par)
+        return cena / delitel * kurz if kurz else None
+
+    def zeme(self, ticker):
+        return self.instrument(ticker)["zeme"] or "United States"
+
+    def sektor(self, ticker):
+        """Sektor česky ('Neznámý', dokud ho registr nezná)."""
+        sektor = self.instrument(ticker)["sektor"]
+        return PREKLAD_SEKTORU.get(sektor, sektor) if sektor else "Neznámý"
+
+
+# --- SINGLETON (web i boti sdílí jeden registr na proces) ---
+_REGISTR = None
+_REGISTR_ZAMEK = threading.Lock()
+
+
+def ziskej_registr():
+    """Jeden RegistrInstrumentu na proces."""
+    global _REGISTR
+    with _REGISTR_ZAMEK:
+        if _REGISTR is None:
+            _REGISTR = RegistrInstrumentu(SKLAD_CESTA)
+        return _REGISTR
@@ -0,0 +1,181 @@
+import io
+import os
+from collections import namedtuple
+import pandas as pd
+from storage_engine import vlastnik_oddilu
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_OK = True
+except ImportError:
+    PYARROW_OK = False
+
+# ==========================================
+# 📐 REGISTR SCHÉMAT (jedno místo pro typy všech SOUBOR_*)
+# ==========================================
+# Typy sloupců
+DATUM = "datum"          # datetime64, ISO 8601 ('2025-12-14' i '2025-12-14 00:08:25.759710')
+CISLO = "cislo"          # float64, chybějící / nečitelné hodnoty -> 0.0
+CELE = "cele"            # int64, chybějící / nečitelné hodnoty -> 0
+KATEGORIE = "kategorie"  # category (Ticker, Owner, Mena, Typ = pár unikátních hodnot, hodně řádků);
+                         # data_manager je aplikaci vydává jako text (bez_kategorii)
+TEXT = "text"            # ponechá se, jak je
+
+# vychozi = hodnota pro sloupec, který v souboru CHYBÍ (None = sloupec se nedoplňuje)
+Sloupec = namedtuple("Sloupec", ["typ", "vychozi"])
+# prejmenovani = migrace starých formátů {starý sloupec: nový sloupec}
+Schema = namedtuple("Schema", ["sloupce", "prejmenovani"])
+
+_OWNER = Sloupec(KATEGORIE, "admin")
+
+SCHEMATA = {
+    "portfolio_data.csv": Schema({
+        "Ticker": Sloupec(KATEGORIE, None), "Pocet": Sloupec(CISLO, None), "Cena": Sloupec(CISLO, None),
+        "Datum": Sloupec(DATUM, None), "Owner": _OWNER,
+        "Sektor": Sloupec(TEXT, "Doplnit"), "Poznamka": Sloupec(TEXT, ""),
+    }, {}),
+    "history_data.csv": Schema({
+        "Ticker": Sloupec(KATEGORIE, None), "Kusu": Sloupec(CISLO, None), "Prodejka": Sloupec(CISLO, None),
+        "Zisk": Sloupec(CISLO, None), "Mena": Sloupec(KATEGORIE, None), "Datum": Sloupec(DATUM, None), "Owner": _OWNER,
+    }, {}),
+    "cash_data.csv": Schema({
+        "Typ": Sloupec(KATEGORIE, None), "Castka": Sloupec(CISLO, None), "Mena": Sloupec(KATEGORIE, None),
+        "Poznamka": Sloupec(TEXT, None), "Datum": Sloupec(DATUM, None), "Owner": _OWNER,
+    }, {}),
+    "value_history.csv": Schema({
+        "Date": Sloupec(DATUM, None), "TotalUSD": Sloupec(CISLO, None), "Owner": _OWNER,
+    }, {}),
+    "watchlist.csv": Schema({
+        "Ticker": Sloupec(KATEGORIE, None), "TargetBuy": Sloupec(CISLO, 0.0), "TargetSell": Sloupec(CISLO, 0.0),
+        "Owner": _OWNER,
+    }, {"Target": "TargetBuy"}),
+    "dividends.csv": Schema({
+        "Ticker": Sloupec(KATEGORIE, None), "Castka": Sloupec(CISLO, None), "Mena": Sloupec(KATEGORIE, None),
+        "Datum": Sloupec(DATUM, None), "Owner": _OWNER,
+    }, {}),
+    "users_db.csv": Schema({
+        "username": Sloupec(TEXT, None), "password": Sloupec(TEXT, None), "recovery_key": Sloupec(TEXT, None),
+        "Owner": _OWNER,
+    }, {}),
+    "user_stats.csv": Schema({
+        "Owner": _OWNER, "XP": Sloupec(CELE, None), "LastLogin": Sloupec(TEXT, None),
+        "Level": Sloupec(CELE, None), "CompletedQuests": Sloupec(TEXT, None),
+    }, {}),
+    "strategy_history.csv": Schema({
+        "Timestamp": Sloupec(TEXT, None), "Owner": _OWNER, "Sentiment": Sloupec(TEXT, None), "Advice": Sloupec(TEXT, None),
+    }, {}),
+}
+
+
+def schema_souboru(nazev_souboru):
+    """Schéma podle názvu souboru; funguje i pro oddíl uživatele (data/<Owner>_<tabulka>.csv)."""
+    nazev = str(nazev_souboru)
+    if nazev in SCHEMATA:
+        return SCHEMATA[nazev]
+    for zaklad, schema in SCHEMATA.items():
+        if vlastnik_oddilu(nazev, zaklad) is not None:
+            return schema
+    return SCHEMATA.get(os.path.basename(nazev))
+
+
+def sloupce_schematu(nazev_souboru):
+    """Seznam sloupců datasetu (pro prázdné tabulky), None pro neznámý soubor."""
+    schema = schema_souboru(nazev_souboru)
+    return list(schema.sloupce) if schema else None
+
+
+# --- PŘEVOD TYPŮ ---
+def _preved_sloupec(s, typ):
+    if typ == DATUM:
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return s
+        return pd.to_datetime(s, errors='coerce', format='ISO8601')
+    if typ == CISLO:
+        if not pd.api.types.is_float_dtype(s):
+            s = pd.to_numeric(s, errors='coerce').astype("float64")
+        return s.fillna(0.0)
+    if typ == CELE:
+        if pd.api.types.is_integer_dtype(s):
+            return s
+        return pd.to_numeric(s, errors='coerce').fillna(0).astype("int64")
+    if typ == KATEGORIE:
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            return s.cat.remove_unused_categories()
+        return s.astype("category")
+    return s
+
+
+def preved_typy(df, nazev_souboru):
+    """
+    Převede DataFrame na typy ze schématu: migrace starých sloupců, doplnění chybějících
+    a převod typů. Sloupce, které už správný typ mají (rychlý parser), se jen přeskočí.
+    """
+    schema = schema_souboru(nazev_souboru)
+    if schema is not None:
+        for stary, novy in schema.prejmenovani.items():
+            if stary in df.columns:
+                df = df.rename(columns={stary: novy}) if novy not in df.columns else df.drop(columns=[stary])
+
+        for col, sloupec in schema.sloupce.items():
+            if col not in df.columns:
+                if sloupec.vychozi is None:
+                    continue
+                df[col] = sloupec.vychozi
+            if col != 'Owner':
+                df[col] = _preved_sloupec(df[col], sloupec.typ)
+
+    if 'Owner' not in df.columns: df['Owner'] = "admin"
+    owner = df['Owner']
+    if not (isinstance(owner.dtype, pd.CategoricalDtype) and not owner.isna().any()):
+        owner = owner.astype(str)
+    df['Owner'] = _preved_sloupec(owner, KATEGORIE)
+    return df
+
+
+def bez_kategorii(df):
+    """Kopie s kategoriemi převedenými na text (st.data_editor u kategorie nepovolí novou hodnotu)."""
+    kategorie = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    return df.astype({c: object for c in kategorie}) if kategorie else df.copy()
+
+
+# --- PARSER CSV ---
+_ARROW_TYPY = {
+    DATUM: lambda: pa.timestamp("us"),
+    CISLO: lambda: pa.float64(),
+    CELE: lambda: pa.float64(),  # Prázdné buňky -> NaN, na int64 se převede v preved_typy
+    KATEGORIE: lambda: pa.dictionary(pa.int32(), pa.string()),
+    TEXT: lambda: pa.string(),
+}
+
+
+def _parsuj_pyarrow(zdroj, schema):
+    typy = {col: _ARROW_TYPY[s.typ]() for col, s in schema.sloupce.items()}
+    for stary in schema.prejmenovani:
+        typy[stary] = pa.float64()
+    moznosti = pa_csv.ConvertOptions(
+        column_types=typy, strings_can_be_null=True, timestamp_parsers=[pa_csv.ISO8601]
+    )
+    return pa_csv.read_csv(zdroj, convert_options=moznosti).to_pandas()
+
+
+def parsuj_csv(obsah, nazev_souboru):
+    """
+    Jednoprůchodové načtení CSV s explicitními typy ze schématu (pyarrow engine).
+    obsah: text nebo bytes CSV.
+    Když rychlá cesta selže (nečitelná hodnota ve sloupci), spadne na pd.read_csv
+    a typy dorovná preved_typy() s errors='coerce' jako dřív.
+    """
+    schema = schema_souboru(nazev_souboru)
+    if isinstance(obsah, str):
+        obsah = obsah.encode("utf-8")
+
+    if PYARROW_OK and schema is not None:
+        try:
+            return preved_typy(_parsuj_pyarrow(io.BytesIO(obsah), schema), nazev_souboru)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError):
+            pass
+
+    textove = {col: object for col, s in schema.sloupce.items() if s.typ == TEXT} if schema else None
+    df = pd.read_csv(io.BytesIO(obsah), dtype=textove)
+    return preved_typy(df, nazev_souboru) if schema is not None else df
@@ -0,0 +1,378 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+
+# ==========================================
+# 📈 SKLAD CEN (lokální OHLCV pro web i boty)
+# ==========================================
+# Jedna tabulka denních svíček (ticker, datum) místo samostatného yf.download
+# v každé stránce a každém botovi. Z Yahoo se stahuje jen to, co ve skladu chybí,
+# opakované načtení stránky už síť vůbec nepotřebuje.
+
+SKLAD_CESTA = os.environ.get("SKLAD_CEN_DB", "ceny.db")
+CERSTVOST_S = 900  # Jak dlouho platí dnešní (neuzavřená) svíčka, než ji stáhneme znovu
+HLUBOKA_HISTORIE = "5y"  # Jednorázové stažení pro nově viděný ticker (pokryje 2y analýzy i DCA)
+OPAKOVANI_BACKFILL_S = 600  # Neúspěšný backfill (výpadek Yahoo, delisting) se zkusí znovu až po této době
+SLOUPCE = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def zacatek_obdobi(obdobi, dnes=None):
+    """'5d' / '2mo' / '1y' (jako period v yfinance) -> datum začátku okna."""
+    dnes = pd.Timestamp(dnes or datetime.now()).normalize()
+    obdobi = str(obdobi).strip().lower()
+    if obdobi.endswith("mo"):
+        return dnes - pd.DateOffset(months=int(obdobi[:-2]))
+    if obdobi.endswith("y"):
+        return dnes - pd.DateOffset(years=int(obdobi[:-1]))
+    if obdobi.endswith("d"):
+        return dnes - pd.Timedelta(days=int(obdobi[:-1]))
+    raise ValueError(f"Neznámé období: {obdobi}")
+
+
+def _na_datum(hodnota):
+    """Datum / období / None (= dnes) -> Timestamp bez času."""
+    if hodnota is None:
+        return pd.Timestamp(datetime.now()).normalize()
+    if isinstance(hodnota, str) and hodnota[-1:].isalpha():
+        return zacatek_obdobi(hodnota)
+    ts = pd.Timestamp(hodnota)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.normalize()
+
+
+def _stahni_yahoo(tickery, start, konec):
+    """
+    Jedno hromadné yf.download pro okno <start, konec>.
+    Returns: {ticker: DataFrame se sloupci SLOUPCE a indexem = datum}
+    """
+    from yahoo_klient import yahoo_download
+    batch = yahoo_download(
+        list(tickery), start=start.strftime("%Y-%m-%d"), end=(konec + pd.Timedelta(days=1)).strftime("%Y-%m-%d"),
+        interval="1d", group_by="ticker", progress=False
+    )
+    vysledek = {}
+    if batch is None or batch.empty:
+        return vysledek
+    for t in tickery:
+        try:
+            if isinstance(batch.columns, pd.MultiIndex):
+                if t not in batch.columns.get_level_values(0):
+                    continue
+                df = batch[t]
+            else:
+                df = batch  # Starší yfinance u jednoho tickeru vrací ploché sloupce
+            vysledek[t] = df.reindex(columns=SLOUPCE).dropna(subset=["Close"])
+        except Exception as e:
+            print(f"⚠️ Sklad cen: data pro {t} nejdou přečíst ({e})")
+    return vysledek
+
+
+class SkladCen:
+    """
+    Persistentní sklad denních OHLCV svíček v SQLite (klíč ticker + datum).
+    - _pokryti si pamatuje, jaké okno už bylo pro ticker staženo
+      (víkendy a svátky svíčky nemají, takže z dat samotných to poznat nejde),
+    - dotaz na okno, které je pokryté, nejde na síť,
+    - jinak se stahuje jen mezera od poslední uložené svíčky (tickery se stejnou
+      mezerou jedním hromadným požadavkem).
+    """
+
+    def __init__(self, db_cesta=SKLAD_CESTA, stahni_funkce=_stahni_yahoo, cerstvost=CERSTVOST_S):
+        self.db_cesta = db_cesta
+        self._stahni = stahni_funkce
+        self.cerstvost = cerstvost
+        self._zamek = threading.RLock()
+        self._zamek_stahovani = threading.Lock()  # Dvě stránky naráz nestahují totéž
+        self._backfill = None  # Jediné vlákno pro hlubokou historii nových tickerů
+        self._ve_fronte = set()  # Naplánované + právě stahované tickery
+        self._fronta = []
+        self._odlozeno = {}  # ticker -> čas, kdy se smí backfill zkusit znovu
+        self.statistiky = {"dotazu": 0, "ze_skladu": 0, "stazeni": 0, "stazenych_tickeru": 0, "stazenych_dnu": 0,
+                           "backfill_odlozen": 0}
+
+        con = self._pripoj()
+        try:
+            with con:
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS ohlcv (ticker TEXT, datum TEXT, "
+                    "Open REAL, High REAL, Low REAL, Close REAL, Volume REAL, PRIMARY KEY (ticker, datum)) WITHOUT ROWID"
+                )
+                con.execute("CREATE TABLE IF NOT EXISTS _pokryti (ticker TEXT PRIMARY KEY, od TEXT, do TEXT, stazeno REAL)")
+        finally:
+            con.close()
+
+    # --- PŘIPOJENÍ ---
+    def _pripoj(self):
+        con = sqlite3.connect(self.db_cesta, timeout=30, check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    # --- POKRYTÍ ---
+    def _pokryti(self, tickery):
+        if not tickery:
+            return {}
+        con = self._pripoj()
+        try:
+            otazniky = ", ".join("?" for _ in tickery)
+            radky = con.execute(f"SELECT ticker, od, do, stazeno FROM _pokryti WHERE ticker IN ({otazniky})", list(tickery))
+            return {t: (pd.Timestamp(od), pd.Timestamp(do), stazeno) for t, od, do, stazeno in radky}
+        finally:
+            con.close()
+
+    def _chybi(self, tickery, start, konec, cerstvost=None):
+        """Tickery, jejichž okno <start, konec> ve skladu není (celé nebo čerstvé)."""
+        cerstvost = self.cerstvost if cerstvost is None else cerstvost
+        dnes = pd.Timestamp(datetime.now()).normalize()
+        pokryti = self._pokryti(tickery)
+        chybi = []
+        for t in tickery:
+            if t not in pokryti:
+                chybi.append(t)
+                continue
+            od, do, stazeno = pokryti[t]
+            # Okno končící dnes potřebuje i čerstvou dnešní svíčku
+            zastarale = konec >= dnes and (do < dnes or time.time() - stazeno > cerstvost)
+            if od > start or do < konec or zastarale:
+                chybi.append(t)
+        return chybi, pokryti
+
+    # --- ZÁPIS ---
+    def uloz(self, data, start, konec):
+        """{ticker: OHLCV DataFrame} -> sklad + zapamatuje si stažené okno <start, konec>."""
+        ted = time.time()
+        with self._zamek:
+            stare = self._pokryti(list(data))
+            con = self._pripoj()
+            try:
+                with con:
+                    for t, df in data.items():
+                        if df is None or df.empty:
+                            continue
+                        idx = pd.DatetimeIndex(df.index)
+                        if idx.tz is not None:
+                            idx = idx.tz_localize(None)
+                        df = df.reindex(columns=SLOUPCE)
+                        radky = [
+                            (t, d.strftime("%Y-%m-%d"), *[None if pd.isna(v) else float(v) for v in r])
+                            for d, r in zip(idx, df.itertuples(index=False, name=None))
+                        ]
+                        con.executemany("INSERT OR REPLACE INTO ohlcv VALUES (?, ?, ?, ?, ?, ?, ?)", radky)
+                    for t in data:
+                        od, do = start, konec
+                        if t in stare:
+                            # Navazující okno pokrytí rozšíří (mezera by se tím zamaskovala, proto jen při překryvu)
+                            s_od, s_do, _ = stare[t]
+                            if start <= s_do + pd.Timedelta(days=1) and konec >= s_od - pd.Timedelta(days=1):
+                                od, do = min(start, s_od), max(konec, s_do)
+                        con.execute(
+                            "INSERT OR REPLACE INTO _pokryti VALUES (?, ?, ?, ?)",
+                            (t, od.strftime("%Y-%m-%d"), do.strftime("%Y-%m-%d"), ted)
+                        )
+            finally:
+                con.close()
+
+    def _posledni_svicky(self, tickery):
+        """{ticker: datum poslední uložené svíčky} (MAX přes primární klíč, bez čtení dat)."""
+        if not tickery:
+            return {}
+        con = self._pripoj()
+        try:
+            otazniky = ", ".join("?" for _ in tickery)
+            radky = con.execute(f"SELECT ticker, MAX(datum) FROM ohlcv WHERE ticker IN ({otazniky}) GROUP BY ticker", list(tickery))
+            return {t: pd.Timestamp(d) for t, d in radky if d}
+        finally:
+            con.close()
+
+    def _mezery(self, tickery, start, konec, cerstvost=None):
+        """
+        Co přesně chybí: pro každý ticker jen mezera před pokrytím a mezera od poslední
+        uložené svíčky do 'konec'. Returns: {(od, do): [tickery]} - stejná mezera = jedno stažení.
+        """
+        cerstvost = self.cerstvost if cerstvost is None else cerstvost
+        chybi, pokryti = self._chybi(tickery, start, konec, cerstvost)
+        posledni = self._posledni_svicky([t for t in chybi if t in pokryti])
+        dnes = pd.Timestamp(datetime.now()).normalize()
+        mezery = {}
+        for t in chybi:
+            if t not in pokryti:
+                okna = [(start, konec)]
+            else:
+                od, do, stazeno = pokryti[t]
+                okna = []
+                if start < od:
+                    okna.append((start, od))
+                zastarale = konec >= dnes and (do < dnes or time.time() - stazeno > cerstvost)
+                if konec > do or zastarale:
+                    # Poslední svíčka mohla být neuzavřená (intraday) -> stáhneme ji znovu
+                    okna.append((min(posledni.get(t, do), do), konec))
+            for okno in okna:
+                mezery.setdefault(okno, []).append(t)
+        return mezery
+
+    def _dopln(self, tickery, start, konec, cerstvost=None):
+        """
+        Stáhne z Yahoo jen chybějící svíčky; tickery se stejnou mezerou jedním yf.download.
+        cerstvost: jak stará smí být dnešní svíčka (None = self.cerstvost).
+        """
+        if not self._chybi(tickery, start, konec, cerstvost)[0]:
+            return
+        with self._zamek_stahovani:
+            # Mezery počítáme až pod zámkem, mezitím je mohl doplnit jiný dotaz
+            for (od, do), skupina in sorted(self._mezery(tickery, start, konec, cerstvost).items()):
+                try:
+                    data = self._stahni(skupina, od, do)
+                except Exception as e:
+                    print(f"⚠️ Sklad cen: stažení {len(skupina)} tickerů selhalo ({e})")
+                    continue
+                self.statistiky["stazeni"] += 1
+                self.statistiky["stazenych_tickeru"] += len(skupina)
+                self.statistiky["stazenych_dnu"] += len(skupina) * ((do - od).days + 1)
+                if not any(df is not None and not df.empty for df in data.values()):
+                    continue  # Prázdná odpověď pro všechny = spíš výpadek Yahoo, pokrytí si nezapisujeme
+                # I ticker bez dat (delisting, překlep) si zapamatujeme, ať ho nestahujeme pořád dokola
+                self.uloz({t: data.get(t, pd.DataFrame(columns=SLOUPCE)) for t in skupina}, od, do)
+
+    def nezname(self, tickery):
+        """Tickery, které sklad ještě nikdy nestahoval."""
+        tickery = list(dict.fromkeys(str(t) for t in tickery if t))
+        znamo = self._pokryti(tickery)
+        return [t for t in tickery if t not in znamo]
+
+    def dopln_nove(self, tickery, hloubka=HLUBOKA_HISTORIE):
+        """
+        Jednorázová hluboká historie pro nově viděné tickery (nový nákup / položka watchlistu),
+        aby pozdější analýzy (1y, 2y, DCA) už stahovaly jen denní přírůstky.
+        Returns: seznam tickerů, které se stahovaly.
+        """
+        nove = self.nezname(tickery)
+        if nove:
+            self._dopln(nove, zacatek_obdobi(hloubka), _na_datum(None))
+        return nove
+
+    def naplanuj_nove(self, tickery):
+        """
+        dopln_nove na pozadí bez čekání. Ticker, který už je ve frontě / stahuje se, nebo jehož
+        backfill nedávno selhal (OPAKOVANI_BACKFILL_S), se znovu neplánuje - rerun stránky
+        tak nezakládá další vlákna. Returns: nově naplánované tickery.
+        """
+        nove = self.nezname(tickery)
+        ted = time.time()
+        with self._zamek:
+            nove = [t for t in nove if t not in self._ve_fronte and self._odlozeno.get(t, 0) <= ted]
+            self._ve_fronte.update(nove)
+            self._fronta.extend(nove)
+            if nove and (self._backfill is None or not self._backfill.is_alive()):
+                self._backfill = threading.Thread(target=self._smycka_backfill, name="backfill-cen", daemon=True)
+                self._backfill.start()
+        return nove
+
+    def _smycka_backfill(self):
+        while True:
+            with self._zamek:
+                davka, self._fronta = self._fronta, []
+                if not davka:
+                    self._backfill = None
+                    return
+            try:
+                self.dopln_nove(davka)
+            except Exception as e:
+                print(f"⚠️ Sklad cen: backfill {len(davka)} tickerů selhal ({e})")
+            finally:
+                # Co se nestáhlo (prázdná odpověď se do pokrytí nezapisuje), se odloží
+                try:
+                    neuspech = set(self.nezname(davka))
+                except Exception:
+                    neuspech = set(davka)
+                with self._zamek:
+                    for t in davka:
+                        if t in neuspech:
+                            self._odlozeno[t] = time.time() + OPAKOVANI_BACKFILL_S
+                            self.statistiky["backfill_odlozen"] += 1
+                        else:
+                            self._odlozeno.pop(t, None)
+                    self._ve_fronte.difference_update(davka)
+
+    # --- DOTAZY ---
+    def _cti(self, tickery, start, konec, sloupce):
+        con = self._pripoj()
+        try:
+            otazniky = ", ".join("?" for _ in tickery)
+            cols = ", ".join(f'"{c}"' for c in sloupce)
+            return pd.read_sql(
+                f"SELECT ticker, datum, {cols} FROM ohlcv WHERE ticker IN ({otazniky}) AND datum BETWEEN ? AND ? ORDER BY datum",
+                con, params=[*tickery, start.strftime("%Y-%m-%d"), konec.strftime("%Y-%m-%d")], parse_dates=["datum"]
+            )
+        finally:
+            con.close()
+
+    def close(self, tickery, start="1y", konec=None):
+        """
+        Zavírací ceny pro tickery v okně <start, konec>.
+        start: datum nebo období ('1mo', '7mo', '2y' ...), konec: datum (None = dnes).
+        Returns: DataFrame (index = datum, sloupec = ticker), chybějící data = NaN.
+        """
+        return self.ceny(tickery, start, konec, "Close")
+
+    def ceny(self, tickery, start="1y", konec=None, sloupec="Close", cerstvost=None):
+        """
+        Jako close(), ale pro libovolný sloupec svíčky (Open / High / Low / Close / Volume).
+        cerstvost: přísnější platnost dnešní svíčky pro tento dotaz (None = self.cerstvost).
+        """
+        tickery = list(dict.fromkeys(str(t) for t in tickery if t))
+        if not tickery:
+            return pd.DataFrame()
+        start, konec = _na_datum(start), _na_datum(konec)
+        self.statistiky["dotazu"] += 1
+        stazeni_pred = self.statistiky["stazeni"]
+        self._dopln(tickery, start, konec, cerstvost)
+        if self.statistiky["stazeni"] == stazeni_pred:
+            self.statistiky["ze_skladu"] += 1
+
+        dlouhe = self._cti(tickery, start, konec, [sloupec])
+        siroke = dlouhe.pivot(index="datum", columns="ticker", values=sloupec) if not dlouhe.empty else pd.DataFrame()
+        siroke = siroke.reindex(columns=tickery)
+        siroke.index.name = "Date"
+        siroke.columns.name = None
+        return siroke
+
+    def historie(self, ticker, start="1y", konec=None):
+        """Celé OHLCV jednoho tickeru (index = datum, sloupce Open/High/Low/Close/Volume)."""
+        start, konec = _na_datum(start), _na_datum(konec)
+        self.statistiky["dotazu"] += 1
+        self._dopln([str(ticker)], start, konec)
+        df = self._cti([str(ticker)], start, konec, SLOUPCE)
+        return df.drop(columns="ticker").set_index("datum").rename_axis("Date")
+
+    def posledni_ceny(self, tickery, obdobi="5d", cerstvost=None):
+        """
+        Poslední a předchozí zavírací cena z okna 'obdobi'.
+        cerstvost: max. stáří dnešní (intraday) svíčky v s - kotace chtějí čerstvější než grafy.
+        Returns: {ticker: {"price": poslední Close, "prev": předchozí Close nebo None}}
+        """
+        df = self.ceny(tickery, obdobi, cerstvost=cerstvost)
+        vysledek = {}
+        for t in df.columns:
+            s = df[t].dropna()
+            if s.empty:
+                continue
+            vysledek[t] = {"price": float(s.iloc[-1]), "prev": float(s.iloc[-2]) if len(s) >= 2 else None}
+        return vysledek
+
+
+# --- SINGLETON (web i boti sdílí jeden sklad na proces) ---
+_SKLAD = None
+_SKLAD_ZAMEK = threading.Lock()
+
+
+def ziskej_sklad():
+    """Jeden SkladCen na proces (Streamlit sessions i boti)."""
+    global _SKLAD
+    with _SKLAD_ZAMEK:
+        if _SKLAD is None:
+            _SKLAD = SkladCen(SKLAD_CESTA)
+        return _SKLAD
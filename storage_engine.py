@@ -0,0 +1,814 @@
+import os
+import sqlite3
+import threading
+import time
+import atexit
+import math
+import random
+from collections import namedtuple
+from datetime import datetime, date
+import numpy as np
+import pandas as pd
+
+# --- KONFIGURACE ---
+DB_CESTA = os.environ.get("INVESTICE_DB", "investice.db")
+REPLIKACE_INTERVAL = 60  # Po kolika sekundách se změny zrcadlí na GitHub
+REVALIDACE_INTERVAL = 300  # Po kolika sekundách se lokální tabulka ověří proti GitHubu (ETag, 304 = beze změny)
+LIMIT_DOREPLIKACE_S = 30  # Jak dlouho nejvýš při ukončení procesu čekat na poslední replikaci
+KOMPAKTACE_LIMIT = 5000  # Po kolika změněných řádcích se databáze zkompaktuje (VACUUM)
+INDEXOVANE_SLOUPCE = ["Owner", "Ticker", "Datum", "Date"]
+DATUMOVE_SLOUPCE = {"Datum", "Date", "LastLogin", "Timestamp"}
+ODDILY_ADRESAR = "data"  # Per-uživatelské oddíly: data/<Owner>_<tabulka>.csv
+
+MAX_POKUSU_SLOUCENI = 5  # Kolikrát zkusit zápis znovu po konfliktu (souběžný zápis jiné instance)
+
+# Změna dat JEDNOHO uživatele (zapisuje se jen rozdíl proti uloženým řádkům)
+ZmenaUzivatele = namedtuple("ZmenaUzivatele", ["owner", "df"])
+
+
+class KonfliktZapisu(Exception):
+    """Soubor na GitHubu se od našeho čtení změnil (jiná SHA) -> je potřeba sloučit a zkusit znovu."""
+    def __init__(self, cesty):
+        super().__init__(f"Konflikt zápisu: {', '.join(cesty)}")
+        self.cesty = list(cesty)
+
+
+def nazev_tabulky(nazev_souboru):
+    """'portfolio_data.csv' -> 'portfolio_data' (každý SOUBOR_* = jedna tabulka)."""
+    return os.path.splitext(os.path.basename(str(nazev_souboru)))[0]
+
+
+def cesta_oddilu(nazev_souboru, owner):
+    """'portfolio_data.csv' + 'Attis' -> 'data/Attis_portfolio_data.csv' (oddíl jednoho uživatele)."""
+    return f"{ODDILY_ADRESAR}/{owner}_{nazev_tabulky(nazev_souboru)}.csv"
+
+
+def vlastnik_oddilu(cesta, nazev_souboru):
+    """Opak cesta_oddilu(): vrátí Owner, nebo None, pokud cesta není oddílem daného souboru."""
+    cesta = str(cesta).replace("\\", "/")
+    pripona = f"_{nazev_tabulky(nazev_souboru)}.csv"
+    adresar, jmeno = os.path.split(cesta)
+    if adresar != ODDILY_ADRESAR or not jmeno.endswith(pripona) or len(jmeno) == len(pripona):
+        return None
+    return jmeno[:-len(pripona)]
+
+
+def rozdel_na_oddily(df):
+    """Rozdělí kombinovaný soubor podle Owner -> {owner: DataFrame}."""
+    if df is None or df.empty or 'Owner' not in df.columns:
+        return {}
+    return {str(o): g.reset_index(drop=True) for o, g in df.groupby(df['Owner'].astype(str), sort=False)}
+
+
+def _normalizuj_hodnotu(v):
+    """Stejná hodnota z CSV, SQLite i z paměti -> stejný text (pro klíč řádku)."""
+    if v is None or v is pd.NaT or (isinstance(v, float) and math.isnan(v)):
+        return ""
+    try:
+        return repr(float(v))
+    except (TypeError, ValueError):
+        return str(v)
+
+
+def klice_radku(df, sloupce):
+    """
+    Stabilní klíč každého řádku = hash normalizovaných hodnot + pořadí výskytu.
+    Díky pořadí se rozliší i dva úplně stejné nákupy (AAPL 1 ks ve stejný den).
+    """
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+    norm = pd.DataFrame(index=df.index)
+    for col in sloupce:
+        s = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if col in DATUMOVE_SLOUPCE:
+            s = pd.to_datetime(s, errors='coerce', format='mixed').dt.strftime('%Y-%m-%d %H:%M:%S.%f').fillna("")
+        else:
+            s = s.astype(object).map(_normalizuj_hodnotu)
+        norm[col] = s
+    h = pd.util.hash_pandas_object(norm, index=False).astype(str)
+    return h + ":" + h.groupby(h).cumcount().astype(str)
+
+
+def rozdil_uzivatele(stary, novy, sloupce):
+    """
+    Porovná uložené řádky uživatele s novými.
+    Returns: (maska řádků 'stary' ke smazání, maska řádků 'novy' k přidání)
+    """
+    k_stary = klice_radku(stary, sloupce)
+    k_novy = klice_radku(novy, sloupce)
+    return ~k_stary.isin(set(k_novy)), ~k_novy.isin(set(k_stary))
+
+
+def stejne_radky(a, b):
+    """True, pokud oba DataFrame obsahují stejné řádky (na pořadí nezáleží)."""
+    sloupce = list(dict.fromkeys(list(a.columns) + list(b.columns)))
+    smazat, pridat = rozdil_uzivatele(a, b, sloupce)
+    return not smazat.any() and not pridat.any()
+
+
+def trojcestne_slouceni(zaklad, nase, jejich):
+    """
+    3-cestné sloučení po řádcích podle stabilního klíče (klice_radku).
+    Na 'jejich' (aktuální verze na GitHubu) aplikuje NAŠE změny oproti 'zaklad':
+    řádky, které jsme smazali, zmizí; řádky, které jsme přidali, přibudou
+    (pokud je mezitím nepřidala i druhá strana). Změny druhé strany zůstanou.
+    """
+    if jejich is None:
+        return nase
+    if zaklad is None:
+        zaklad = nase.iloc[0:0]
+    sloupce = list(dict.fromkeys(list(zaklad.columns) + list(nase.columns) + list(jejich.columns)))
+    k_zaklad = set(klice_radku(zaklad, sloupce))
+    k_nase = klice_radku(nase, sloupce)
+    k_jejich = klice_radku(jejich, sloupce)
+    smazane = k_zaklad - set(k_nase)
+    pridane = ~k_nase.isin(k_zaklad) & ~k_nase.isin(set(k_jejich))
+    return pd.concat([jejich[~k_jejich.isin(smazane)], nase[pridane]], ignore_index=True)
+
+
+def _pockej_backoff(pokus):
+    """Omezený exponenciální backoff s jitterem (0.5 s, 1 s, 2 s ... max 8 s)."""
+    time.sleep(min(8.0, 0.5 * 2 ** pokus) * random.uniform(0.8, 1.2))
+
+
+def _na_sqlite(v):
+    """Převod hodnoty z pandas na typ, který SQLite uloží bez adaptérů."""
+    if v is None or v is pd.NaT or (isinstance(v, float) and math.isnan(v)):
+        return None
+    if isinstance(v, (datetime, date)):
+        return v.isoformat(sep=" ") if isinstance(v, datetime) else v.isoformat()
+    if isinstance(v, np.generic):
+        return _na_sqlite(v.item())
+    if isinstance(v, (int, float, str, bytes)):
+        return v
+    return str(v)
+
+
+# ==========================================
+# 🌐 REŽIM 1: GITHUB CSV (původní chování)
+# ==========================================
+class GitHubUloziste:
+    """
+    Tenký obal nad původním čtením/zápisem CSV přes GitHub API.
+    Funkce pro čtení a zápis dostává zvenku (z data_manageru), aby engine neřešil připojení.
+    """
+    rezim = "github"
+
+    def __init__(self, nacti_funkce, zapis_funkce, zapis_vice_funkce=None, nacti_podminene_funkce=None,
+                 seznam_funkce=None, oddilove=()):
+        self._nacti = nacti_funkce
+        self._zapis = zapis_funkce
+        self._zapis_vice = zapis_vice_funkce
+        self._nacti_podminene = nacti_podminene_funkce
+        # Soubory rozdělené po uživatelích (data/<Owner>_<tabulka>.csv).
+        # Bez funkce pro výpis adresáře se oddíly nepoužívají (např. lokální vývoj bez tokenu).
+        self._seznam = seznam_funkce
+        self.oddilove = set(oddilove) if seznam_funkce is not None else set()
+        self._oddily = None  # soubor -> {owner: cesta}, načte se jedním výpisem adresáře
+        self._zamek_oddilu = threading.RLock()
+        # cesta -> (sha, df) naposledy přečtené / zapsané verze = základ pro 3-cestné sloučení
+        self._zaklady = {}
+        self.statistiky = {"konflikty": 0, "slouceni": 0}
+
+    # --- ODDÍLY PO UŽIVATELÍCH ---
+    def _mapa_oddilu(self, nazev_souboru):
+        """
+        Vrátí {owner: cesta} pro daný soubor. Při prvním přístupu k souboru, který
+        ještě oddíly nemá, ho automaticky zmigruje (rozdělí kombinovaný CSV jedním commitem).
+        """
+        with self._zamek_oddilu:
+            if self._oddily is None:
+                self._oddily = {}
+                for cesta in self._seznam(ODDILY_ADRESAR):
+                    for nazev in self.oddilove:
+                        owner = vlastnik_oddilu(cesta, nazev)
+                        if owner is not None:
+                            self._oddily.setdefault(nazev, {})[owner] = cesta
+            if nazev_souboru not in self._oddily:
+                self._oddily[nazev_souboru] = self._migruj_na_oddily(nazev_souboru)
+            return self._oddily[nazev_souboru]
+
+    def _migruj_na_oddily(self, nazev_souboru):
+        """Jednorázová migrace: kombinovaný soubor -> jeden soubor na uživatele (původní zůstane jako záloha)."""
+        try:
+            full = self._nacti(nazev_souboru)
+        except Exception:
+            return {}  # Soubor neexistuje -> není co migrovat
+        casti = {cesta_oddilu(nazev_souboru, o): df for o, df in rozdel_na_oddily(full).items()}
+        if casti and not self._zapis_soubory(casti, f"Migrace {nazev_souboru} na oddíly po uživatelích"):
+            raise RuntimeError(f"Migrace {nazev_souboru} na oddíly selhala.")
+        return {vlastnik_oddilu(c, nazev_souboru): c for c in casti}
+
+    def vlastnici(self, nazev_souboru):
+        """Seznam uživatelů, kteří mají v souboru data (boti přes něj rozvětví práci po oddílech)."""
+        if nazev_souboru in self.oddilove:
+            return sorted(self._mapa_oddilu(nazev_souboru))
+        return sorted(rozdel_na_oddily(self._nacti(nazev_souboru)))
+
+    def _zapis_soubory(self, soubory, zprava, ocekavane_sha=None):
+        """
+        {cesta: df} -> jeden commit (pokud to zdroj umí).
+        ocekavane_sha: {cesta: SHA, ze které zápis vychází}; při neshodě zdroj vyhodí KonfliktZapisu.
+        Returns: {cesta: nová SHA} / True při úspěchu, False při selhání.
+        """
+        if self._zapis_vice is not None:
+            if ocekavane_sha is not None:
+                return self._zapis_vice(soubory, zprava, ocekavane_sha)
+            return self._zapis_vice(soubory, zprava)
+        return all(self._zapis(df, cesta, zprava) for cesta, df in soubory.items())
+
+    # --- ČTENÍ ---
+    def _nacti_verzi(self, cesta):
+        """Stáhne soubor i s SHA a zapamatuje si ho jako základ pro pozdější sloučení."""
+        if self._nacti_podminene is not None:
+            sha, df = self._nacti_podminene(cesta, None)
+        else:
+            sha, df = None, self._nacti(cesta)
+        self._zaklady[cesta] = (sha, df.copy())
+        return sha, df
+
+    def _zaklad(self, cesta):
+        """Naposledy známá verze (sha, df); neexistující soubor = (None, None)."""
+        if cesta not in self._zaklady:
+            try:
+                self._nacti_verzi(cesta)
+            except Exception:
+                self._zaklady[cesta] = (None, None)
+        return self._zaklady[cesta]
+
+    def nacti(self, nazev_souboru):
+        if nazev_souboru in self.oddilove:
+            mapa = self._mapa_oddilu(nazev_souboru)
+            casti = [self._nacti_verzi(cesta)[1] for _, cesta in sorted(mapa.items())]
+            return pd.concat(casti, ignore_index=True) if casti else pd.DataFrame(columns=["Owner"])
+        return self._nacti_verzi(nazev_souboru)[1]
+
+    def nacti_pokud_zmeneno(self, nazev_souboru, znama_verze):
+        """
+        Vrátí (verze, df). Pokud se soubor od 'znama_verze' nezměnil, df je None.
+        Verze = blob SHA souboru na GitHubu.
+        """
+        if nazev_souboru in self.oddilove:
+            if self._nacti_podminene is None:
+                return None, self.nacti(nazev_souboru)  # Složení všech oddílů se necachuje
+            # Verze = SHA všech oddílů; nezměněný oddíl (304) se vezme z posledního základu
+            verze, casti = [], []
+            for _, cesta in sorted(self._mapa_oddilu(nazev_souboru).items()):
+                sha, stary = self._zaklady.get(cesta, (None, None))
+                sha, df = self._nacti_podminene(cesta, sha if stary is not None else None)
+                if df is None:
+                    df = stary
+                else:
+                    self._zaklady[cesta] = (sha, df.copy())
+                verze.append(sha)
+                casti.append(df)
+            verze = tuple(verze)
+            if znama_verze is not None and znama_verze == verze:
+                return verze, None
+            return verze, (pd.concat(casti, ignore_index=True) if casti else pd.DataFrame(columns=["Owner"]))
+        if self._nacti_podminene is not None:
+            verze, df = self._nacti_podminene(nazev_souboru, znama_verze)
+            if df is not None:
+                self._zaklady[nazev_souboru] = (verze, df.copy())
+            return verze, df
+        return None, self._nacti_verzi(nazev_souboru)[1]
+
+    def nacti_uzivatele_pokud_zmeneno(self, nazev_souboru, owner, znama_verze):
+        """Jako nacti_pokud_zmeneno(), ale stáhne jen oddíl jednoho uživatele (O(vlastní data))."""
+        owner = str(owner)
+        if nazev_souboru not in self.oddilove:
+            verze, df = self.nacti_pokud_zmeneno(nazev_souboru, znama_verze)
+            return verze, (df[df['Owner'].astype(str) == owner].reset_index(drop=True) if df is not None else None)
+
+        znamy = owner in self._mapa_oddilu(nazev_souboru)
+        cesta = cesta_oddilu(nazev_souboru, owner)
+        try:
+            if self._nacti_podminene is not None:
+                verze, df = self._nacti_podminene(cesta, znama_verze)
+            else:
+                verze, df = None, self._nacti(cesta)
+        except Exception:
+            if znamy:
+                raise
+            # Nový uživatel -> zatím prázdný oddíl
+            self._zaklady.setdefault(cesta, (None, None))
+            return "prazdny", (None if znama_verze == "prazdny" else pd.DataFrame(columns=["Owner"]))
+        if df is not None:
+            self._zaklady[cesta] = (verze, df.copy())
+        if not znamy:
+            # Oddíl mezitím založila jiná instance aplikace
+            with self._zamek_oddilu:
+                self._oddily[nazev_souboru][owner] = cesta
+        return verze, df
+
+    # --- ZÁPIS ---
+    def zapis(self, df, nazev_souboru, zprava):
+        return self.zapis_vice({nazev_souboru: df}, zprava)
+
+    def _rozdel_soubor(self, nazev_souboru, df):
+        """Celý soubor u rozděleného datasetu -> přepis oddílů (zmizelí uživatelé dostanou prázdný oddíl)."""
+        casti = {cesta_oddilu(nazev_souboru, o): g for o, g in rozdel_na_oddily(df).items()}
+        for owner, cesta in self._mapa_oddilu(nazev_souboru).items():
+            if cesta not in casti:
+                casti[cesta] = df.iloc[0:0]
+        return casti
+
+    def _cile_zapisu(self, zmeny):
+        """{soubor: df | ZmenaUzivatele} -> {cesta: celý nový obsah souboru}."""
+        cile = {}
+        for nazev, zmena in zmeny.items():
+            if not isinstance(zmena, ZmenaUzivatele):
+                cile.update(self._rozdel_soubor(nazev, zmena) if nazev in self.oddilove else {nazev: zmena})
+                continue
+            owner = str(zmena.owner)
+            novy = zmena.df.copy()
+            novy['Owner'] = owner
+            if nazev in self.oddilove:
+                cile[cesta_oddilu(nazev, owner)] = novy  # Oddíl uživatele = rovnou jeho soubor
+                continue
+            # GitHub neumí připsat řádky do souboru, takže změnu uživatele složíme do celého CSV
+            full = self._zaklad(nazev)[1]
+            if full is None:
+                full = novy.iloc[0:0]
+            maska = full['Owner'].astype(str) == owner if 'Owner' in full.columns else pd.Series(False, index=full.index)
+            cile[nazev] = pd.concat([full[~maska], novy], ignore_index=True)
+        return cile
+
+    def zapis_vice(self, zmeny, zprava):
+        """Uloží více souborů najednou ({soubor: df | ZmenaUzivatele}) jako jeden commit."""
+        return self.zapis_vice_se_sloucenim(zmeny, zprava)[0]
+
+    def zapis_vice_se_sloucenim(self, zmeny, zprava):
+        """
+        Optimistický zápis: commit projde jen tehdy, když mají soubory na GitHubu pořád SHA,
+        ze které jsme vycházeli. Při konfliktu stáhne jejich verzi, sloučí řádky
+        (základ / naše / jejich) a zkusí to znovu s omezeným backoffem.
+        Returns: (ok, {cesta: sloučený DataFrame} u souborů, kde ke sloučení došlo)
+        """
+        nase = self._cile_zapisu(zmeny)
+        for cesta in list(nase):
+            zaklad = self._zaklad(cesta)[1]
+            if zaklad is not None and stejne_radky(zaklad, nase[cesta]):
+                del nase[cesta]  # Nic se nezměnilo -> zápis přeskočíme
+        if not nase:
+            return True, {}
+
+        sloucene = {}
+        for pokus in range(MAX_POKUSU_SLOUCENI):
+            # Bez SHA (lokální zdroj) se konflikty hlídat nedají
+            ocekavane = {c: self._zaklad(c)[0] for c in nase} if self._nacti_podminene is not None else None
+            try:
+                vysledek = self._zapis_soubory(nase, zprava, ocekavane)
+            except KonfliktZapisu as konflikt:
+                self.statistiky["konflikty"] += 1
+                for cesta in konflikt.cesty:
+                    zaklad = self._zaklad(cesta)[1]
+                    try:
+                        _, jejich = self._nacti_verzi(cesta)
+                    except Exception:
+                        self._zaklady[cesta] = (None, None)  # Druhá strana soubor smazala
+                        jejich = None
+                    nase[cesta] = trojcestne_slouceni(zaklad, nase[cesta], jejich)
+                    sloucene[cesta] = nase[cesta]
+                    self.statistiky["slouceni"] += 1
+                _pockej_backoff(pokus)
+                continue
+            if not vysledek:
+                return False, sloucene
+
+            # Zapsaný obsah je nový základ pro další zápis
+            nove_sha = vysledek if isinstance(vysledek, dict) else {}
+            for cesta, df in nase.items():
+                self._zaklady[cesta] = (nove_sha.get(cesta), df.copy())
+            with self._zamek_oddilu:
+                for nazev in self.oddilove:
+                    for cesta in nase:
+                        owner = vlastnik_oddilu(cesta, nazev)
+                        if owner is not None and self._oddily is not None:
+                            self._oddily.setdefault(nazev, {})[owner] = cesta
+            return True, sloucene
+        return False, sloucene
+
+    def flush(self):
+        return True
+
+
+# ==========================================
+# 💾 REŽIM 2: LOKÁLNÍ SQLITE + GITHUB REPLIKA
+# ==========================================
+class SQLiteUloziste:
+    """
+    Primární úložiště v lokální SQLite databázi (čtení i zápis v milisekundách).
+    - Při prvním čtení se tabulka naplní ze zdroje (GitHub / lokální CSV).
+    - Každý zápis tabulku označí jako 'dirty' a replikátor ji na pozadí
+      jednou za REPLIKACE_INTERVAL pošle na GitHub jako snapshot.
+    - U souborů v 'oddilove' je značka per uživatel a replikuje se jen jeho oddíl.
+    - S revalidace_zdroj(soubor, známá verze) -> (verze, df | None) se tabulka jednou
+      za revalidace_interval ověří proti zdroji a změnu jiné instance převezme.
+    """
+    rezim = "sqlite"
+
+    def __init__(self, nacti_zdroj, zapis_zdroj, db_cesta=DB_CESTA, interval=REPLIKACE_INTERVAL, zapis_vice_zdroj=None,
+                 oddilove=(), revalidace_zdroj=None, revalidace_interval=REVALIDACE_INTERVAL):
+        self.db_cesta = db_cesta
+        self.interval = interval
+        self.revalidace_interval = revalidace_interval
+        self._nacti_zdroj = nacti_zdroj
+        self._zapis_zdroj = zapis_zdroj
+        self._zapis_vice_zdroj = zapis_vice_zdroj
+        self._revalidace_zdroj = revalidace_zdroj
+        self.oddilove = set(oddilove)
+        self._zamek = threading.RLock()
+        self._verze = {}  # tabulka / (tabulka, owner) -> počítadlo zápisů (pro cache v data_manageru)
+        self._verze_zdroje = {}  # tabulka -> verze zdroje (SHA), ze které lokální tabulka vychází
+        self._kontrola = {}  # tabulka -> čas poslední revalidace proti zdroji
+        self._zmenenych_radku = 0  # od poslední kompaktace
+        self._replikator = None
+        self._stop = threading.Event()
+
+        con = self._pripoj()
+        try:
+            with con:
+                if self._existuje(con, "_replikace") and "owner" not in self._sloupce(con, "_replikace"):
+                    # Starší DB bez oddílů -> značky převedeme na 'celá tabulka' (owner = '')
+                    con.execute("ALTER TABLE _replikace RENAME TO _replikace_stara")
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS _replikace ("
+                    "tabulka TEXT, owner TEXT, soubor TEXT, zprava TEXT, zmeneno REAL, PRIMARY KEY (tabulka, owner))"
+                )
+                if self._existuje(con, "_replikace_stara"):
+                    con.execute("INSERT INTO _replikace SELECT tabulka, '', soubor, zprava, zmeneno FROM _replikace_stara")
+                    con.execute("DROP TABLE _replikace_stara")
+        finally:
+            con.close()
+        atexit.register(self._dorovnej_pri_ukonceni)
+
+        # Nedokončená replikace z minulého běhu -> dorovnáme na pozadí
+        if self.cekajici_replikace():
+            self._spust_replikator()
+
+    # --- PŘIPOJENÍ ---
+    def _pripoj(self):
+        con = sqlite3.connect(self.db_cesta, timeout=30, check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    def _existuje(self, con, tabulka):
+        r = con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (tabulka,)).fetchone()
+        return r is not None
+
+    def _vytvor_indexy(self, con, tabulka, sloupce):
+        for col in INDEXOVANE_SLOUPCE:
+            if col in sloupce:
+                con.execute(f'CREATE INDEX IF NOT EXISTS "ix_{tabulka}_{col}" ON "{tabulka}" ("{col}")')
+
+    def _sloupce(self, con, tabulka):
+        return [r[1] for r in con.execute(f'PRAGMA table_info("{tabulka}")')]
+
+    def _vloz_radky(self, con, tabulka, df, sloupce):
+        # Vlastní INSERT místo df.to_sql: pandas si commituje sám a rozbil by transakci
+        if df.empty:
+            return
+        cols = ", ".join(f'"{c}"' for c in sloupce)
+        otazniky = ", ".join("?" for _ in sloupce)
+        radky = [tuple(_na_sqlite(v) for v in r) for r in df.reindex(columns=sloupce).itertuples(index=False, name=None)]
+        con.executemany(f'INSERT INTO "{tabulka}" ({cols}) VALUES ({otazniky})', radky)
+
+    def _uloz_tabulku(self, con, df, tabulka):
+        sloupce = [str(c) for c in df.columns]
+        con.execute(f'DROP TABLE IF EXISTS "{tabulka}"')
+        con.execute(f'CREATE TABLE "{tabulka}" ({", ".join(chr(34) + c + chr(34) for c in sloupce)})')
+        self._vloz_radky(con, tabulka, df, sloupce)
+        self._vytvor_indexy(con, tabulka, sloupce)
+
+    def _uloz_rozdil_uzivatele(self, con, tabulka, zmena):
+        """
+        Append/patch zápis: smaže jen zmizelé řádky uživatele a vloží jen nové.
+        Cena je O(řádky uživatele + změna), ostatní uživatelé se vůbec nečtou.
+        """
+        owner = str(zmena.owner)
+        novy = zmena.df.copy()
+        novy['Owner'] = owner
+
+        sloupce = self._sloupce(con, tabulka)
+        for col in novy.columns:
+            if str(col) not in sloupce:
+                con.execute(f'ALTER TABLE "{tabulka}" ADD COLUMN "{col}"')
+                sloupce.append(str(col))
+        self._vytvor_indexy(con, tabulka, sloupce)
+
+        stary = pd.read_sql(f'SELECT rowid AS _rowid, * FROM "{tabulka}" WHERE "Owner" = ?', con, params=(owner,))
+        smazat, pridat = rozdil_uzivatele(stary, novy, sloupce)
+        con.executemany(f'DELETE FROM "{tabulka}" WHERE rowid = ?', [(int(r),) for r in stary.loc[smazat, '_rowid']])
+        self._vloz_radky(con, tabulka, novy[pridat], sloupce)
+        return int(smazat.sum() + pridat.sum())
+
+    # --- ČTENÍ ---
+    def _zajisti_tabulku(self, con, nazev_souboru):
+        """
+        Při prvním použití naplní tabulku ze zdroje (když selže, výjimka letí ven).
+        Síťové stažení běží mimo zámek, aby se tabulky mohly plnit paralelně.
+        """
+        tabulka = nazev_tabulky(nazev_souboru)
+        if self._existuje(con, tabulka):
+            return
+        if self._revalidace_zdroj is not None:
+            verze_zdroje, df_zdroj = self._revalidace_zdroj(nazev_souboru, None)
+        else:
+            verze_zdroje, df_zdroj = None, self._nacti_zdroj(nazev_souboru)
+        with self._zamek:
+            if not self._existuje(con, tabulka):
+                with con:
+                    self._uloz_tabulku(con, df_zdroj, tabulka)
+                self._verze_zdroje[tabulka] = verze_zdroje
+                self._kontrola[tabulka] = time.time()
+
+    def _verze_tabulky(self, tabulka):
+        return (self._verze.get(tabulka, 0), sum(v for k, v in self._verze.items() if isinstance(k, tuple) and k[0] == tabulka))
+
+    def _revaliduj(self, nazev_souboru):
+        """
+        Jednou za revalidace_interval ověří tabulku proti zdroji (podmíněný dotaz, 304 = beze změny).
+        Změnu jiné instance převezme celou, pokud tabulka nemá nereplikované lokální zápisy
+        (ty mají přednost a se zdrojem se sloučí při replikaci).
+        Returns: True, pokud se tabulka přepsala verzí ze zdroje.
+        """
+        if self._revalidace_zdroj is None:
+            return False
+        tabulka = nazev_tabulky(nazev_souboru)
+        with self._zamek:
+            ted = time.time()
+            if ted - self._kontrola.get(tabulka, 0) < self.revalidace_interval:
+                return False
+            con = self._pripoj()
+            try:
+                if not self._existuje(con, tabulka):
+                    return False  # Ještě nenaplněná tabulka -> naplní ji _zajisti_tabulku
+            finally:
+                con.close()
+            self._kontrola[tabulka] = ted  # Ostatní vlákna mezitím čtou lokální data
+            znama = self._verze_zdroje.get(tabulka)
+            verze_zapisu = self._verze_tabulky(tabulka)
+
+        # Síť mimo zámek
+        try:
+            verze_zdroje, df = self._revalidace_zdroj(nazev_souboru, znama)
+        except Exception as e:
+            print(f"⚠️ Revalidace {nazev_souboru} proti GitHubu selhala: {e}")
+            return False
+        if df is None:
+            return False
+
+        with self._zamek:
+            con = self._pripoj()
+            try:
+                cekajici = con.execute("SELECT 1 FROM _replikace WHERE tabulka=?", (tabulka,)).fetchone()
+                if cekajici or self._verze_tabulky(tabulka) != verze_zapisu:
+                    return False  # Lokální zápis od dotazu -> další revalidace to zkusí znovu
+                with con:
+                    self._uloz_tabulku(con, df, tabulka)
+                self._verze_zdroje[tabulka] = verze_zdroje
+                self._verze[tabulka] = self._verze.get(tabulka, 0) + 1
+            finally:
+                con.close()
+        return True
+
+    def nacti(self, nazev_souboru):
+        tabulka = nazev_tabulky(nazev_souboru)
+        self._revaliduj(nazev_souboru)
+        con = self._pripoj()
+        try:
+            self._zajisti_tabulku(con, nazev_souboru)
+            return pd.read_sql(f'SELECT * FROM "{tabulka}"', con)
+        finally:
+            con.close()
+
+    def nacti_pokud_zmeneno(self, nazev_souboru, znama_verze):
+        """Vrátí (verze, df), df je None, pokud se tabulka od 'znama_verze' nezměnila."""
+        # Verzi čteme PŘED daty: souběžný zápis tak nanejvýš vynutí zbytečné načtení navíc
+        tabulka = nazev_tabulky(nazev_souboru)
+        self._revaliduj(nazev_souboru)
+        verze = self._verze_tabulky(tabulka)
+        if znama_verze is not None and znama_verze == verze:
+            return verze, None
+        return verze, self.nacti(nazev_souboru)
+
+    def nacti_uzivatele_pokud_zmeneno(self, nazev_souboru, owner, znama_verze):
+        """Jen řádky jednoho uživatele (indexovaný dotaz na Owner), verze se mění jen jeho zápisy."""
+        tabulka = nazev_tabulky(nazev_souboru)
+        owner = str(owner)
+        self._revaliduj(nazev_souboru)
+        verze = (self._verze.get(tabulka, 0), self._verze.get((tabulka, owner), 0))
+        if znama_verze is not None and znama_verze == verze:
+            return verze, None
+        con = self._pripoj()
+        try:
+            self._zajisti_tabulku(con, nazev_souboru)
+            if "Owner" not in self._sloupce(con, tabulka):
+                return verze, pd.DataFrame(columns=["Owner"])
+            return verze, pd.read_sql(f'SELECT * FROM "{tabulka}" WHERE "Owner" = ?', con, params=(owner,))
+        finally:
+            con.close()
+
+    # --- ZÁPIS ---
+    def zapis(self, df, nazev_souboru, zprava):
+        return self.zapis_vice({nazev_souboru: df}, zprava)
+
+    def zapis_vice(self, zmeny, zprava):
+        """
+        Všechny tabulky v jedné SQLite transakci: buď se uloží vše, nebo nic.
+        zmeny: {soubor: DataFrame (celý soubor) | ZmenaUzivatele (jen rozdíl)}
+        """
+        con = self._pripoj()
+        try:
+            # Změna uživatele potřebuje naplněnou tabulku, jinak by přepsala cizí data
+            for nazev_souboru, zmena in zmeny.items():
+                if isinstance(zmena, ZmenaUzivatele):
+                    self._zajisti_tabulku(con, nazev_souboru)
+        finally:
+            con.close()
+
+        with self._zamek:
+            con = self._pripoj()
+            try:
+                zmeneno_radku = 0
+                with con:  # Jedna SQLite transakce = data + značky pro replikaci
+                    ted = time.time()
+                    for nazev_souboru, zmena in zmeny.items():
+                        tabulka = nazev_tabulky(nazev_souboru)
+                        oddil = ""  # '' = replikuje se celá tabulka
+                        if isinstance(zmena, ZmenaUzivatele):
+                            n = self._uloz_rozdil_uzivatele(con, tabulka, zmena)
+                            zmeneno_radku += n
+                            if n == 0:
+                                continue  # Nic nového -> ani replikace
+                            if nazev_souboru in self.oddilove:
+                                oddil = str(zmena.owner)
+                        else:
+                            self._uloz_tabulku(con, zmena, tabulka)
+                            zmeneno_radku += len(zmena)
+                        con.execute(
+                            "INSERT OR REPLACE INTO _replikace VALUES (?, ?, ?, ?, ?)",
+                            (tabulka, oddil, str(nazev_souboru), zprava, ted)
+                        )
+                for nazev_souboru, zmena in zmeny.items():
+                    tabulka = nazev_tabulky(nazev_souboru)
+                    klic = (tabulka, str(zmena.owner)) if isinstance(zmena, ZmenaUzivatele) else tabulka
+                    self._verze[klic] = self._verze.get(klic, 0) + 1
+                self._zmenenych_radku += zmeneno_radku
+            finally:
+                con.close()
+        self._spust_replikator()
+        return True
+
+    # --- REPLIKACE NA GITHUB ---
+    def _spust_replikator(self):
+        if self._replikator is not None and self._replikator.is_alive():
+            return
+        self._replikator = threading.Thread(target=self._smycka_replikace, name="github-replika", daemon=True)
+        self._replikator.start()
+
+    def _smycka_replikace(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+            self.kompaktuj()
+
+    def kompaktuj(self, vynutit=False):
+        """Po větším množství delta zápisů uvolní místo po smazaných řádcích (VACUUM)."""
+        if not vynutit and self._zmenenych_radku < KOMPAKTACE_LIMIT:
+            return False
+        with self._zamek:
+            con = self._pripoj()
+            try:
+                con.execute("VACUUM")
+                self._zmenenych_radku = 0
+            finally:
+                con.close()
+        return True
+
+    def cekajici_replikace(self):
+        """Seznam tabulek, které ještě nejsou zrcadlené na GitHubu."""
+        con = self._pripoj()
+        try:
+            return list(dict.fromkeys(r[0] for r in con.execute("SELECT tabulka FROM _replikace ORDER BY zmeneno")))
+        finally:
+            con.close()
+
+    def flush(self):
+        """
+        Pošle všechny změněné tabulky na GitHub (jeden commit, pokud to zdroj umí).
+        Značka uživatele u rozděleného souboru pošle jen jeho oddíl (data/<Owner>_<tabulka>.csv).
+        """
+        # 1. Snapshot pod zámkem (rychlé, lokální)
+        with self._zamek:
+            con = self._pripoj()
+            try:
+                znacky = con.execute("SELECT tabulka, owner, soubor, zprava, zmeneno FROM _replikace").fetchall()
+                cele_tabulky = {t for t, o, _, _, _ in znacky if not o or self._zapis_vice_zdroj is None}
+                snapshoty = {}  # cíl zápisu -> [df, zprávy, značky]
+                for t, o, soubor, zprava, zmeneno in znacky:
+                    if t in cele_tabulky:
+                        cil, dotaz, params = soubor, f'SELECT * FROM "{t}"', ()
+                    else:
+                        cil, dotaz, params = cesta_oddilu(soubor, o), f'SELECT * FROM "{t}" WHERE "Owner" = ?', (o,)
+                    if cil not in snapshoty:
+                        snapshoty[cil] = [pd.read_sql(dotaz, con, params=params), set(), []]
+                    snapshoty[cil][1].add(zprava)
+                    snapshoty[cil][2].append((t, o, zmeneno))
+            finally:
+                con.close()
+
+        if not snapshoty:
+            return True
+
+        # 2. Síťový zápis MIMO zámek, aby replikace nebrzdila čtení aplikace
+        if self._zapis_vice_zdroj is not None:
+            # Všechny změněné soubory jedním commitem
+            zmeny = {cil: df for cil, (df, _, _) in snapshoty.items()}
+            zprava = "Snapshot: " + ", ".join(sorted(set().union(*(z for _, z, _ in snapshoty.values()))))
+            try:
+                ok = self._zapis_vice_zdroj(zmeny, zprava)
+            except Exception as e:
+                print(f"⚠️ Replikace na GitHub selhala: {e}")
+                ok = False
+            sloucene = {}
+            if isinstance(ok, tuple):  # Zdroj se sloučením vrací (ok, {cesta: sloučený df})
+                ok, sloucene = ok
+            if sloucene:
+                self._prevezmi_slouceni(snapshoty, sloucene)
+            hotove = list(snapshoty) if ok else []
+        else:
+            hotove = []
+            for cil, (df, zpravy, _) in snapshoty.items():
+                try:
+                    if self._zapis_zdroj(df, cil, f"Snapshot: {', '.join(sorted(zpravy))}"):
+                        hotove.append(cil)
+                except Exception as e:
+                    print(f"⚠️ Replikace {cil} na GitHub selhala: {e}")
+
+        with self._zamek:
+            con = self._pripoj()
+            try:
+                with con:
+                    for cil in hotove:
+                        for tabulka, owner, zmeneno in snapshoty[cil][2]:
+                            # Značku smažeme jen pokud mezitím nepřišel novější zápis
+                            con.execute("DELETE FROM _replikace WHERE tabulka=? AND owner=? AND zmeneno=?", (tabulka, owner, zmeneno))
+            finally:
+                con.close()
+        return len(hotove) == len(snapshoty)
+
+    def _prevezmi_slouceni(self, snapshoty, sloucene):
+        """
+        Při replikaci došlo ke konfliktu a na GitHubu je teď sloučená verze (naše + cizí změny).
+        Cizí řádky převezmeme i do lokální DB, přitom zachováme lokální zápisy od snapshotu.
+        """
+        with self._zamek:
+            con = self._pripoj()
+            try:
+                with con:
+                    for cesta, df in sloucene.items():
+                        cil = None
+                        for c, (snap, _, znacky) in snapshoty.items():
+                            tabulka, oddil = znacky[0][0], znacky[0][1]
+                            if c == cesta:
+                                cil = (tabulka, oddil or None, snap)  # Oddíl uživatele / celá tabulka
+                            elif vlastnik_oddilu(cesta, c) is not None:
+                                cil = (tabulka, vlastnik_oddilu(cesta, c), snap)  # Celá tabulka rozdělená na oddíly
+                            if cil is not None:
+                                break
+                        if cil is None:
+                            continue
+                        tabulka, owner, snap = cil
+                        if owner is not None:
+                            if 'Owner' in snap.columns:
+                                snap = snap[snap['Owner'].astype(str) == owner]
+                            ted = pd.read_sql(f'SELECT * FROM "{tabulka}" WHERE "Owner" = ?', con, params=(owner,))
+                            nove = trojcestne_slouceni(snap, ted, df)
+                            self._uloz_rozdil_uzivatele(con, tabulka, ZmenaUzivatele(owner, nove))
+                            klic = (tabulka, owner)
+                        else:
+                            ted = pd.read_sql(f'SELECT * FROM "{tabulka}"', con)
+                            self._uloz_tabulku(con, trojcestne_slouceni(snap, ted, df), tabulka)
+                            klic = tabulka
+                        self._verze[klic] = self._verze.get(klic, 0) + 1
+            finally:
+                con.close()
+
+    def zastav(self):
+        self._stop.set()
+
+    def _dorovnej_pri_ukonceni(self):
+        """
+        atexit: zastaví replikátor a pošle zbylé změny na GitHub.
+        Na síť se čeká nejvýš LIMIT_DOREPLIKACE_S, aby zaseknutý zápis nebránil ukončení;
+        co nestihne, zůstane označené v _replikace a dorovná se po startu.
+        """
+        self._stop.set()
+        konec = time.time() + LIMIT_DOREPLIKACE_S
+        if self._replikator is not None and self._replikator.is_alive():
+            self._replikator.join(LIMIT_DOREPLIKACE_S)  # Rozběhnutý flush doběhne (žádný dvojí commit)
+        vlakno = threading.Thread(target=self.flush, name="github-replika-konec", daemon=True)
+        vlakno.start()
+        vlakno.join(max(0.0, konec - time.time()))
@@ -0,0 +1,146 @@
+import threading
+import time
+
+# ==========================================
+# 💹 TABULE KURZŮ (cache živých cen po tickerech)
+# ==========================================
+# Místo cache na celý seznam tickerů (jiné pořadí / jeden ticker navíc = vše znovu)
+# má každý ticker vlastní záznam s časem stažení. Požadavek na N tickerů stáhne
+# jedním hromadným voláním jen ty chybějící / zastaralé, zbytek jde z paměti.
+# Jedna instance na proces -> sessions s podobným portfoliem sdílí záznamy.
+# Stale-while-revalidate: zastaralá cena se vrátí hned (se stářím "stari_s")
+# a obnoví se vláknem na pozadí, takže render nečeká na Yahoo.
+
+TTL_S = 300  # Stáří ceny, po kterém se stáhne znovu (dřív ttl cached_ceny_hromadne)
+
+
+class TabuleCen:
+    """
+    {ticker: {"price", "curr", ...}} + čas stažení každého záznamu.
+    stahni_funkce(tickery) -> {ticker: {"price": ..., "curr": ..., ...}} (jedno hromadné volání)
+    """
+
+    def __init__(self, stahni_funkce, ttl=TTL_S):
+        self._stahni = stahni_funkce
+        self.ttl = ttl
+        self._zaznamy = {}  # ticker -> (čas stažení, data)
+        self._bez_ceny = {}  # ticker -> čas posledního neúspěchu (delisting / překlep se nestahuje pořád dokola)
+        self._zamek = threading.Lock()
+        self._zamek_stahovani = threading.Lock()
+        self.statistiky = {"hit": 0, "miss": 0, "stazeni": 0, "zastarale": 0, "obnov_na_pozadi": 0}
+        self._ke_stazeni = set()  # Tickery čekající na obnovu na pozadí
+        self._obnovovac = None
+
+    def _cerstve(self, tickery, ted):
+        with self._zamek:
+            return {t: self._zaznamy[t][1] for t in tickery
+                    if t in self._zaznamy and ted - self._zaznamy[t][0] < self.ttl}
+
+    def vloz(self, data, cas=None):
+        """Zapíše ceny zvenku (např. z market_cache.json) s časem jejich vzniku."""
+        cas = time.time() if cas is None else cas
+        with self._zamek:
+            for t, zaznam in data.items():
+                stary = self._zaznamy.get(t)
+                if stary is None or stary[0] <= cas:
+                    self._zaznamy[t] = (cas, dict(zaznam))
+
+    def _stahni_a_vloz(self, tickery):
+        """Jedno hromadné stažení; tickery bez ceny si zapamatuje jako neúspěch."""
+        self.statistiky["stazeni"] += 1
+        nove = {t: d for t, d in (self._stahni(tickery) or {}).items() if t in tickery}
+        self.vloz(nove)
+        ted = time.time()
+        for t in tickery:
+            if t in nove:
+                self._bez_ceny.pop(t, None)
+            else:
+                self._bez_ceny[t] = ted
+        return nove
+
+    # --- OBNOVA NA POZADÍ ---
+    def _naplanuj(self, tickery):
+        if not tickery:
+            return
+        with self._zamek:
+            self._ke_stazeni.update(tickery)
+            if self._obnovovac is None or not self._obnovovac.is_alive():
+                self._obnovovac = threading.Thread(target=self._smycka_obnovy, name="tabule-cen", daemon=True)
+                self._obnovovac.start()
+
+    def _smycka_obnovy(self):
+        while True:
+            with self._zamek:
+                tickery = sorted(self._ke_stazeni)
+                self._ke_stazeni.clear()
+                if not tickery:
+                    self._obnovovac = None
+                    return
+            try:
+                with self._zamek_stahovani:
+                    ted = time.time()
+                    tickery = [t for t in tickery if t not in self._cerstve([t], ted)]
+                    if tickery:
+                        self.statistiky["obnov_na_pozadi"] += 1
+                        self._stahni_a_vloz(tickery)
+            except Exception as e:
+                print(f"⚠️ Obnova cen na pozadí selhala: {e}")
+
+    def ziskej(self, tickery, cekat=True):
+        """
+        Ceny pro tickery: čerstvé z paměti, chybějící / zastaralé jedním hromadným stažením.
+        cekat=False: zastaralé ceny vrátí hned a obnoví je na pozadí (čeká se jen na tickery,
+        které na tabuli vůbec nejsou). Každý záznam nese "stari_s" = stáří ceny v sekundách.
+        Ticker, pro který zdroj cenu nevrátí, ve výsledku chybí (jako dřív).
+        """
+        tickery = list(dict.fromkeys(str(t) for t in tickery if str(t).strip()))
+        ted = time.time()
+        vysledek = self._cerstve(tickery, ted)
+        self.statistiky["hit"] += len(vysledek)
+        necerstve = [t for t in tickery if t not in vysledek]
+        chybi = [t for t in necerstve if ted - self._bez_ceny.get(t, 0) >= self.ttl]
+
+        if necerstve and not cekat:
+            with self._zamek:
+                zastarale = {t: self._zaznamy[t][1] for t in necerstve if t in self._zaznamy}
+            if zastarale:
+                self.statistiky["zastarale"] += len(zastarale)
+                vysledek.update(zastarale)
+                self._naplanuj([t for t in chybi if t in zastarale])
+                chybi = [t for t in chybi if t not in zastarale]
+
+        if chybi:
+            with self._zamek_stahovani:
+                # Souběžná session je mohla mezitím stáhnout
+                vysledek.update(self._cerstve(chybi, time.time()))
+                chybi = [t for t in chybi if t not in vysledek]
+                if chybi:
+                    self.statistiky["miss"] += len(chybi)
+                    vysledek.update(self._stahni_a_vloz(chybi))
+
+        ted = time.time()
+        with self._zamek:
+            casy = {t: self._zaznamy[t][0] for t in vysledek if t in self._zaznamy}
+        return {t: {**vysledek[t], "stari_s": ted - casy.get(t, ted)} for t in tickery if t in vysledek}
+
+    def verze_pro(self, tickery):
+        """Čas nejnovější ceny z daných tickerů (změní se jen při obnově právě těchto tickerů)."""
+        with self._zamek:
+            return max((self._zaznamy[str(t)][0] for t in tickery if str(t) in self._zaznamy), default=0.0)
+
+    def stari(self, ticker):
+        """Kolik sekund je cena tickeru stará (None = není na tabuli)."""
+        with self._zamek:
+            zaznam = self._zaznamy.get(str(ticker))
+        return None if zaznam is None else time.time() - zaznam[0]
+
+    def zneplatni(self, tickery=None):
+        """Zahodí ceny vybraných tickerů (None = všech), příští dotaz je stáhne znovu."""
+        with self._zamek:
+            if tickery is None:
+                self._zaznamy.clear()
+                self._bez_ceny.clear()
+            else:
+                for t in tickery:
+                    self._zaznamy.pop(str(t), None)
+                    self._bez_ceny.pop(str(t), None)
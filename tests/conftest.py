@@ -0,0 +1,28 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_klient
+import registr_instrumentu
+import sklad_cen
+import yahoo_klient
+
+
+@pytest.fixture(autouse=True)
+def databaze_v_tmp(tmp_path, monkeypatch):
+    """
+    Sklad cen, registr instrumentů a HTTP / Yahoo cache každého testu v tmp_path
+    (žádné ceny.db / http_cache.sqlite v kořeni repa) a singletony od nuly.
+    """
+    sklad = str(tmp_path / "ceny.db")
+    http_cache = str(tmp_path / "http_cache.sqlite")
+    monkeypatch.setenv("SKLAD_CEN_DB", sklad)
+    monkeypatch.setenv("HTTP_CACHE_DB", http_cache)
+    monkeypatch.setattr(sklad_cen, "SKLAD_CESTA", sklad)
+    monkeypatch.setattr(registr_instrumentu, "SKLAD_CESTA", sklad)
+    monkeypatch.setattr(http_klient, "HTTP_CACHE_CESTA", http_cache)
+    monkeypatch.setattr(yahoo_klient, "HTTP_CACHE_CESTA", http_cache)
+    for modul, nazev in [(sklad_cen, "_SKLAD"), (registr_instrumentu, "_REGISTR"), (yahoo_klient, "_BRANA"), (http_klient, "_SESSION")]:
+        monkeypatch.setattr(modul, nazev, None)
@@ -0,0 +1,26 @@
+import sys
+import os
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from danovy_index import DanovyIndex
+
+
+def test_status_kusy_bez_dane_a_dalsi_osvobozeni():
+    df = pd.DataFrame([
+        {"Ticker": "AAPL", "Pocet": 1.0, "Datum": "2025-01-01"},
+        {"Ticker": "AAPL", "Pocet": 2.0, "Datum": "2020-01-01"},
+        {"Ticker": "AAPL", "Pocet": 3.0, "Datum": "2024-01-01"},
+        {"Ticker": "KO", "Pocet": 4.0, "Datum": "2021-01-01"},
+        {"Ticker": "NVDA", "Pocet": 5.0, "Datum": "2025-05-01"},
+        {"Ticker": "OLD", "Pocet": 6.0, "Datum": None},
+    ])
+    stav = DanovyIndex(df).stav(dnes="2025-06-01")
+
+    assert stav.loc["AAPL", "Dan"] == "🟠 Mix" and stav.loc["KO", "Dan"] == "🟢 Free"
+    assert stav.loc["NVDA", "Dan"] == "🔴 Zdanit" and stav.loc["OLD", "Dan"] == "🟢 Free"
+    assert stav.loc["AAPL", "KusyBezDane"] == 2.0 and stav.loc["NVDA", "KusyBezDane"] == 0.0
+    # Nejbližší je lot z 2024-01-01 (ne pořadí v souboru)
+    assert stav.loc["AAPL", "DalsiOsvobozeni"] == pd.Timestamp("2024-01-01") + pd.Timedelta(days=1095)
+    assert pd.isna(stav.loc["KO", "DalsiOsvobozeni"])
@@ -0,0 +1,150 @@
+import sys
+import os
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_manager as dm
+from storage_engine import ZmenaUzivatele
+
+
+class FalesneUloziste:
+    """Úložiště v paměti, které si pamatuje každý zápis."""
+    def __init__(self, data):
+        self.data = data
+        self.zapisy = []
+
+    def nacti(self, nazev):
+        return self.data[nazev].copy()
+
+    def nacti_pokud_zmeneno(self, nazev, znama_verze):
+        return None, self.nacti(nazev)
+
+    def nacti_uzivatele_pokud_zmeneno(self, nazev, owner, znama_verze):
+        df = self.nacti(nazev)
+        return None, df[df['Owner'] == owner].reset_index(drop=True)
+
+    def zapis(self, df, nazev, zprava):
+        return self.zapis_vice({nazev: df}, zprava)
+
+    def zapis_vice(self, zmeny, zprava):
+        self.zapisy.append((sorted(zmeny), zprava))
+        for nazev, zmena in zmeny.items():
+            if isinstance(zmena, ZmenaUzivatele):
+                full = self.data[nazev]
+                zmena = pd.concat([full[full['Owner'] != zmena.owner], zmena.df], ignore_index=True)
+            self.data[nazev] = zmena.copy()
+        return True
+
+
+@pytest.fixture
+def uloziste(monkeypatch):
+    u = FalesneUloziste({
+        dm.SOUBOR_DATA: pd.DataFrame([{"Ticker": "AAPL", "Pocet": 1.0, "Cena": 100.0, "Datum": "2025-01-01", "Owner": "Bob"}]),
+        dm.SOUBOR_CASH: pd.DataFrame([{"Typ": "Vklad", "Castka": 500.0, "Mena": "USD", "Poznamka": "", "Datum": "2025-01-01", "Owner": "Bob"}]),
+    })
+    monkeypatch.setattr(dm, "get_uloziste", lambda: u)
+    return u
+
+
+def test_transakce_jeden_zapis(uloziste):
+    """Dva soubory uvnitř transakce = jeden společný zápis."""
+    df_p = pd.DataFrame([{"Ticker": "MSFT", "Pocet": 2.0, "Cena": 50.0, "Datum": "2025-02-01"}])
+    df_c = pd.DataFrame([{"Typ": "Nákup", "Castka": -100.0, "Mena": "USD", "Poznamka": "MSFT", "Datum": "2025-02-01"}])
+
+    with dm.transakce("Nákup MSFT"):
+        dm.uloz_data_uzivatele(df_p, "Attis", dm.SOUBOR_DATA)
+        dm.uloz_data_uzivatele(df_c, "Attis", dm.SOUBOR_CASH)
+        assert uloziste.zapisy == []
+
+    assert uloziste.zapisy == [(sorted([dm.SOUBOR_DATA, dm.SOUBOR_CASH]), "Nákup MSFT")]
+    assert set(uloziste.data[dm.SOUBOR_DATA]['Owner']) == {"Bob", "Attis"}
+
+
+def test_transakce_vyjimka_neulozi_nic(uloziste):
+    """Chyba uprostřed obchodu nesmí nechat soubory napůl uložené."""
+    with pytest.raises(ValueError):
+        with dm.transakce("Prodej"):
+            dm.uloz_data_uzivatele(pd.DataFrame([{"Ticker": "X", "Pocet": 1.0}]), "Attis", dm.SOUBOR_DATA)
+            raise ValueError("boom")
+
+    assert uloziste.zapisy == []
+    assert list(uloziste.data[dm.SOUBOR_DATA]['Owner']) == ["Bob"]
+
+
+class VerzovaneUloziste(FalesneUloziste):
+    """Úložiště s verzí (jako SHA na GitHubu) pro test cache."""
+    def __init__(self, data):
+        super().__init__(data)
+        self.verze = 1
+        self.stazeni = 0
+
+    def nacti_pokud_zmeneno(self, nazev, znama_verze):
+        if znama_verze == self.verze:
+            return self.verze, None
+        self.stazeni += 1
+        return self.verze, self.nacti(nazev)
+
+
+def test_cache_parsuje_jen_pri_zmene(monkeypatch):
+    u = VerzovaneUloziste({dm.SOUBOR_WATCHLIST: pd.DataFrame([{"Ticker": "AAPL", "Target": "150", "Owner": "Attis"}])})
+    monkeypatch.setattr(dm, "get_uloziste", lambda: u)
+    monkeypatch.setattr(dm, "_CSV_CACHE", {})
+    start = dict(dm.CACHE_STATISTIKY)
+
+    df1 = dm.nacti_csv(dm.SOUBOR_WATCHLIST)
+    df1.loc[0, 'TargetBuy'] = 999.0  # Úprava kopie nesmí rozbít cache
+    df2 = dm.nacti_csv(dm.SOUBOR_WATCHLIST)
+    assert u.stazeni == 1
+    assert df2.loc[0, 'TargetBuy'] == 150.0
+    assert 'Target' not in df2.columns
+
+    u.verze = 2
+    dm.nacti_csv(dm.SOUBOR_WATCHLIST)
+    assert u.stazeni == 2
+    assert dm.CACHE_STATISTIKY["hit"] - start["hit"] == 1
+    assert dm.CACHE_STATISTIKY["miss"] - start["miss"] == 2
+
+
+def test_zapis_zneplatni_jen_data_uzivatele(uloziste, monkeypatch):
+    """Uložení watchlistu jednoho uživatele nesmí zahodit cache ostatních ani tržní data."""
+    monkeypatch.setattr(dm, "_CSV_CACHE", {
+        (dm.SOUBOR_WATCHLIST, "Attis"): {"verze": 1, "df": pd.DataFrame()},
+        (dm.SOUBOR_WATCHLIST, "Bob"): {"verze": 1, "df": pd.DataFrame()},
+        (dm.SOUBOR_DATA, "Attis"): {"verze": 1, "df": pd.DataFrame()},
+    })
+    odvozene = []
+    monkeypatch.setitem(dm._ZAVISLOSTI, dm.SOUBOR_WATCHLIST, [lambda soubor, owner: odvozene.append(owner)])
+    uloziste.data[dm.SOUBOR_WATCHLIST] = pd.DataFrame(columns=["Ticker", "TargetBuy", "TargetSell", "Owner"])
+    generace = dm.generace_dat(dm.SOUBOR_WATCHLIST, "Attis")
+
+    dm.uloz_data_uzivatele(pd.DataFrame([{"Ticker": "KO", "TargetBuy": 50.0, "TargetSell": 0.0}]), "Attis", dm.SOUBOR_WATCHLIST)
+
+    assert set(dm._CSV_CACHE) == {(dm.SOUBOR_WATCHLIST, "Bob"), (dm.SOUBOR_DATA, "Attis")}
+    assert odvozene == ["Attis"]
+    assert dm.generace_dat(dm.SOUBOR_WATCHLIST, "Attis") == generace + 1
+    assert dm.generace_dat(dm.SOUBOR_WATCHLIST, "Bob") == 0
+
+    # Neúspěšný zápis cache nezahodí (nic se neuložilo)
+    monkeypatch.setattr(uloziste, "zapis_vice", lambda zmeny, zprava: False)
+    dm.uloz_data_uzivatele(pd.DataFrame([{"Ticker": "PEP", "TargetBuy": 50.0, "TargetSell": 0.0}]), "Attis", dm.SOUBOR_WATCHLIST)
+    assert dm.generace_dat(dm.SOUBOR_WATCHLIST, "Attis") == generace + 1 and odvozene == ["Attis"]
+
+
+def test_nacti_csv_vraci_text_misto_kategorii(monkeypatch):
+    """Kategorie drží jen cache; aplikace dostane text, takže concat a groupby fungují jako dřív."""
+    u = VerzovaneUloziste({dm.SOUBOR_DATA: pd.DataFrame([
+        {"Ticker": "AAPL", "Pocet": 1.0, "Cena": 100.0, "Datum": "2025-01-01", "Owner": "Bob"},
+        {"Ticker": "KO", "Pocet": 2.0, "Cena": 50.0, "Datum": "2025-01-02", "Owner": "Bob"},
+    ])})
+    monkeypatch.setattr(dm, "get_uloziste", lambda: u)
+    monkeypatch.setattr(dm, "_CSV_CACHE", {})
+
+    for _ in range(2):  # Miss i hit z cache
+        df = dm.nacti_csv(dm.SOUBOR_DATA)
+        assert not any(isinstance(t, pd.CategoricalDtype) for t in df.dtypes)
+    assert isinstance(dm._CSV_CACHE[dm.SOUBOR_DATA]["df"]["Ticker"].dtype, pd.CategoricalDtype)
+
+    df = pd.concat([df[df["Ticker"] != "KO"], pd.DataFrame([{"Ticker": "MSFT", "Pocet": 1.0, "Owner": "Bob"}])], ignore_index=True)
+    assert df.groupby("Ticker")["Pocet"].sum().to_dict() == {"AAPL": 1.0, "MSFT": 1.0}
@@ -0,0 +1,44 @@
+import sys
+import os
+import pandas as pd
+import streamlit as st
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_manager as dm
+import engine_obchodu as engine
+import registr_instrumentu
+
+
+class ZapisyDoPameti:
+    def __init__(self):
+        self.zapisy = []
+
+    def zapis_vice(self, zmeny, zprava):
+        self.zapisy.append((sorted(zmeny), zprava))
+        return True
+
+
+def test_nakup_bez_site_jeden_zapis(monkeypatch, tmp_path):
+    """Cena z LIVE_DATA, měna a sektor z registru: obchod = jen jeden zápis do úložiště, latence se měří."""
+    def sit_zakazana(*args, **kwargs):
+        raise AssertionError("Obchod nesmí čekat na Yahoo")
+
+    registr = registr_instrumentu.RegistrInstrumentu(str(tmp_path / "ceny.db"), lambda t: {})
+    registr.vloz_info("MSFT", {"currency": "USD", "sector": "Technology", "country": "United States"})
+    monkeypatch.setattr(registr_instrumentu, "_REGISTR", registr)
+    monkeypatch.setattr(engine, "ziskej_tabuli_cen", sit_zakazana)
+    uloziste = ZapisyDoPameti()
+    monkeypatch.setattr(dm, "get_uloziste", lambda: uloziste)
+
+    st.session_state['LIVE_DATA'] = {"MSFT": {"price": 400.0, "curr": "USD", "change": 0.01}}
+    st.session_state['df'] = pd.DataFrame(columns=["Ticker", "Pocet", "Cena", "Datum", "Owner", "Sektor", "Poznamka"])
+    st.session_state['df_cash'] = pd.DataFrame([{"Typ": "Vklad", "Castka": 1000.0, "Mena": "USD", "Poznamka": "", "Datum": "2025-01-01", "Owner": "Bob"}])
+
+    cena, mena, _ = engine.ziskej_kotaci("msft")
+    ok, msg = engine.proved_nakup("MSFT", 2, cena, "Bob")
+
+    assert ok, msg
+    assert mena == "USD" and len(uloziste.zapisy) == 1
+    assert st.session_state['df'].iloc[-1]['Sektor'] == "Technologie"
+    assert engine.histogram_latence()["nákup"]["pocet"] >= 1
@@ -0,0 +1,32 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+def test_jedno_info_na_ticker_soubezne(monkeypatch):
+    """Výnos, sektor, P/E i kapitalizace z jedné odpovědi .info; tickery se stahují souběžně."""
+    volani = []
+
+    def falesne_info(ticker):
+        volani.append(ticker)
+        time.sleep(0.2)
+        return {"longName": ticker, "trailingPE": 20.0, "marketCap": 3e12, "dividendYield": 0.5,
+                "sector": "Technology", "country": "United States", "currency": "USD"}
+
+    monkeypatch.setattr(utils, "yahoo_info", falesne_info)
+    utils._ziskej_info_cached.clear()
+    tickery = [f"T{i}" for i in range(8)]
+
+    start = time.perf_counter()
+    fundamenty = utils.ziskej_fundamenty_hromadne(tickery + ["T0"])
+    assert time.perf_counter() - start < 1.0  # 8 × 0.2 s sériově by trvalo 1.6 s
+    assert sorted(volani) == sorted(tickery)
+    assert fundamenty["T3"]["vynos"] == 0.005 and fundamenty["T3"]["sector"] == "Technology"
+
+    utils.ziskej_fundamenty_hromadne(tickery)  # Podruhé vše z cache
+    assert len(volani) == len(tickery)
+    utils._ziskej_info_cached.clear()
@@ -0,0 +1,24 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_klient import GitHubKlient, REZERVA_LIMITU
+
+
+def test_zpomaleni_pred_vycerpanim_limitu():
+    """Dokud je kvóty dost, nečeká se; pod rezervou se zbytek rozloží do resetu."""
+    k = GitHubKlient(None, "Poutniiik/Moje-Investice")
+    assert k._cekani() == 0.0
+
+    reset = time.time() + 100
+    k.zaznamenej_hlavicky({"X-RateLimit-Remaining": str(REZERVA_LIMITU + 1), "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": str(reset)})
+    assert k._cekani() == 0.0
+
+    k.zaznamenej_hlavicky({"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(reset)})
+    assert 9 < k._cekani() <= 10
+
+    k.zaznamenej_hlavicky({"X-RateLimit-Remaining": "0"})
+    assert k._cekani() > 99
+    assert k.stav_limitu()["zbyva"] == 0
@@ -0,0 +1,126 @@
+import sys
+import os
+import pandas as pd
+import pytest
+import streamlit as st
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jadro_dat
+import registr_instrumentu
+from ocenovani import ocen_portfolio
+
+
+class TabuleVPameti:
+    def __init__(self):
+        self.verze = {}
+
+    def ziskej(self, tickery, cekat=True):
+        return {t: {"price": 50.0, "curr": "USD", "change": 0.0} for t in tickery}
+
+    def verze_pro(self, tickery):
+        return tuple(self.verze.get(t, 0) for t in tickery)
+
+
+@pytest.fixture(autouse=True)
+def registr_bez_site(monkeypatch, tmp_path):
+    """Registr instrumentů bez Yahoo: obohacování na pozadí nic nestahuje."""
+    registr = registr_instrumentu.RegistrInstrumentu(str(tmp_path / "ceny.db"), lambda t: {})
+    monkeypatch.setattr(registr_instrumentu, "_REGISTR", registr)
+
+
+def _jadro(df, live, kurzy):
+    vdf, hod, inv, vahy = ocen_portfolio(df, live, kurzy)
+    return {
+        'vdf': vdf, 'viz_data_list': vdf.to_dict('records'), 'vahy': vahy,
+        'celk_hod_usd': hod, 'celk_inv_usd': inv,
+        'hist_vyvoje': pd.DataFrame({"Date": ["2025-01-01", "2025-01-02"], "TotalUSD": [2000.0, 2100.0]}),
+        'zmena_24h': 0, 'pct_24h': 0, 'cash_usd': 0, 'fundament_data': {}, 'kurzy': kurzy,
+        'verze_cen': (0, 0), 'tickery_cen': ["AAPL", "MSFT"],
+    }
+
+
+def test_nakup_prepocita_jen_svuj_ticker(monkeypatch):
+    """Po nákupu se vymění jen řádek MSFT, součty sedí s plným přepočtem a hotovost se přepočte."""
+    tabule = TabuleVPameti()
+    monkeypatch.setattr(jadro_dat, "ziskej_tabuli_cen", lambda: tabule)
+    kurzy = {"USD": 1.0, "CZK": 20.0, "EUR": 1.1}
+    live = {"AAPL": {"price": 200.0, "curr": "USD", "change": 0.01},
+            "MSFT": {"price": 400.0, "curr": "USD", "change": 0.02}}
+    df = pd.DataFrame({"Ticker": ["AAPL", "MSFT"], "Pocet": [5.0, 2.0], "Cena": [150.0, 300.0],
+                       "Datum": ["2020-01-01", "2025-01-01"], "Sektor": ["Tech", "Tech"]})
+    st.session_state['LIVE_DATA'] = dict(live)
+    st.session_state['df'] = df
+    st.session_state['data_core'] = _jadro(df, live, kurzy)
+    radek_aapl = st.session_state['data_core']['vdf'].iloc[0].copy()
+
+    # Nákup 3 MSFT za 410 + úbytek hotovosti
+    df = pd.concat([df, pd.DataFrame([{"Ticker": "MSFT", "Pocet": 3.0, "Cena": 410.0, "Datum": "2025-06-01", "Sektor": "Tech"}])], ignore_index=True)
+    st.session_state['df'] = df
+    st.session_state['df_cash'] = pd.DataFrame({"Mena": ["USD", "CZK"], "Castka": [770.0, 2000.0]})
+    assert jadro_dat.aktualizuj_jadro(["MSFT"])
+
+    core = st.session_state['data_core']
+    plne = _jadro(df, live, kurzy)
+    assert list(core['vdf']['Ticker']) == ["AAPL", "MSFT"]
+    pd.testing.assert_series_equal(core['vdf'].iloc[0], radek_aapl)
+    assert core['vdf'].iloc[1]['Kusy'] == 5.0
+    assert core['celk_hod_usd'] == pytest.approx(plne['celk_hod_usd'])
+    assert core['celk_inv_usd'] == pytest.approx(plne['celk_inv_usd'])
+    assert core['vahy']['MSFT'] == pytest.approx(2000.0 / 3000.0)
+    assert core['zmena_24h'] == pytest.approx(1000.0)
+    assert core['cash_usd'] == pytest.approx(870.0)
+    assert core['verze_cen'] == (0, 0)
+
+
+def test_watchlist_doplni_kotaci_bez_preceneni(monkeypatch):
+    tabule = TabuleVPameti()
+    monkeypatch.setattr(jadro_dat, "ziskej_tabuli_cen", lambda: tabule)
+    kurzy = {"USD": 1.0, "CZK": 20.0, "EUR": 1.1}
+    live = {"AAPL": {"price": 200.0, "curr": "USD", "change": 0.0}}
+    df = pd.DataFrame({"Ticker": ["AAPL"], "Pocet": [1.0], "Cena": [100.0], "Datum": ["2025-01-01"]})
+    st.session_state['LIVE_DATA'] = dict(live)
+    st.session_state['df'] = df
+    st.session_state['df_cash'] = pd.DataFrame(columns=["Mena", "Castka"])
+    core = _jadro(df, live, kurzy)
+    core['tickery_cen'], core['verze_cen'] = ["AAPL"], (0,)
+    st.session_state['data_core'] = core
+    vdf = core['vdf']
+
+    jadro_dat.aktualizuj_jadro(watchlist=["NVDA"])
+    assert "NVDA" in st.session_state['LIVE_DATA']
+    assert core['tickery_cen'] == ["AAPL", "NVDA"] and core['verze_cen'] == (0, 0)
+    assert core['vdf'] is vdf
+
+    # Bez jádra se nic nedělá (příští běh ho spočítá celé)
+    del st.session_state['data_core']
+    assert not jadro_dat.aktualizuj_jadro(["AAPL"])
+
+
+def test_kategorialni_tickery_bez_duplicit_po_nakupu_a_prodeji(monkeypatch):
+    """Ticker jako kategorie (schéma): vdf má po nákupu i prodeji každý ticker jen jednou."""
+    monkeypatch.setattr(jadro_dat, "ziskej_tabuli_cen", lambda: TabuleVPameti())
+    kurzy = {"USD": 1.0, "CZK": 20.0, "EUR": 1.1}
+    live = {t: {"price": 100.0, "curr": "USD", "change": 0.0} for t in ("AAPL", "KO", "MSFT")}
+    df = pd.DataFrame({"Ticker": pd.Categorical(["AAPL", "KO", "MSFT"]), "Pocet": [5.0, 2.0, 1.0],
+                       "Cena": [90.0, 50.0, 80.0], "Datum": pd.to_datetime(["2020-01-01", "2024-01-01", "2025-01-01"])})
+    st.session_state['LIVE_DATA'] = dict(live)
+    st.session_state['df'] = df
+    st.session_state['df_cash'] = pd.DataFrame({"Mena": pd.Categorical(["USD"]), "Castka": [0.0]})
+    st.session_state['data_core'] = _jadro(df, live, kurzy)
+    core = st.session_state['data_core']
+
+    # Nákup AAPL
+    nakup = pd.DataFrame({"Ticker": pd.Categorical(["AAPL"], categories=df["Ticker"].cat.categories),
+                          "Pocet": [1.0], "Cena": [100.0], "Datum": pd.to_datetime(["2025-06-01"])})
+    st.session_state['df'] = pd.concat([df, nakup], ignore_index=True)
+    jadro_dat.aktualizuj_jadro(["AAPL"])
+    assert core['vdf']["Ticker"].is_unique and len(core['vdf']) == 3
+    assert core['celk_hod_usd'] == pytest.approx(900.0)
+
+    # Prodej celého KO -> řádek zmizí
+    st.session_state['df'] = st.session_state['df'][st.session_state['df']["Ticker"] != "KO"]
+    jadro_dat.aktualizuj_jadro(["KO"])
+    assert core['vdf']["Ticker"].is_unique and sorted(core['vdf']["Ticker"].astype(str)) == ["AAPL", "MSFT"]
+    assert core['celk_hod_usd'] == pytest.approx(700.0)
+    assert core['vahy'].index.is_unique
@@ -0,0 +1,64 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kniha_lotu import KnihaLotu, FIFO, LIFO, NEJDRAZSI, DANOVE
+
+
+def _loty():
+    return pd.DataFrame({
+        "Ticker": ["AAPL", "MSFT", "AAPL", "AAPL"],
+        "Pocet": [2.0, 1.0, 3.0, 5.0],
+        "Cena": [100.0, 300.0, 150.0, 120.0],
+        "Datum": ["2020-01-01", "2024-01-01", "2025-03-01", "2024-06-01"],
+    }, index=[10, 11, 12, 13])
+
+
+def test_fifo_a_aplikace_bez_zmeny_vstupu():
+    df = _loty()
+    vyber = KnihaLotu(df).vyber("AAPL", 4, 200.0, FIFO)
+    # Nejstarší: 2 ks za 100 (idx 10), pak 2 z 5 ks za 120 (idx 13)
+    assert list(vyber["Index"]) == [10, 13]
+    assert list(vyber["Ukrojeno"]) == [2.0, 2.0] and list(vyber["Zbyva"]) == [0.0, 3.0]
+    assert vyber["Zisk"].sum() == pytest.approx(2 * 100 + 2 * 80)
+
+    novy = KnihaLotu.aplikuj(df, vyber)
+    assert 10 not in novy.index and novy.at[13, "Pocet"] == 3.0
+    assert df.at[13, "Pocet"] == 5.0 and len(df) == 4
+
+
+def test_metody_vyberu():
+    kniha = KnihaLotu(_loty())
+    assert list(kniha.vyber("AAPL", 4, 200.0, LIFO)["Index"]) == [12, 13]
+    assert list(kniha.vyber("AAPL", 4, 200.0, NEJDRAZSI)["Index"]) == [12, 13]
+    # K 1. 1. 2026 je po časovém testu jen lot z 2020 -> ten první, pak zamčené od nejdražšího
+    assert list(kniha.vyber("AAPL", 6, 200.0, DANOVE, dnes="2026-01-01")["Index"]) == [10, 12, 13]
+    assert kniha.kusy("AAPL") == 10.0
+    with pytest.raises(ValueError):
+        kniha.vyber("AAPL", 11, 200.0)
+    with pytest.raises(ValueError):
+        kniha.vyber("NVDA", 1, 200.0)
+
+
+def test_prodej_nad_10k_loty_je_rychly():
+    rng = np.random.default_rng(1)
+    n = 10_000
+    df = pd.DataFrame({
+        "Ticker": rng.choice(["AAPL", "MSFT", "NVDA", "CEZ.PR"], n),
+        "Pocet": rng.integers(1, 20, n).astype(float),
+        "Cena": rng.uniform(10, 500, n),
+        "Datum": pd.Timestamp("2018-01-01") + pd.to_timedelta(rng.integers(0, 2500, n), unit="D"),
+    })
+    start = time.perf_counter()
+    kniha = KnihaLotu(df)
+    kusy = kniha.kusy("AAPL") / 2
+    vyber = kniha.vyber("AAPL", kusy, 250.0, FIFO)
+    novy = KnihaLotu.aplikuj(df, vyber)
+    assert time.perf_counter() - start < 1.0
+    assert vyber["Ukrojeno"].sum() == pytest.approx(kusy)
+    assert novy[novy["Ticker"] == "AAPL"]["Pocet"].sum() == pytest.approx(kusy)
@@ -0,0 +1,69 @@
+import sys
+import os
+import pandas as pd
+import pytest
+import streamlit as st
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kniha_toku import KnihaToku, ziskej_knihu_toku
+
+KURZY = {"USD": 1.0, "CZK": 20.0, "EUR": 1.1}
+
+
+def test_soucty_po_menach_a_prepocet():
+    kniha = KnihaToku()
+    kniha.synchronizuj({
+        "df_cash": pd.DataFrame({"Typ": ["Vklad", "Výběr", "Withdrawal", "Nákup", "Směna", "Směna"],
+                                 "Castka": [1000.0, -200.0, 100.0, -500.0, -100.0, 2100.0],
+                                 "Mena": ["USD", "USD", "USD", "USD", "USD", "CZK"]}),
+        "df_div": pd.DataFrame({"Castka": [10.0, 5.0], "Mena": ["USD", "EUR"]}),
+        "df_hist": pd.DataFrame({"Zisk": [50.0, -20.0], "Mena": ["USD", "USD"]}),
+    })
+    assert kniha.vklady == {"USD": 700.0}
+    assert kniha.dividendy == {"USD": 10.0, "EUR": 5.0}
+    souhrn = kniha.souhrn(KURZY)
+    assert souhrn["vklady_czk"] == pytest.approx(14000.0)
+    assert souhrn["dividendy_czk"] == pytest.approx(10 * 20 + 5 * 1.1 * 20)
+    assert souhrn["realizovano_czk"] == pytest.approx(600.0)
+    # Toky směn jen po měnách - nejsou kurzovým ziskem, do tržního zisku se nepočítají
+    assert souhrn["smena_po_menach"] == {"USD": -100.0, "CZK": 2100.0} and "smena_czk" not in souhrn
+
+
+def test_prirustkova_synchronizace_a_prestaveni(monkeypatch):
+    """Přidané řádky se zpracují samy; změna uprostřed historie vynutí nové sestavení."""
+    st.session_state.pop('kniha_toku', None)
+    st.session_state['df_cash'] = pd.DataFrame({"Typ": ["Vklad"], "Castka": [100.0], "Mena": ["USD"]})
+    st.session_state['df_div'] = pd.DataFrame(columns=["Castka", "Mena"])
+    st.session_state['df_hist'] = pd.DataFrame({"Zisk": [10.0], "Mena": ["USD"]})
+    kniha = ziskej_knihu_toku()
+    assert kniha.realizovano == {"USD": 10.0}
+
+    zpracovano = []
+    puvodni = KnihaToku._zpracuj
+    monkeypatch.setattr(KnihaToku, "_zpracuj", lambda self, zdroj, radky: (zpracovano.append(len(radky)), puvodni(self, zdroj, radky)))
+    st.session_state['df_hist'] = pd.concat([st.session_state['df_hist'], pd.DataFrame({"Zisk": [5.0], "Mena": ["USD"]})], ignore_index=True)
+    assert ziskej_knihu_toku() is kniha
+    assert zpracovano == [1] and kniha.realizovano == {"USD": 15.0}
+
+    # Smazaný řádek (ruční editace) -> kniha se sestaví znovu z celé tabulky
+    st.session_state['df_hist'] = pd.DataFrame({"Zisk": [5.0], "Mena": ["USD"]})
+    nova = ziskej_knihu_toku()
+    assert nova is not kniha and nova.realizovano == {"USD": 5.0}
+
+
+def test_zmena_posledniho_radku_se_stejnou_castkou_vynuti_prestaveni():
+    """Otisk bere celý řádek: jiný typ / datum při stejné měně a částce se nepřehlédne."""
+    kniha = KnihaToku()
+    df_cash = pd.DataFrame({"Typ": ["Vklad"], "Castka": [100.0], "Mena": ["USD"], "Datum": ["2025-01-01"]})
+    assert kniha.synchronizuj({"df_cash": df_cash})
+
+    prepsany = df_cash.assign(Typ=["Výběr"])
+    assert not kniha.synchronizuj({"df_cash": prepsany})
+    assert not kniha.synchronizuj({"df_cash": df_cash.assign(Datum=["2025-02-01"])})
+
+    # Stejná data z CSV / SQLite (jiné typy sloupců) se za změnu nepovažují
+    pridany = pd.concat([df_cash.assign(Datum=pd.to_datetime(df_cash["Datum"])),
+                         pd.DataFrame({"Typ": ["Vklad"], "Castka": [50.0], "Mena": ["USD"], "Datum": [pd.Timestamp("2025-03-01")]})],
+                        ignore_index=True)
+    assert kniha.synchronizuj({"df_cash": pridany}) and kniha.vklady == {"USD": 150.0}
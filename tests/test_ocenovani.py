@@ -0,0 +1,65 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocenovani import ocen_portfolio, SLOUPCE_VDF
+
+
+def test_schema_a_hodnoty_jako_puvodni_smycka():
+    dnes = pd.Timestamp("2025-06-01")
+    df = pd.DataFrame([
+        {"Ticker": "AAPL", "Pocet": 2.0, "Cena": 100.0, "Datum": pd.Timestamp("2020-01-01"), "Sektor": "Technologie"},
+        {"Ticker": "AAPL", "Pocet": 1.0, "Cena": 130.0, "Datum": pd.Timestamp("2025-01-01"), "Sektor": None},
+        {"Ticker": "CEZ.PR", "Pocet": 10.0, "Cena": 900.0, "Datum": pd.Timestamp("2025-05-01"), "Sektor": ""},
+        {"Ticker": "DELIST", "Pocet": 5.0, "Cena": 10.0, "Datum": pd.Timestamp("2019-01-01"), "Sektor": "Finance"},
+    ])
+    kotace = {"AAPL": {"price": 200.0, "curr": "USD", "change": 0.01}, "CEZ.PR": {"price": 1000.0, "curr": "CZK"}}
+    fund = {"AAPL": {"trailingPE": 30.0, "marketCap": 3e12, "vynos": 0.005}}
+    kurzy = {"CZK": 20.0, "EUR": 1.1}
+
+    vdf, hod_usd, inv_usd, vahy = ocen_portfolio(df, kotace, kurzy, fund, sektor_funkce=lambda t: "Energie",
+                                                 zeme_funkce=lambda t: "Czechia" if t.endswith(".PR") else "United States",
+                                                 dnes=dnes)
+    assert list(vdf.columns) == SLOUPCE_VDF
+    r = vdf.set_index("Ticker")
+    assert r.loc["AAPL", "Investice"] == 330.0 and r.loc["AAPL", "Průměr"] == 115.0
+    assert r.loc["AAPL", "Hodnota"] == 600.0 and r.loc["AAPL", "Zisk"] == 270.0
+    assert r.loc["AAPL", "Dan"] == "🟠 Mix" and r.loc["CEZ.PR", "Dan"] == "🔴 Zdanit" and r.loc["DELIST", "Dan"] == "🟢 Free"
+    assert r.loc["AAPL", "Sektor"] == "Technologie" and r.loc["CEZ.PR", "Sektor"] == "Energie"
+    assert r.loc["CEZ.PR", "HodnotaUSD"] == 500.0 and r.loc["CEZ.PR", "Země"] == "Czechia"
+    assert r.loc["DELIST", "Cena"] == 10.0  # Bez kotace -> průměrná nákupka
+    assert r.loc["AAPL", "Kapitalizace"] == 3000.0 and r.loc["CEZ.PR", "P/E"] == 0
+    assert hod_usd == 600.0 + 500.0 + 50.0 and inv_usd == 330.0 + 450.0 + 50.0
+    assert abs(vahy.sum() - 1.0) < 1e-12
+
+
+def test_10k_lotu_500_tickeru_rychle():
+    rng = np.random.default_rng(1)
+    tickery = [f"T{i}" for i in range(500)]
+    df = pd.DataFrame({
+        "Ticker": rng.choice(tickery, 10_000), "Pocet": rng.integers(1, 50, 10_000).astype(float),
+        "Cena": rng.uniform(1, 500, 10_000), "Sektor": "Technologie",
+        "Datum": pd.Timestamp("2018-01-01") + pd.to_timedelta(rng.integers(0, 2500, 10_000), unit="D"),
+    })
+    kotace = {t: {"price": 100.0, "curr": "USD", "change": 0.0} for t in tickery}
+
+    start = time.perf_counter()
+    vdf, *_ = ocen_portfolio(df, kotace, {"CZK": 23.0, "EUR": 1.1})
+    assert len(vdf) == 500
+    assert time.perf_counter() - start < 1.0
+
+
+def test_podmnozina_kategorialniho_portfolia():
+    """Ticker je od schématu kategorie: ocenění části lotů nesmí vrátit řádky pro nepoužité kategorie."""
+    df = pd.DataFrame({
+        "Ticker": pd.Categorical(["AAPL", "KO", "MSFT", "AAPL"]),
+        "Pocet": [2.0, 3.0, 1.0, 1.0], "Cena": [100.0, 50.0, 300.0, 120.0],
+        "Datum": pd.to_datetime(["2020-01-01", "2024-01-01", "2024-01-01", "2025-01-01"]),
+    })
+    vdf, hod_usd, _, vahy = ocen_portfolio(df[df["Ticker"] == "AAPL"], {"AAPL": {"price": 200.0, "curr": "USD"}}, {})
+    assert list(vdf["Ticker"]) == ["AAPL"] and list(vahy.index) == ["AAPL"]
+    assert vdf.loc[0, "Kusy"] == 3.0 and hod_usd == 600.0
@@ -0,0 +1,49 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from registr_instrumentu import RegistrInstrumentu
+
+
+def test_odhad_hned_a_doplneni_na_pozadi(tmp_path):
+    """Neznámý ticker = okamžitý odhad bez čekání na síť; metadata se doplní jednou a přežijí restart."""
+    db = str(tmp_path / "ceny.db")
+    volani = []
+
+    def stahni(ticker):
+        volani.append(ticker)
+        return {"currency": "GBp", "exchange": "LSE", "sector": "Technology", "country": "United Kingdom", "longName": "Sage"}
+
+    registr = RegistrInstrumentu(db, stahni)
+    assert registr.mena("CEZ.PR") == "CZK" and registr.zeme("SAP.DE") == "Germany"
+    assert registr.mena("CZK=X") == "CZK" and registr.mena("EURUSD=X") == "USD"
+    assert registr.instrument("SGE.L")["zdroj"] == "odhad"
+
+    for _ in range(50):
+        if registr.instrument("SGE.L")["zdroj"] == "yahoo":
+            break
+        time.sleep(0.02)
+    assert registr.sektor("SGE.L") == "Technologie"
+
+    znovu = RegistrInstrumentu(db, stahni)
+    pocet = len(volani)
+    assert znovu.instrument("SGE.L")["mena"] == "GBp" and znovu.zeme("SGE.L") == "United Kingdom"
+    znovu.obohat(["SGE.L"])
+    assert len(volani) == pocet  # Čerstvý záznam se znovu nestahuje
+
+
+def test_kotace_lse_a_svycarska_v_mene_aplikace(tmp_path):
+    """Pence (.L) se dělí 100 a převádí přes GBPUSD=X, CHF (.SW) přes CHFUSD=X; obchoduje se v USD."""
+    registr = RegistrInstrumentu(str(tmp_path / "ceny.db"), lambda t: {})
+    registr.vloz_info("NESN.SW", {"currency": "CHF", "exchange": "EBS"})
+
+    assert registr.mena("SGE.L") == "USD" and registr.mena("NESN.SW") == "USD"
+    assert registr.fx_pary(["SGE.L", "NESN.SW", "AAPL", "CEZ.PR"]) == ["CHFUSD=X", "GBPUSD=X"]
+    fx = {"GBPUSD=X": 1.25, "CHFUSD=X": 1.25}
+    assert registr.do_meny_aplikace("SGE.L", 800.0, fx) == 10.0  # 800 p = 8 GBP = 10 USD
+    assert registr.do_meny_aplikace("NESN.SW", 100.0, fx) == 125.0
+    assert registr.do_meny_aplikace("SGE.L", 800.0, {}) is None  # Bez kurzu žádná cena
+    assert registr.do_meny_aplikace("CEZ.PR", 1000.0, {}) == 1000.0 and registr.mena("CEZ.PR") == "CZK"
+    assert registr.mena("CHF=X") == "USD" and registr.fx_pary(["CHF=X", "^FTSE"]) == []
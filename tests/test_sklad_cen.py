@@ -0,0 +1,102 @@
+import sys
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sklad_cen
+from sklad_cen import SkladCen
+
+
+def test_opakovany_dotaz_bez_site(tmp_path):
+    """Pokryté okno se čte jen ze skladu, z Yahoo se stahují jen nové tickery."""
+    stazeni = []
+
+    def stahni(tickery, start, konec):
+        stazeni.append(sorted(tickery))
+        idx = pd.bdate_range(start, konec)
+        return {t: pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": np.arange(len(idx)) + 1.0, "Volume": 100.0}, index=idx)
+                for t in tickery if t != "NEEXISTUJE"}
+
+    sklad = SkladCen(str(tmp_path / "ceny.db"), stahni)
+    df = sklad.close(["AAPL", "MSFT", "NEEXISTUJE"], "1y")
+    assert list(df.columns) == ["AAPL", "MSFT", "NEEXISTUJE"]
+    assert df["NEEXISTUJE"].isna().all()
+
+    # Kratší okno uvnitř pokrytého = žádná síť (ani pro ticker bez dat)
+    sklad.close(["MSFT", "AAPL", "NEEXISTUJE"], "1mo")
+    assert stazeni == [["AAPL", "MSFT", "NEEXISTUJE"]]
+
+    sklad.close(["AAPL", "NVDA"], "7mo")
+    assert stazeni[-1] == ["NVDA"]
+    assert sklad.posledni_ceny(["AAPL"])["AAPL"]["price"] == df["AAPL"].dropna().iloc[-1]
+
+
+def test_stahuje_jen_mezeru_od_posledni_svicky(tmp_path):
+    """Teplý sklad: 1y pro víc tickerů = jedno malé přírůstkové stažení (stejná mezera = jedna skupina)."""
+    stazeni = []
+
+    def stahni(tickery, start, konec):
+        stazeni.append((sorted(tickery), start, konec))
+        idx = pd.bdate_range(start, konec)
+        return {t: pd.DataFrame({"Close": np.ones(len(idx))}, index=idx) for t in tickery}
+
+    sklad = SkladCen(str(tmp_path / "ceny.db"), stahni)
+    tickery = [f"T{i}" for i in range(30)]
+    assert sklad.dopln_nove(tickery) == tickery
+    assert len(stazeni) == 1
+
+    sklad.cerstvost = 0  # Dnešní svíčka zastarala
+    sklad.close(tickery, "1y")
+    assert len(stazeni) == 2
+    skupina, od, do = stazeni[-1]
+    assert skupina == sorted(tickery)
+    assert (do - od).days <= 4  # Jen od poslední uložené svíčky
+
+
+def test_backfill_jedno_vlakno_a_odlozeni_po_neuspechu(tmp_path):
+    """Rerun během stahování ani po výpadku Yahoo nezakládá další backfill; odložený ticker se zkusí až po čase."""
+    uvolni = threading.Event()
+    stazeni = []
+
+    def stahni(tickery, start, konec):
+        stazeni.append(sorted(tickery))
+        uvolni.wait(5)
+        return {}  # Výpadek Yahoo / delisting: prázdná odpověď
+
+    sklad = SkladCen(str(tmp_path / "ceny.db"), stahni)
+    assert sklad.naplanuj_nove(["DELIST", "AAPL"]) == ["DELIST", "AAPL"]
+    vlakno = sklad._backfill
+    assert sklad.naplanuj_nove(["DELIST", "AAPL"]) == []  # Právě se stahuje
+    uvolni.set()
+    vlakno.join(5)
+
+    assert stazeni == [["AAPL", "DELIST"]]
+    assert sklad.naplanuj_nove(["AAPL"]) == [] and sklad.statistiky["backfill_odlozen"] == 2
+    sklad._odlozeno["AAPL"] = 0  # Uplynula doba OPAKOVANI_BACKFILL_S
+    assert sklad.naplanuj_nove(["AAPL"]) == ["AAPL"]
+    sklad._backfill.join(5)
+    assert stazeni[-1] == ["AAPL"]
+
+
+def test_kotace_s_prisnejsi_cerstvosti(tmp_path, monkeypatch):
+    """Kotace pro tabuli (TTL 300 s) obnoví dnešní svíčku dřív, než vyprší výchozí čerstvost skladu."""
+    stazeni = []
+
+    def stahni(tickery, start, konec):
+        stazeni.append(sorted(tickery))
+        idx = pd.bdate_range(start, konec)
+        return {t: pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": float(len(stazeni)), "Volume": 100.0}, index=idx)
+                for t in tickery}
+
+    sklad = SkladCen(str(tmp_path / "ceny.db"), stahni, cerstvost=900)
+    sklad.posledni_ceny(["AAPL"])
+    ted = time.time()
+    monkeypatch.setattr(sklad_cen.time, "time", lambda: ted + 400)
+    sklad.posledni_ceny(["AAPL"])
+    assert len(stazeni) == 1  # Grafy / boti: 400 s stará svíčka je v pořádku
+    assert sklad.posledni_ceny(["AAPL"], cerstvost=300)["AAPL"]["price"] == 2.0
+    assert len(stazeni) == 2
@@ -0,0 +1,198 @@
+import sys
+import os
+import sqlite3
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage_engine
+from storage_engine import GitHubUloziste, SQLiteUloziste, ZmenaUzivatele, KonfliktZapisu, nazev_tabulky, cesta_oddilu
+
+
+def test_sqlite_naplneni_a_replikace(tmp_path):
+    """
+    Tabulka se naplní ze zdroje jen jednou, zápisy jdou lokálně
+    a na GitHub (zdroj) se dostanou až při flush().
+    """
+    zdroj = {"portfolio_data.csv": pd.DataFrame([{"Ticker": "AAPL", "Pocet": 1.0, "Owner": "Attis"}])}
+    cteni = []
+    zapisy = []
+
+    def nacti(nazev):
+        cteni.append(nazev)
+        return zdroj[nazev].copy()
+
+    def zapis(df, nazev, zprava):
+        zapisy.append((nazev, len(df)))
+        return True
+
+    db = SQLiteUloziste(nacti, zapis, db_cesta=str(tmp_path / "test.db"), interval=3600)
+
+    df = db.nacti("portfolio_data.csv")
+    db.nacti("portfolio_data.csv")
+    assert len(df) == 1
+    assert cteni == ["portfolio_data.csv"]
+
+    novy = pd.concat([df, pd.DataFrame([{"Ticker": "MSFT", "Pocet": 2.0, "Owner": "Attis"}])], ignore_index=True)
+    assert db.zapis(novy, "portfolio_data.csv", "Update Attis")
+    assert len(db.nacti("portfolio_data.csv")) == 2
+    assert zapisy == []
+    assert db.cekajici_replikace() == [nazev_tabulky("portfolio_data.csv")]
+
+    assert db.flush()
+    assert zapisy == [("portfolio_data.csv", 2)]
+    assert db.cekajici_replikace() == []
+    db.zastav()
+
+
+def test_delta_zapis_uzivatele(tmp_path):
+    """Zápis uživatele smaže/vloží jen změněné řádky a nesáhne na cizí data."""
+    zdroj = pd.DataFrame([
+        {"Typ": "Vklad", "Castka": 1000.0, "Mena": "USD", "Datum": "2025-01-01 10:00:00", "Owner": "Attis"},
+        {"Typ": "Vklad", "Castka": 1000.0, "Mena": "USD", "Datum": "2025-01-01 10:00:00", "Owner": "Attis"},
+        {"Typ": "Vklad", "Castka": 50.0, "Mena": "CZK", "Datum": "2025-01-02 10:00:00", "Owner": "Bob"},
+    ])
+    db = SQLiteUloziste(lambda n: zdroj.copy(), lambda df, n, z: True, db_cesta=str(tmp_path / "delta.db"), interval=3600)
+
+    # Uživatel má v paměti otypovaná data (datetime) + jeden nový pohyb
+    attis = zdroj[zdroj['Owner'] == "Attis"].copy()
+    attis['Datum'] = pd.to_datetime(attis['Datum'])
+    nova = pd.DataFrame([{"Typ": "Nákup", "Castka": -200.0, "Mena": "USD", "Datum": pd.Timestamp("2025-02-01 12:00:00"), "Owner": "Attis"}])
+    attis = pd.concat([attis, nova], ignore_index=True)
+
+    db.nacti("cash_data.csv")
+    con = sqlite3.connect(db.db_cesta)
+    rowids_pred = sorted(r[0] for r in con.execute("SELECT rowid FROM cash_data"))
+    con.close()
+
+    assert db.zapis_vice({"cash_data.csv": ZmenaUzivatele("Attis", attis)}, "Nákup")
+
+    con = sqlite3.connect(db.db_cesta)
+    rowids_po = sorted(r[0] for r in con.execute("SELECT rowid FROM cash_data"))
+    con.close()
+    # Původní tři řádky zůstaly netknuté, přibyl jen jeden
+    assert rowids_po[:3] == rowids_pred and len(rowids_po) == 4
+
+    # Smazání jednoho ze dvou stejných vkladů odebere právě jeden řádek
+    assert db.zapis_vice({"cash_data.csv": ZmenaUzivatele("Attis", attis.iloc[1:])}, "Oprava")
+    df = db.nacti("cash_data.csv")
+    assert len(df[df['Owner'] == "Attis"]) == 2
+    assert len(df[df['Owner'] == "Bob"]) == 1
+    db.zastav()
+
+
+def test_github_oddily_migrace_a_zapis():
+    """Kombinovaný soubor se jednou rozdělí po uživatelích, pak se čte a zapisuje jen vlastní oddíl."""
+    soubory = {"watchlist.csv": pd.DataFrame([
+        {"Ticker": "AAPL", "TargetBuy": 150.0, "Owner": "Attis"},
+        {"Ticker": "CEZ.PR", "TargetBuy": 900.0, "Owner": "Bob"},
+    ])}
+    cteni = []
+    commity = []
+
+    def nacti(cesta):
+        cteni.append(cesta)
+        if cesta not in soubory:
+            raise Exception("404 Not Found")
+        return soubory[cesta].copy()
+
+    def zapis_vice(zmeny, zprava):
+        commity.append(sorted(zmeny))
+        soubory.update({c: df.copy() for c, df in zmeny.items()})
+        return True
+
+    def seznam(adresar):
+        return [c for c in soubory if c.startswith(adresar + "/")]
+
+    gh = GitHubUloziste(nacti, None, zapis_vice, seznam_funkce=seznam, oddilove={"watchlist.csv"})
+
+    _, df = gh.nacti_uzivatele_pokud_zmeneno("watchlist.csv", "Attis", None)
+    assert list(df['Ticker']) == ["AAPL"]
+    assert commity == [[cesta_oddilu("watchlist.csv", "Attis"), cesta_oddilu("watchlist.csv", "Bob")]]
+    assert gh.vlastnici("watchlist.csv") == ["Attis", "Bob"]
+
+    # Zápis uživatele = jen jeho soubor, oddíl Boba se nečte ani nepřepisuje
+    cteni.clear()
+    novy = pd.concat([df, pd.DataFrame([{"Ticker": "MSFT", "TargetBuy": 300.0}])], ignore_index=True)
+    assert gh.zapis_vice({"watchlist.csv": ZmenaUzivatele("Attis", novy)}, "Update Attis")
+    assert commity[-1] == [cesta_oddilu("watchlist.csv", "Attis")]
+    assert cesta_oddilu("watchlist.csv", "Bob") not in cteni
+
+    # Nový uživatel bez oddílu -> prázdná data, ne chyba
+    _, prazdny = gh.nacti_uzivatele_pokud_zmeneno("watchlist.csv", "Eva", None)
+    assert prazdny.empty
+    assert len(gh.nacti("watchlist.csv")) == 3
+
+
+def test_soubezny_zapis_se_slouci(monkeypatch):
+    """
+    Dvě instance aplikace zapíšou do stejného souboru z téže verze:
+    druhý zápis narazí na jinou SHA, sloučí řádky a zachová změny obou.
+    """
+    monkeypatch.setattr(storage_engine, "_pockej_backoff", lambda pokus: None)
+    remote = {"watchlist.csv": ("v1", pd.DataFrame([{"Ticker": "AAPL", "TargetBuy": 100.0, "Owner": "Attis"}]))}
+    konflikty = []
+
+    def nacti_podminene(nazev, znama):
+        sha, df = remote[nazev]
+        return sha, df.copy()
+
+    def zapis_vice(soubory, zprava, ocekavane=None):
+        zmenene = [n for n in soubory if ocekavane is not None and remote[n][0] != ocekavane.get(n)]
+        if zmenene:
+            konflikty.append(zmenene)
+            raise KonfliktZapisu(zmenene)
+        nove = {}
+        for n, df in soubory.items():
+            nove[n] = f"v{int(remote[n][0][1:]) + 1}"
+            remote[n] = (nove[n], df.copy())
+        return nove
+
+    a = GitHubUloziste(None, None, zapis_vice, nacti_podminene)
+    b = GitHubUloziste(None, None, zapis_vice, nacti_podminene)
+    df_a = a.nacti("watchlist.csv")
+    df_b = b.nacti("watchlist.csv")
+
+    # A přidá MSFT, B smaže AAPL a přidá KO
+    novy_a = pd.concat([df_a, pd.DataFrame([{"Ticker": "MSFT", "TargetBuy": 300.0, "Owner": "Attis"}])], ignore_index=True)
+    assert a.zapis(novy_a, "watchlist.csv", "A")
+    assert list(df_b["Ticker"]) == ["AAPL"]  # B pořád vidí verzi před zápisem A
+    novy_b = pd.concat([df_b[df_b["Ticker"] != "AAPL"], pd.DataFrame([{"Ticker": "KO", "TargetBuy": 50.0, "Owner": "Attis"}])], ignore_index=True)
+    ok, sloucene = b.zapis_vice_se_sloucenim({"watchlist.csv": novy_b}, "B")
+
+    assert ok
+    assert sorted(b.nacti("watchlist.csv")["Ticker"]) == ["KO", "MSFT"]  # Po sloučení vidí B i změnu A
+    assert konflikty == [["watchlist.csv"]]
+    assert sorted(remote["watchlist.csv"][1]["Ticker"]) == ["KO", "MSFT"]
+    assert sorted(sloucene["watchlist.csv"]["Ticker"]) == ["KO", "MSFT"]
+    assert remote["watchlist.csv"][0] == "v3"
+
+
+def test_sqlite_revalidace_prevezme_zmenu_zdroje(tmp_path):
+    """Změna na GitHubu po naplnění (jiná instance / bot) se po revalidaci objeví i v lokální DB."""
+    remote = {"watchlist.csv": ("v1", pd.DataFrame([{"Ticker": "AAPL", "Owner": "Attis"}]))}
+    dotazy = []
+
+    def revalidace(nazev, znama):
+        dotazy.append(znama)
+        sha, df = remote[nazev]
+        return sha, (None if sha == znama else df.copy())  # Stejná SHA = 304
+
+    db = SQLiteUloziste(None, lambda df, n, z: True, db_cesta=str(tmp_path / "reval.db"), interval=3600,
+                        revalidace_zdroj=revalidace, revalidace_interval=0)
+    verze, df = db.nacti_pokud_zmeneno("watchlist.csv", None)
+    assert list(df["Ticker"]) == ["AAPL"]
+    assert db.nacti_pokud_zmeneno("watchlist.csv", verze) == (verze, None)  # 304 -> cache platí
+    assert dotazy == [None, "v1"]
+
+    remote["watchlist.csv"] = ("v2", pd.DataFrame([{"Ticker": "AAPL", "Owner": "Attis"}, {"Ticker": "KO", "Owner": "Bob"}]))
+    nova_verze, df = db.nacti_pokud_zmeneno("watchlist.csv", verze)
+    assert nova_verze != verze and sorted(df["Ticker"]) == ["AAPL", "KO"]
+
+    # Nereplikovaný lokální zápis má přednost (sloučí se až při replikaci)
+    db.zapis(pd.DataFrame([{"Ticker": "MSFT", "Owner": "Attis"}]), "watchlist.csv", "Lokálně")
+    remote["watchlist.csv"] = ("v3", pd.DataFrame([{"Ticker": "NVDA", "Owner": "Bob"}]))
+    assert list(db.nacti("watchlist.csv")["Ticker"]) == ["MSFT"]
+    assert db.flush()
+    assert list(db.nacti("watchlist.csv")["Ticker"]) == ["NVDA"]
+    db.zastav()
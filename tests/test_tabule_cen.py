@@ -0,0 +1,53 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tabule_cen import TabuleCen
+
+
+def test_stahuje_jen_chybejici_tickery():
+    """Jiné pořadí ani ticker navíc nestáhne znovu celý seznam."""
+    stazeni = []
+
+    def stahni(tickery):
+        stazeni.append(sorted(tickery))
+        return {t: {"price": 10.0, "curr": "USD"} for t in tickery if t != "DELIST"}
+
+    tabule = TabuleCen(stahni)
+    assert set(tabule.ziskej(["AAPL", "MSFT"])) == {"AAPL", "MSFT"}
+    assert set(tabule.ziskej(["MSFT", "AAPL", "NVDA", "DELIST"])) == {"AAPL", "MSFT", "NVDA"}
+    tabule.ziskej(["NVDA", "DELIST", "AAPL"])  # Vše čerstvé, DELIST se v rámci TTL znovu nezkouší
+    assert stazeni == [["AAPL", "MSFT"], ["DELIST", "NVDA"]]
+
+    tabule.ttl = 0  # Zastaralé záznamy -> jedno hromadné stažení
+    tabule.ziskej(["AAPL", "MSFT"])
+    assert stazeni[-1] == ["AAPL", "MSFT"]
+
+
+def test_zastarala_cena_hned_a_obnova_na_pozadi():
+    """cekat=False: snapshot se vrátí okamžitě se stářím, nová cena dorazí z vlákna na pozadí."""
+    import threading
+    import time
+    pust = threading.Event()
+
+    def stahni(tickery):
+        pust.wait(5)  # Simulace pomalého Yahoo
+        return {t: {"price": 20.0, "curr": "USD"} for t in tickery}
+
+    tabule = TabuleCen(stahni)
+    tabule.vloz({"AAPL": {"price": 10.0, "curr": "USD"}}, cas=time.time() - 3600)  # Snapshot market_cache
+
+    start = time.time()
+    ceny = tabule.ziskej(["AAPL"], cekat=False)
+    assert time.time() - start < 1
+    assert ceny["AAPL"]["price"] == 10.0 and ceny["AAPL"]["stari_s"] >= 3600
+    verze = tabule.verze_pro(["AAPL"])
+
+    pust.set()
+    for _ in range(100):
+        if tabule.verze_pro(["AAPL"]) != verze:
+            break
+        time.sleep(0.02)
+    ceny = tabule.ziskej(["AAPL"], cekat=False)
+    assert ceny["AAPL"]["price"] == 20.0 and ceny["AAPL"]["stari_s"] < 60
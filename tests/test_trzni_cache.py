@@ -0,0 +1,37 @@
+import sys
+import os
+import json
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import trzni_cache
+
+
+def test_v2_po_tickerech_a_max_stari(tmp_path):
+    """Každý ticker má vlastní asof; starší než max_stari se nevrátí."""
+    cesta = str(tmp_path / "market_cache.json")
+    ted = time.time()
+    trzni_cache.zapis({
+        "AAPL": {"price": 200.0, "prev_close": 190.0, "change": 5.26, "currency": "USD", "asof": ted - 60},
+        "CEZ.PR": {"price": 900.0, "currency": "CZK", "asof": ted - 3 * 86400},
+        "CZK=X": {"price": 23.5, "asof": ted},
+    }, cesta)
+
+    ceny = trzni_cache.nacti(cesta, max_stari=86400)
+    assert set(ceny) == {"AAPL", "CZK=X"}
+    assert ceny["AAPL"]["prev_close"] == 190.0
+    assert abs(ceny["AAPL"]["asof"] - (ted - 60)) < 1e-6
+    assert json.load(open(cesta))["usd_czk"] == 23.5  # v1 klíč zůstává
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".tmp")] == []
+
+
+def test_cte_i_format_v1(tmp_path):
+    cesta = str(tmp_path / "market_cache.json")
+    with open(cesta, "w") as f:
+        json.dump({"timestamp": time.time() - 100, "usd_czk": 24.0, "prices": {"MSFT": {"price": 400, "change": 1.0}}}, f)
+
+    ceny = trzni_cache.nacti(cesta)
+    assert ceny["MSFT"]["source"] == "v1" and ceny["MSFT"]["change"] == 1.0
+    assert ceny["CZK=X"]["price"] == 24.0
+    assert trzni_cache.nacti(cesta, max_stari=10) == {}
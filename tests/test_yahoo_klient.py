@@ -0,0 +1,76 @@
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yahoo_klient
+from yahoo_klient import YahooBrana, YahooNedostupne
+
+
+def test_single_flight_a_token_bucket():
+    """Souběžné stejné požadavky = jedno volání; nad kapacitu vědra se čeká."""
+    brana = YahooBrana(rychlost=20.0, kapacita=2)
+    volani = []
+
+    def pomale():
+        volani.append(1)
+        time.sleep(0.2)
+        return {"sector": "Technology"}
+
+    vysledky = []
+    vlakna = [threading.Thread(target=lambda: vysledky.append(brana.zavolej(("info", "AAPL"), pomale))) for _ in range(5)]
+    for v in vlakna: v.start()
+    for v in vlakna: v.join()
+    assert len(volani) == 1 and len(vysledky) == 5
+    assert brana.stav()["sdilenych"] == 4
+
+    for i in range(4):
+        brana.zavolej(("info", f"T{i}"), lambda: {})
+    assert brana.stav()["zpomaleni"] >= 1
+
+
+def test_backoff_na_429_a_jistic_se_zalohou(monkeypatch):
+    monkeypatch.setattr(yahoo_klient.time, "sleep", lambda s: None)
+    monkeypatch.setattr(yahoo_klient, "PRAH_SELHANI", 3)
+    brana = YahooBrana(rychlost=1000.0, kapacita=100)
+    assert brana.zavolej(("info", "CZK=X"), lambda: {"price": 23.0}) == {"price": 23.0}
+
+    pokusy = []
+
+    def limit():
+        pokusy.append(1)
+        raise RuntimeError("Too Many Requests. Rate limited. Try after a while.")
+
+    # 429 -> opakuje, po PRAH_SELHANI se rozpojí jistič a vrátí se poslední úspěšná odpověď
+    assert brana.zavolej(("info", "CZK=X"), limit) == {"price": 23.0}
+    assert len(pokusy) == 3
+    assert brana.stav()["limit_chyb"] == 3 and brana.stav()["jistic_rozpojen_za_s"] > 0
+
+    # Rozpojený jistič na Yahoo vůbec nesahá
+    try:
+        brana.zavolej(("info", "MSFT"), limit)
+        assert False, "Bez zálohy má brána vyhodit YahooNedostupne"
+    except YahooNedostupne:
+        pass
+    assert len(pokusy) == 3
+
+
+def test_odpoved_z_disku_po_restartu(tmp_path):
+    """Nová brána (restart / další běh bota) vezme čerstvou odpověď z disku, prošlou stáhne znovu."""
+    cesta = str(tmp_path / "http_cache.sqlite")
+    volani = []
+
+    def info():
+        volani.append(1)
+        return {"sector": "Technology"}
+
+    YahooBrana(disk=yahoo_klient.DiskovaCache(cesta)).zavolej(("info", "AAPL"), info)
+    po_restartu = YahooBrana(disk=yahoo_klient.DiskovaCache(cesta))
+    assert po_restartu.zavolej(("info", "AAPL"), info) == {"sector": "Technology"}
+    assert len(volani) == 1 and po_restartu.stav()["z_disku"] == 1
+
+    prosle = YahooBrana(disk=yahoo_klient.DiskovaCache(cesta), expirace={"info": 1e-9})
+    prosle.zavolej(("info", "AAPL"), info)
+    assert len(volani) == 2
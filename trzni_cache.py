@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+# ==========================================
+# 🗂️ MARKET CACHE v2 (market_cache.json)
+# ==========================================
+# Snapshot cen, který píše daily_bot a čte web pro rychlý start.
+# v2: každý ticker má vlastní 'asof' (kdy cena vznikla), předchozí close, změnu,
+# měnu a zdroj. Klíče z v1 (usd_czk, eur_usd, prices.*.price / change v %) zůstávají,
+# takže starší čtenáři fungují dál.
+
+CESTA = "market_cache.json"
+VERZE = 2
+MAX_STARI_S = 24 * 3600  # Starší ceny čtenář ignoruje (stáhnou se znovu), bot běží 1x denně
+
+
+def zapis(ceny, cesta=CESTA, zdroj="yahoo"):
+    """
+    Atomický zápis snapshotu: nejdřív dočasný soubor ve stejném adresáři, pak os.replace,
+    takže souběžný čtenář vidí vždy celý starý nebo celý nový soubor.
+    ceny: {ticker: {"price", "prev_close"?, "change" (v %)?, "currency"?, "asof"?, "source"?}}
+    """
+    ted = time.time()
+    prices = {}
+    for t, c in ceny.items():
+        if not c or not c.get("price"):
+            continue
+        prices[t] = {
+            "price": float(c["price"]),
+            "prev_close": float(c["prev_close"]) if c.get("prev_close") else None,
+            "change": float(c.get("change") or 0.0),
+            "currency": c.get("currency"),
+            "asof": float(c.get("asof") or ted),
+            "source": c.get("source") or zdroj,
+        }
+    obsah = {
+        "verze": VERZE,
+        "timestamp": ted,
+        "date": datetime.fromtimestamp(ted).strftime("%Y-%m-%d %H:%M:%S"),
+        # v1 kompatibilita
+        "usd_czk": prices.get("CZK=X", {}).get("price", 24.0),
+        "eur_usd": prices.get("EURUSD=X", {}).get("price", 1.08),
+        "prices": prices,
+    }
+    adresar = os.path.dirname(os.path.abspath(cesta))
+    fd, docasny = tempfile.mkstemp(prefix=".market_cache.", suffix=".tmp", dir=adresar)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(obsah, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(docasny, cesta)
+    except Exception:
+        if os.path.exists(docasny):
+            os.remove(docasny)
+        raise
+    return obsah
+
+
+def _nacti_json(cesta):
+    # Zápis je atomický, ale soubor mohl někdo přepsat i postaru (neatomicky) -> jeden opakovaný pokus
+    for pokus in range(2):
+        try:
+            with open(cesta, "r") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            if pokus:
+                raise
+            time.sleep(0.05)
+
+
+def nacti(cesta=CESTA, max_stari=MAX_STARI_S):
+    """
+    Načte snapshot a vrátí jen ceny mladší než 'max_stari' sekund.
+    Returns: {ticker: {"price", "prev_close", "change" (v %), "currency", "asof", "source"}}
+    Chybějící / poškozený soubor = {}.
+    """
+    try:
+        cache = _nacti_json(cesta)
+    except (OSError, ValueError):
+        return {}
+
+    globalni = cache.get("timestamp") or 0
+    v1 = cache.get("verze", 1) < 2
+    ceny = {}
+    for t, c in dict(cache.get("prices", {})).items():
+        ceny[t] = {
+            "price": c.get("price", 0) or 0,
+            "prev_close": c.get("prev_close"),
+            "change": c.get("change"),
+            "currency": c.get("currency"),
+            "asof": c.get("asof") or globalni,  # v1 má jen jeden čas pro celý soubor
+            "source": c.get("source") or ("v1" if v1 else None),
+        }
+    # v1: kurzy měn jen v kořeni souboru (ve v2 tam může být i výchozí hodnota, ne cena)
+    for t, klic in (("CZK=X", "usd_czk"), ("EURUSD=X", "eur_usd")):
+        if v1 and t not in ceny and cache.get(klic):
+            ceny[t] = {"price": cache[klic], "prev_close": None, "change": None, "currency": None,
+                       "asof": globalni, "source": "v1"}
+
+    limit = time.time() - max_stari
+    return {t: c for t, c in ceny.items() if c["price"] > 0 and c["asof"] >= limit}
@@ -2,10 +2,11 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-import yfinance as yf
-import requests
 from ai_brain import get_portfolio_health_score, get_voice_briefing_text, ask_ai_guard
 from voice_engine import VoiceAssistant
+from sklad_cen import ziskej_sklad
+from http_klient import ziskej_session
+from kniha_toku import ziskej_knihu_toku
 
 # --- CACHE FUNKCE (Zrychlení aplikace) ---
 
@@ -20,12 +21,12 @@ def get_cached_briefing_text(USER, _model, score, sentiment):
 
 @st.cache_data(ttl=600)
 def get_macro_data(tickers_tuple):
-    return yf.download(list(tickers_tuple), period="5d", progress=False)['Close']
+    return ziskej_sklad().close(list(tickers_tuple), "5d")
 
 def cached_fear_greed():
     """Získání Fear & Greed indexu"""
     try:
-        r = requests.get("https://api.alternative.me/fng/", timeout=5)
+        r = ziskej_session().get("https://api.alternative.me/fng/", timeout=5)
         data = r.json()['data'][0]
         return int(data['value']), data['value_classification']
     except: return None, None
@@ -208,26 +209,11 @@ def render_dashboard(USER, vdf, hist_vyvoje, kurzy, celk_hod_usd, celk_inv_usd,
     st.write("")
     with st.container(border=True):
         st.subheader("🌊 TOK KAPITÁLU (Sankey)")
-        total_vklady_czk = 0
-        df_cash_temp = st.session_state.get('df_cash', pd.DataFrame())
-        if not df_cash_temp.empty:
-            for _, row in df_cash_temp.iterrows():
-                val_czk = row['Castka']
-                if row['Mena'] == "USD": val_czk *= kurz_czk
-                elif row['Mena'] == "EUR": val_czk *= (kurzy.get("EUR", 1.16) * kurz_czk)
-                if row['Typ'] in ['Vklad', 'Deposit']: total_vklady_czk += val_czk
-                elif row['Typ'] in ['Výběr', 'Withdrawal']: total_vklady_czk -= val_czk
-
-        total_divi_czk = 0
-        df_div_temp = st.session_state.get('df_div', pd.DataFrame())
-        if not df_div_temp.empty:
-             for _, r in df_div_temp.iterrows():
-                amt = r['Castka']
-                if r['Mena'] == "USD": total_divi_czk += amt * kurz_czk
-                elif r['Mena'] == "EUR": total_divi_czk += amt * (kurzy.get("EUR", 1.16) * kurz_czk)
-                else: total_divi_czk += amt
-        
-        total_realized_czk = 0 
+        # Hotové součty z knihy toků (vklady, dividendy, realizovaný zisk) - žádné procházení historie
+        toky = ziskej_knihu_toku().souhrn(kurzy)
+        total_vklady_czk = toky['vklady_czk']
+        total_divi_czk = toky['dividendy_czk']
+        total_realized_czk = toky['realizovano_czk']
         unrealized_profit_czk = (celk_hod_czk - celk_inv_usd * kurz_czk)
         total_market_profit_czk = total_divi_czk + total_realized_czk + unrealized_profit_czk
         cash_total_czk = cash_usd * kurz_czk
@@ -277,11 +263,9 @@ def render_dashboard(USER, vdf, hist_vyvoje, kurzy, celk_hod_usd, celk_inv_usd,
             spark_data = {}
             if tickers_list:
                 try:
-                    batch = yf.download(tickers_list, period="1mo", interval="1d", group_by='ticker', progress=False)
+                    batch = ziskej_sklad().close(tickers_list, "1mo")
                     for t in tickers_list:
-                         if len(tickers_list) > 1 and t in batch.columns.levels[0]: spark_data[t] = batch[t]['Close'].dropna().tolist()
-                         elif len(tickers_list) == 1: spark_data[t] = batch['Close'].dropna().tolist()
-                         else: spark_data[t] = []
+                         spark_data[t] = batch[t].dropna().tolist() if t in batch.columns else []
                 except: pass
             
             vdf['Trend 30d'] = vdf['Ticker'].map(spark_data)
@@ -310,9 +294,13 @@ def render_dashboard(USER, vdf, hist_vyvoje, kurzy, celk_hod_usd, celk_inv_usd,
                         "Dnes": st.column_config.NumberColumn("Dnes %", format="%.2f%%"),
                         "Divi": st.column_config.NumberColumn("Yield", format="%.2f%%"),
                         "P/E": st.column_config.NumberColumn("P/E Ratio", format="%.2f"),
-                        "Trend 30d": st.column_config.LineChartColumn("Trend", width="medium")
+                        "Trend 30d": st.column_config.LineChartColumn("Trend", width="medium"),
+                        "Dan": st.column_config.TextColumn("Daň"),
+                        "KusyBezDane": st.column_config.NumberColumn("Ks bez daně", format="%.2f", help="Kusy, které už splnily 3letý časový test"),
+                        "DalsiOsvobozeni": st.column_config.DateColumn("Další osvobození", format="DD.MM.YYYY")
                     },
-                    column_order=["Ticker", "Trend 30d", "Sektor", "Měna", "Kusy", "Průměr", "Cena", "Dnes", "HodnotaUSD", "Zisk", "Divi", "P/E"],
+                    column_order=["Ticker", "Trend 30d", "Sektor", "Měna", "Kusy", "Průměr", "Cena", "Dnes", "HodnotaUSD", "Zisk", "Divi", "P/E",
+                                  "Dan", "KusyBezDane", "DalsiOsvobozeni"],
                     use_container_width=True, hide_index=True
                 )
         elif vdf.empty:
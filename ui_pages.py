@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np                 # <--- Nové (pro korelace)
-import yfinance as yf              # <--- Nové (pro stahování dat)
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta  # <--- Nové (pro kalendář)
@@ -11,6 +10,7 @@ from utils import (
     ziskej_earnings_datum,  # <--- Nové (pro kalendář)
     ziskej_insider_transakce
 )
+from sklad_cen import ziskej_sklad  # Historie cen (korelace)
 
 # ... pod tím už je tvoje funkce render_analýza_rentgen_page ...
 
@@ -364,7 +364,7 @@ def render_analýza_korelace_page(df, kurzy):
         if len(tickers_list) > 1:
             try:
                 with st.spinner("Počítám korelace..."):
-                    hist_data = yf.download(tickers_list, period="1y")['Close']
+                    hist_data = ziskej_sklad().close(tickers_list, "1y")
                     returns = hist_data.pct_change().dropna()
                     corr_matrix = returns.corr()
                     
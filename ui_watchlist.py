@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 import time 
 from datetime import datetime
 from ai_brain import get_alert_voice_text
 from voice_engine import VoiceAssistant
-from data_manager import SOUBOR_WATCHLIST
+from data_manager import SOUBOR_WATCHLIST, zneplatni_data, nacti_csv_uzivatele
+from sklad_cen import ziskej_sklad
+from jadro_dat import aktualizuj_jadro
 
 def render_watchlist(USER, df_watch, LIVE_DATA, AI_AVAILABLE, model, ziskej_info, save_df_to_github):
     """
@@ -22,7 +23,10 @@ def render_watchlist(USER, df_watch, LIVE_DATA, AI_AVAILABLE, model, ziskej_info
             st.write(f"**Čas aktualizace:** `{datetime.now().strftime('%H:%M:%S')}`")
         with col_diag2:
             if st.button("♻️ VYNUTIT REFRESH", use_container_width=True):
-                st.cache_data.clear()
+                # Znovu načteme jen watchlist tohoto uživatele, tržní cache ostatních zůstanou
+                zneplatni_data(SOUBOR_WATCHLIST, USER)
+                st.session_state['df_watch'] = nacti_csv_uzivatele(SOUBOR_WATCHLIST, USER)
+                st.session_state.pop('data_core', None)
                 st.rerun()
 
     # --- SEKCE PRO PŘIDÁNÍ ---
@@ -44,8 +48,7 @@ def render_watchlist(USER, df_watch, LIVE_DATA, AI_AVAILABLE, model, ziskej_info
                         if success:
                             s.update(label="✅ Zapsáno!", state="complete")
                             st.session_state['df_watch'] = df_updated
-                            if 'data_core' in st.session_state: del st.session_state['data_core']
-                            st.cache_data.clear() 
+                            aktualizuj_jadro(watchlist=[t])  # Jen kotace nového tickeru, bez přepočtu portfolia
                             time.sleep(0.5)
                             st.rerun()
 
@@ -54,6 +57,7 @@ def render_watchlist(USER, df_watch, LIVE_DATA, AI_AVAILABLE, model, ziskej_info
         w_data = []
         tickers_list = df_watch['Ticker'].unique().tolist()
         batch_data = pd.DataFrame()
+        year_high = year_low = pd.Series(dtype=float)
 
         if 'played_alerts' not in st.session_state:
             st.session_state['played_alerts'] = set()
@@ -62,8 +66,11 @@ def render_watchlist(USER, df_watch, LIVE_DATA, AI_AVAILABLE, model, ziskej_info
         if tickers_list:
             with st.spinner("Skenuji trh..."):
                 try:
-                    # Stahujeme o něco více dat (7mo) pro jistotu výpočtu RSI
-                    batch_data = yf.download(tickers_list, period="7mo", group_by='ticker', progress=False)
+                    # Rok dat: RSI i roční rozsah ze skladu cen (z Yahoo jen chybějící svíčky)
+                    sklad = ziskej_sklad()
+                    batch_data = sklad.close(tickers_list, "1y")
+                    year_high = sklad.ceny(tickers_list, "1y", sloupec="High").max()
+                    year_low = sklad.ceny(tickers_list, "1y", sloupec="Low").min()
                 except Exception as e:
                     st.error(f"Chyba při stahování dat: {e}")
                     batch_data = pd.DataFrame()
@@ -82,10 +89,7 @@ def render_watchlist(USER, df_watch, LIVE_DATA, AI_AVAILABLE, model, ziskej_info
             rsi_val = 50.0; range_pos = 0.5
             try:
                 # Logika pro získání historie konkrétního tickeru z batch dat
-                if len(tickers_list) > 1:
-                    hist = batch_data[tk]['Close'] if (tk in batch_data.columns.levels[0]) else pd.Series()
-                else:
-                    hist = batch_data['Close'] if 'Close' in batch_data.columns else pd.Series()
+                hist = batch_data[tk] if tk in batch_data.columns else pd.Series()
 
                 if not hist.empty and len(hist) > 14:
                     # Očištění o NaN hodnoty (DŮLEŽITÉ pro stabilitu)
@@ -99,14 +103,13 @@ def render_watchlist(USER, df_watch, LIVE_DATA, AI_AVAILABLE, model, ziskej_info
                     rs = gain / loss
                     rsi_val = (100 - (100 / (1 + rs))).iloc[-1]
                 
-                # Získání ročního rozsahu (Year Low/High)
+                # Roční rozsah (Year Low/High) z denních svíček ve skladu
                 try:
-                    t_obj = yf.Ticker(tk)
-                    y_low = t_obj.fast_info.get('yearLow', 0)
-                    y_high = t_obj.fast_info.get('yearHigh', 0)
+                    y_low = float(year_low.get(tk, 0) or 0)
+                    y_high = float(year_high.get(tk, 0) or 0)
                     if price and y_high > y_low:
                         range_pos = max(0.0, min(1.0, (price - y_low) / (y_high - y_low)))
-                except: pass # Pokud fast_info selže, necháme 0.5
+                except: pass # Bez dat ve skladu necháme 0.5
             except Exception:
                 pass # RSI zůstane na 50
 
@@ -175,8 +178,6 @@ def render_watchlist(USER, df_watch, LIVE_DATA, AI_AVAILABLE, model, ziskej_info
                 df_to_save = df_watch[df_watch['Ticker'] != to_del]
                 if save_df_to_github(df_to_save, USER, SOUBOR_WATCHLIST):
                     st.session_state['df_watch'] = df_to_save
-                    if 'data_core' in st.session_state: del st.session_state['data_core']
-                    st.cache_data.clear()
                     time.sleep(0.5)
                     st.rerun()
     else:
@@ -1,9 +1,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import requests
-import json
 import feedparser
 import smtplib
 from email.mime.text import MIMEText
@@ -13,9 +10,17 @@ import pytz
 import plotly.graph_objects as go
 import matplotlib.pyplot as plt
 import unicodedata  # Důležité pro odstranění háčků v PDF
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Importujeme konstantu z data_manageru
 from data_manager import RISK_FREE_RATE 
+from sklad_cen import ziskej_sklad
+from tabule_cen import TabuleCen, TTL_S
+from yahoo_klient import yahoo_info, yahoo_fast_info, yahoo_atribut
+from registr_instrumentu import ziskej_registr, MENY_APLIKACE
+from http_klient import ziskej_session
+import trzni_cache
 
 # --- ZDROJE ZPRÁV ---
 RSS_ZDROJE = [
@@ -30,7 +35,7 @@ def ziskej_fear_greed():
     url = "https://production.dataviz.cnn.io/index/fearandgreed/graphdata"
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
     try:
-        r = requests.get(url, headers=headers, timeout=5)
+        r = ziskej_session().get(url, headers=headers, timeout=5)
         data = r.json()
         score = int(data['fear_and_greed']['score'])
         rating = data['fear_and_greed']['rating']
@@ -43,7 +48,7 @@ def ziskej_zpravy():
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
     for url in RSS_ZDROJE:
         try:
-            response = requests.get(url, headers=headers, timeout=5)
+            response = ziskej_session().get(url, headers=headers, timeout=5)
             if response.status_code == 200:
                 feed = feedparser.parse(response.content)
                 for entry in feed.entries[:5]: 
@@ -53,20 +58,21 @@ def ziskej_zpravy():
             pass
     return news
 
+def _vynos_z_info(info):
+    d = info.get('dividendYield')
+    if d and d > 0.30: return d / 100  # Novější yfinance vrací v %
+    return d if d else 0
+
 @st.cache_data(ttl=86400)
 def ziskej_yield(ticker):
-    try:
-        t = yf.Ticker(str(ticker))
-        d = t.info.get('dividendYield')
-        if d and d > 0.30: return d / 100 
-        return d if d else 0
+    # Stejná odpověď .info jako fundamenty (jedno volání Yahoo na ticker)
+    try: return _vynos_z_info(_ziskej_info_cached(ticker))
     except Exception: return 0
 
 @st.cache_data(ttl=86400)
 def ziskej_earnings_datum(ticker):
     try:
-        t = yf.Ticker(str(ticker))
-        cal = t.calendar
+        cal = yahoo_atribut(ticker, "calendar")
         if cal is not None and 'Earnings Date' in cal:
             dates = cal['Earnings Date']
             if dates:
@@ -78,8 +84,7 @@ def ziskej_earnings_datum(ticker):
 # --- POKROČILÉ CACHING FUNKCE PRO RENTGEN ---
 @st.cache_data(ttl=86400, show_spinner=False, persist="disk")
 def _ziskej_info_cached(ticker):
-    t = yf.Ticker(str(ticker))
-    info = t.info
+    info = yahoo_info(ticker)
     
     if not info or len(info) < 5 or "Yahoo API limit" in info.get("longBusinessSummary", ""):
         raise ValueError("Neúplná data z Yahoo API")
@@ -101,15 +106,51 @@ def _ziskej_info_cached(ticker):
         'quickRatio': info.get('quickRatio', 0),
         'numberOfAnalystOpinions': info.get('numberOfAnalystOpinions', 0),
         'heldPercentInsiders': info.get('heldPercentInsiders', 0),
-        'heldPercentInstitutions': info.get('heldPercentInstitutions', 0)
+        'heldPercentInstitutions': info.get('heldPercentInstitutions', 0),
+        'dividendYield': info.get('dividendYield', 0),
+        'sector': info.get('sector', ''),
+        'country': info.get('country', ''),
+        'exchange': info.get('exchange', '')
     }
     return required_info
 
+MAX_VLAKEN_FUNDAMENTU = 8  # Souběžná .info volání (tempo stejně hlídá Yahoo brána)
+
+def ziskej_fundamenty_hromadne(tickers):
+    """
+    Fundamenty celého portfolia najednou: jedno .info na ticker (sdílená cache
+    _ziskej_info_cached), tickery mimo cache se stahují souběžně ve vláknech.
+    Returns: {ticker: {"trailingPE", "marketCap", "vynos", "sector", "country", ...}}
+    (ticker bez dat má nuly, aby výpočet portfolia nemusel nic ošetřovat)
+    """
+    tickers = list(dict.fromkeys(str(t) for t in tickers if str(t).strip()))
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except Exception:
+        add_script_run_ctx, ctx = None, None
+
+    def _fundamenty(ticker):
+        # Vlákno dostane Streamlit kontext, aby fungovala st.cache_data
+        if add_script_run_ctx and ctx:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            info = dict(_ziskej_info_cached(ticker))
+            ziskej_registr().vloz_info(ticker, info)  # Registr instrumentů z téže odpovědi, bez dalšího volání
+        except Exception:
+            info = {'trailingPE': 0, 'marketCap': 0, 'dividendYield': 0, 'sector': '', 'country': ''}
+        info['vynos'] = _vynos_z_info(info)
+        return info
+
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MAX_VLAKEN_FUNDAMENTU, len(tickers)), thread_name_prefix="fundamenty") as pool:
+        return dict(zip(tickers, pool.map(_fundamenty, tickers)))
+
 @st.cache_data(ttl=3600, show_spinner=False)
 def _ziskej_historii_cached(ticker):
     try:
-        t = yf.Ticker(str(ticker))
-        return t.history(period="1y")
+        return ziskej_sklad().historie(str(ticker), "1y")
     except:
         return None
 
@@ -120,17 +161,16 @@ def ziskej_detail_akcie(ticker):
         info = _ziskej_info_cached(ticker)
     except Exception:
         try:
-            t = yf.Ticker(str(ticker))
-            fi = t.fast_info
+            fi = yahoo_fast_info(ticker)
             info = {
                 "longName": ticker,
                 "longBusinessSummary": "MISSING_SUMMARY",
                 "recommendationKey": "N/A",
                 "targetMeanPrice": 0,
-                "trailingPE": fi.trailing_pe,
-                "marketCap": fi.market_cap,
-                "currency": fi.currency,
-                "currentPrice": fi.last_price,
+                "trailingPE": 0,
+                "marketCap": fi["market_cap"] or 0,
+                "currency": fi["currency"],
+                "currentPrice": fi["last_price"],
                 "website": "",
                 "profitMargins": 0, "returnOnEquity": 0, "revenueGrowth": 0, "debtToEquity": 0, "quickRatio": 0, "numberOfAnalystOpinions": 0,
                 "heldPercentInsiders": 0, "heldPercentInstitutions": 0
@@ -170,8 +210,7 @@ def ziskej_insider_transakce(ticker):
     Stáhne seznam transakcí, které provedli manažeři firmy (Insiders).
     """
     try:
-        t = yf.Ticker(ticker)
-        insiders = t.insider_transactions
+        insiders = yahoo_atribut(ticker, "insider_transactions")
         
         if insiders is None or insiders.empty:
             return None
@@ -233,9 +272,10 @@ class PDF(FPDF):
         self.set_text_color(128, 128, 128)
         self.cell(0, 10, f'Strana {self.page_no()}', 0, 0, 'C')
 
-def vygeneruj_profi_pdf(user, df, total_val, cash, profit, best_stock="", worst_stock=""):
+def vygeneruj_profi_pdf(user, df, total_val, cash, profit, best_stock="", worst_stock="", toky=None):
     """
     Generuje PDF s 'Hall of Fame' (Vítěz a Poražený) a agregovanou tabulkou.
+    toky: souhrn knihy toků (realizovaný zisk, dividendy, netto vklady v CZK)
     """
     # --- 1. AGREGACE (SCUCNUTÍ) DAT ---
     # Tohle zajistí, že se 20 řádků Apple spojí do jednoho
@@ -251,7 +291,7 @@ def vygeneruj_profi_pdf(user, df, total_val, cash, profit, best_stock="", worst_
         df_calc['Celkem_Investice'] = df_calc['Pocet'] * df_calc['Cena']
         
         # Seskupíme podle Tickeru
-        df_agreg = df_calc.groupby('Ticker').agg({
+        df_agreg = df_calc.groupby('Ticker', observed=True).agg({
             'Pocet': 'sum',
             'Celkem_Investice': 'sum'
         }).reset_index()
@@ -306,6 +346,14 @@ def vygeneruj_profi_pdf(user, df, total_val, cash, profit, best_stock="", worst_
     pdf.cell(40, 8, f"{prefix}{profit:,.0f} CZK", 0, 1)
     pdf.set_text_color(0, 0, 0)
 
+    # Realizovaný zisk, dividendy a vklady (hotové součty z knihy toků)
+    if toky:
+        for popisek, klic in [("REALIZOVANY ZISK:", "realizovano_czk"), ("DIVIDENDY:", "dividendy_czk"), ("NETTO VKLADY:", "vklady_czk")]:
+            pdf.set_font('Arial', '', 10)
+            pdf.cell(40, 8, popisek, 0, 0)
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(40, 8, f"{toky[klic]:,.0f} CZK", 0, 1)
+
     # --- 4. PRAVÝ SLOUPEC (SÍŇ SLÁVY) ---
     if best_stock or worst_stock:
         pdf.set_y(y_start) # Vrátíme se nahoru
@@ -384,112 +432,101 @@ def odeslat_email(prijemce, predmet, telo):
         return True
     except Exception as e: return f"Chyba: {e}"
 
-@st.cache_data(ttl=3600)
-def ziskej_ceny_hromadne(tickers):
+# Měnové páry se v LIVE_DATA ukazují pod popiskem místo tickeru
+_POPISKY_MEN = {"CZK=X": "USD/CZK", "EURUSD=X": "EUR/USD"}
+
+def _mena_tickeru(t):
+    return ziskej_registr().mena(t)
+
+def _snapshot_market_cache():
     """
-    Verze TURBO HYBRID:
-    1. Zkusí načíst ceny z 'market_cache.json' (vygenerovaný botem).
-    2. Cokoliv nenajde v cache, stáhne živě z Yahoo.
+    Poslední známé ceny z 'market_cache.json' (vygenerovaný botem), jen mladší než
+    trzni_cache.MAX_STARI_S - starší se vůbec nenabídnou a stáhnou se živě.
+    Returns: {ticker: ({"price", "curr"[, "change", "prev"]}, unix čas ceny)}
     """
     data = {}
-    missing_tickers = []
-    
-    # 1. ZKUSÍME NAČÍST CACHE
-    try:
-        with open("market_cache.json", "r") as f:
-            cache = json.load(f)
-            cached_prices = cache.get("prices", {})
-            
-            # Kurzy měn z cache
-            usd_czk = cache.get("usd_czk")
-            if usd_czk: data["USD/CZK"] = {"price": usd_czk, "curr": "CZK"}
-            
-            eur_usd = cache.get("eur_usd")
-            if eur_usd: data["EUR/USD"] = {"price": eur_usd, "curr": "USD"}
-            
-            # Akcie z cache
-            if tickers:
-                for t in tickers:
-                    if t in cached_prices:
-                        p_info = cached_prices[t]
-                        price = p_info.get("price", 0)
-                        
-                        # Měna
-                        curr = "USD"
-                        if ".PR" in str(t): curr = "CZK"
-                        elif ".DE" in str(t): curr = "EUR"
-                        
-                        if price > 0:
-                            data[t] = {"price": price, "curr": curr}
-                    else:
-                        missing_tickers.append(t)
-            
-            # Pokud cache pokryla vše, super!
-            if not missing_tickers:
-                return data
-
-    except Exception:
-        # Cache selhala nebo neexistuje -> musíme stáhnout vše
-        missing_tickers = tickers if tickers else []
-
-    # 2. DOSTÁHNOUT CHYBĚJÍCÍ (nebo vše, pokud cache nebyla)
-    if "USD/CZK" not in data: missing_tickers.append("CZK=X")
-    if "EUR/USD" not in data: missing_tickers.append("EURUSD=X")
-    
-    missing_tickers = list(set(missing_tickers))
-    if not missing_tickers: return data
+    for t, c in trzni_cache.nacti().items():
+        if c["currency"] and c["currency"] not in MENY_APLIKACE:
+            continue  # Starý snapshot s kotací v pence / cizí měně -> stáhne se znovu a převede
+        zaznam = {"price": c["price"], "curr": c["currency"] or _mena_tickeru(t), "zdroj": c["source"]}
+        if c["change"] is not None: zaznam["change"] = c["change"] / 100  # Soubor ukládá v %
+        if c["prev_close"]: zaznam["prev"] = c["prev_close"]
+        data[t] = (zaznam, c["asof"])
+    return data
 
+def _stahni_ceny(tickers):
+    """
+    Živý zdroj pro tabuli kurzů (volá se jen pro chybějící / zastaralé tickery):
+    sklad cen (z Yahoo jen chybějící svíčky), jako poslední záchrana fast_info.
+    Ceny jsou v měně aplikace (registr: pence / 100, CHF a spol. přes FX pár do USD).
+    Returns: {ticker: {"price", "curr"[, "change"]}}
+    """
+    data = {}
     try:
-        batch = yf.download(missing_tickers, period="5d", group_by='ticker', progress=False)
-        for t in missing_tickers:
-            price = 0.0
-            try:
-                if len(missing_tickers) > 1:
-                    if t in batch.columns.levels[0]:
-                        series = batch[t]['Close'].dropna()
-                        if not series.empty: price = float(series.iloc[-1])
-                else:
-                    series = batch['Close'].dropna()
-                    if not series.empty: price = float(series.iloc[-1])
-            except: pass
-            
+        registr = ziskej_registr()
+        fx = registr.fx_pary(tickers)
+        # Dnešní svíčka nesmí být starší než TTL tabule, jinak by obnova vracela pořád tutéž cenu
+        posledni = ziskej_sklad().posledni_ceny(list(tickers) + fx, "5d", cerstvost=TTL_S)
+        fx_ceny = {p: posledni.get(p, {}).get("price") for p in fx}
+        for t in tickers:
+            price = posledni.get(t, {}).get("price", 0.0)
+            prev = posledni.get(t, {}).get("prev")
+
             if price == 0:
                 try:
-                    s = yf.Ticker(t)
-                    price = float(s.fast_info.last_price)
+                    price = float(yahoo_fast_info(t)["last_price"])
                 except: pass
 
-            if price > 0:
-                curr = "USD"
-                label = t
-                if ".PR" in str(t): curr = "CZK"
-                elif ".DE" in str(t): curr = "EUR"
-                elif "CZK=X" in str(t): curr = "CZK"; label = "USD/CZK"
-                elif "EURUSD=X" in str(t): curr = "USD"; label = "EUR/USD"
-                data[label] = {"price": price, "curr": curr}
-                
+            cena = registr.do_meny_aplikace(t, price, fx_ceny) if price > 0 else None
+            if cena:  # Bez kurzu by cena zůstala v cizí měně -> radši žádná
+                data[t] = {"price": cena, "curr": registr.mena(t)}
+                if prev: data[t]["change"] = (price / prev) - 1
+
     except Exception as e:
         print(f"Chyba při dotahování cen: {e}")
-        
+
     return data
 
+@st.cache_resource(show_spinner=False)
+def ziskej_tabuli_cen():
+    """
+    Jedna tabule kurzů na proces (sdílená všemi sessions).
+    Startuje ze snapshotu market_cache.json (každá cena se svým stářím), takže první render
+    nečeká na Yahoo a na pozadí se obnoví jen ceny starší než TTL.
+    """
+    tabule = TabuleCen(_stahni_ceny)
+    for t, (zaznam, cas) in _snapshot_market_cache().items():
+        tabule.vloz({t: zaznam}, cas=cas)
+    return tabule
+
+def ziskej_ceny_hromadne(tickers, cekat=False):
+    """
+    Verze TURBO HYBRID s tabulí kurzů po tickerech:
+    každý ticker má vlastní TTL, takže jiné pořadí nebo jeden ticker navíc
+    stáhne jen to, co chybí (sklad cen -> Yahoo).
+    cekat=False: zastaralé ceny (i ze snapshotu market_cache.json) se vrátí hned
+    se stářím 'stari_s' a obnoví se na pozadí.
+    """
+    tickery = list(tickers or []) + list(_POPISKY_MEN)
+    ceny = ziskej_tabuli_cen().ziskej(tickery, cekat=cekat)
+    return {_POPISKY_MEN.get(t, t): d for t, d in ceny.items()}
+
 @st.cache_data(ttl=3600)
 def ziskej_kurzy(): 
     return {"USD": 1.0, "CZK": 20.85, "EUR": 1.16}
 
 @st.cache_data(ttl=3600)
 def ziskej_info(ticker):
-    mena = "USD"
-    if str(ticker).endswith(".PR"): mena = "CZK"
-    elif str(ticker).endswith(".DE"): mena = "EUR"
+    registr = ziskej_registr()
+    mena = registr.mena(ticker)
     try: 
-        t = yf.Ticker(str(ticker))
-        price = t.fast_info.last_price
-        prev = t.fast_info.previous_close
+        fi = yahoo_fast_info(ticker)
+        price = fi["last_price"]
+        prev = fi["previous_close"]
         zmena = ((price/prev)-1) if prev else 0
-        api_curr = t.fast_info.currency
-        if api_curr and api_curr != "N/A": mena = api_curr
-        return price, mena, zmena
+        # Cena v měně aplikace (pence / 100, cizí měna přes FX pár do USD)
+        fx_ceny = {p: yahoo_fast_info(p)["last_price"] for p in registr.fx_pary([ticker])}
+        return registr.do_meny_aplikace(ticker, price, fx_ceny), mena, zmena
     except Exception: return None, mena, 0
 
 # --- FINANČNÍ FUNKCE ---
@@ -576,23 +613,10 @@ def make_matplotlib_cyberpunk(fig, ax):
 # --- POMOCNÁ FUNKCE SEKTORY ---
 def ziskej_sektor_tickeru(ticker):
     """
-    Zjistí, do jakého sektoru akcie patří.
+    Zjistí, do jakého sektoru akcie patří (z registru instrumentů, bez sítě;
+    neznámý ticker vrátí 'Neznámý' a registr ho doplní na pozadí).
     """
     try:
-        if ticker.endswith(".PR"): return "Energy/Utilities (CZ)"
-        
-        t = yf.Ticker(ticker)
-        sektor = t.info.get('sector', 'Neznámý')
-        
-        preklad = {
-            "Technology": "Technologie",
-            "Financial Services": "Finance",
-            "Energy": "Energie",
-            "Healthcare": "Zdravotnictví",
-            "Consumer Cyclical": "Zbytné spotřební",
-            "Industrials": "Průmysl",
-            "Communication Services": "Komunikace"
-        }
-        return preklad.get(sektor, sektor)
-    except:
+        return ziskej_registr().sektor(ticker)
+    except Exception:
         return "Neznámý"
@@ -1,14 +1,20 @@
 import notification_engine as notify
-import engine_obchodu as engine
 import engine_rpg as rpg
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from utils import make_plotly_cyberpunk
+from sklad_cen import ziskej_sklad
+from yahoo_klient import yahoo_info, ziskej_branu
+from registr_instrumentu import ziskej_registr
+from ocenovani import ocen_portfolio
+from jadro_dat import aktualizuj_jadro
+from kniha_lotu import METODY as METODY_LOTU
+from kniha_toku import ziskej_knihu_toku
+from http_klient import ziskej_session
 from github import Github
 from io import StringIO
 from datetime import datetime, timedelta
@@ -20,7 +26,6 @@ import zipfile
 import io
 import ui_dashboard
 import ui_watchlist
-import requests
 import feedparser
 from streamlit_lottie import st_lottie
 import google.generativeai as genai
@@ -35,14 +40,18 @@ from data_manager import (
     REPO_NAZEV, SOUBOR_DATA, SOUBOR_UZIVATELE, SOUBOR_HISTORIE,
     SOUBOR_CASH, SOUBOR_VYVOJ, SOUBOR_WATCHLIST, SOUBOR_DIVIDENDY, SOUBOR_STATS, SOUBOR_STRATEGIE, 
     RISK_FREE_RATE,
-    get_repo, zasifruj, uloz_csv, uloz_csv_bezpecne, nacti_csv,
-    uloz_data_uzivatele, nacti_uzivatele, ziskej_info, save_df_to_github 
+    get_repo, zasifruj, uloz_csv, uloz_csv_bezpecne, nacti_csv_uzivatele,
+    uloz_data_uzivatele, nacti_uzivatele, ziskej_info, save_df_to_github, transakce,
+    statistiky_cache, nacti_data_uzivatele_paralelne, stav_github_limitu
 )
+from schema import bez_kategorii
 from utils import (
-    ziskej_fear_greed, ziskej_zpravy, ziskej_yield, ziskej_earnings_datum,
+    ziskej_fear_greed, ziskej_zpravy, ziskej_earnings_datum,
     ziskej_detail_akcie, zjisti_stav_trhu, vygeneruj_profi_pdf, ziskej_sektor_tickeru, odeslat_email,
-    ziskej_ceny_hromadne, ziskej_kurzy, ziskej_info, calculate_sharpe_ratio
+    ziskej_ceny_hromadne, ziskej_kurzy, ziskej_info, calculate_sharpe_ratio, ziskej_tabuli_cen,
+    ziskej_fundamenty_hromadne
 )
+from tabule_cen import TTL_S as TTL_CEN
 from ai_brain import (
     init_ai, ask_ai_guard, audit_portfolio, get_tech_analysis,
     generate_rpg_story, analyze_headlines_sentiment, get_chat_response, 
@@ -53,7 +62,7 @@ from engine_rpg import RPG_TASKS, get_task_progress
 # --- NOVINKA: INTEGRACE HLASOVÉHO ASISTENTA ---
 from voice_engine import VoiceAssistant
 
-from engine_obchodu import proved_nakup, proved_prodej, proved_smenu, pohyb_penez
+from engine_obchodu import proved_nakup, proved_prodej, proved_smenu, pohyb_penez, ziskej_kotaci, histogram_latence
 
 from ui_pages import (
     render_analýza_rentgen_page,
@@ -104,7 +113,7 @@ def get_manager():
 # --- LOTTIE LOADER ---
 @st.cache_data
 def load_lottieurl(url: str):
-    r = requests.get(url)
+    r = ziskej_session().get(url, timeout=10)
     if r.status_code != 200: return None
     return r.json()
 
@@ -123,8 +132,8 @@ def cached_fear_greed():
 def cached_zpravy():
     return ziskej_zpravy()
 
-@st.cache_data(ttl=300) # 5 minut cache pro hromadné ceny (Live data)
 def cached_ceny_hromadne(tickers_list):
+    # Cache je po tickerech v tabuli kurzů (utils.ziskej_tabuli_cen, TTL 5 minut na ticker)
     return ziskej_ceny_hromadne(tickers_list)
 
 @st.cache_data(ttl=3600) # 1 hodina cache pro kurzy
@@ -133,6 +142,18 @@ def cached_kurzy():
 
 # -----------------------------------------------------
 
+def formatuj_stari(sekundy):
+    """Stáří ceny pro značku v UI (min / h / dny)."""
+    if sekundy < 3600: return f"{sekundy / 60:.0f} min"
+    if sekundy < 86400: return f"{sekundy / 3600:.0f} h"
+    return f"{sekundy / 86400:.0f} d"
+
+@st.fragment(run_every=15)
+def hlidac_cen(tickery, verze_jadra):
+    """Jakmile obnova na pozadí přinese nové ceny, překreslí aplikaci (jádro se přepočítá z paměti)."""
+    if ziskej_tabuli_cen().verze_pro(tickery) != verze_jadra:
+        st.rerun()
+
 def invalidate_data_core():
     """
     VYNUCENÝ REFRESH: Zneplatní výpočty i syrová data.
@@ -149,6 +170,7 @@ def invalidate_data_core():
     for key in raw_data_keys:
         if key in st.session_state:
             del st.session_state[key]
+    st.session_state.pop('kniha_toku', None)  # Ruční editace historie -> součty toků sestavit znovu
 
 # --- OPRAVA 1: CACHOVANÁ INICIALIZACE AI (Aby se nevolala pořád dokola) ---
 @st.cache_resource(show_spinner="Připojuji neurální sítě...")
@@ -185,7 +207,7 @@ def odebrat_z_watchlistu(ticker, user):
 def get_zustatky(user):
     df_cash = st.session_state.get('df_cash', pd.DataFrame())
     if df_cash.empty: return {}
-    return df_cash.groupby('Mena')['Castka'].sum().to_dict()
+    return df_cash.groupby('Mena', observed=True)['Castka'].sum().to_dict()
 
 # --- ATOMICKÁ FUNKCE: POHYB PENĚZ ---
 
@@ -199,21 +221,19 @@ def pridat_dividendu(ticker, castka, mena, user):
     novy = pd.DataFrame([{"Ticker": ticker, "Castka": float(castka), "Mena": mena, "Datum": datetime.now(), "Owner": user}])
     df_div = pd.concat([df_div, novy], ignore_index=True)
     
-    # Krok 2: Pohyb peněz (Atomický)
-    ok, msg, df_cash_temp = engine.proved_pohyb_hotovosti_engine(
-    castka, mena, "Dividenda", f"Divi {ticker}", user, 
-    df_cash_temp, uloz_data_uzivatele, SOUBOR_CASH
-)
+    # Krok 2: Pohyb peněz (lokálně)
+    df_cash_temp = pohyb_penez(castka, mena, "Dividenda", f"Divi {ticker}", user, df_cash_temp)
     
-    # Krok 3: Uložení obou změn a invalidace
+    # Krok 3: Uložení obou změn v jednom commitu a invalidace
     try:
-        uloz_data_uzivatele(df_div, user, SOUBOR_DIVIDENDY)
-        uloz_data_uzivatele(df_cash_temp, user, SOUBOR_CASH)
+        with transakce(f"Dividenda {ticker} ({user})"):
+            uloz_data_uzivatele(df_div, user, SOUBOR_DIVIDENDY)
+            uloz_data_uzivatele(df_cash_temp, user, SOUBOR_CASH)
         
         # Aktualizace Session State AŽ PO ÚSPĚCHU
         st.session_state['df_div'] = df_div
         st.session_state['df_cash'] = df_cash_temp
-        invalidate_data_core()
+        aktualizuj_jadro()  # Dividenda mění jen hotovost
         add_xp(user, 30)
         return True, f"✅ Připsáno {castka:,.2f} {mena} od {ticker}"
     except Exception as e:
@@ -226,9 +246,8 @@ def ukaz_profi_graf(ticker):
     Stáhne historii za 1 rok, vypočítá SMA 20 a SMA 50 a vykreslí interaktivní graf.
     """
     try:
-        # 1. Stáhneme data
-        stock = yf.Ticker(ticker)
-        df = stock.history(period="1y") # 1 rok historie
+        # 1. Data ze skladu cen (z Yahoo jen chybějící svíčky)
+        df = ziskej_sklad().historie(ticker, "1y") # 1 rok historie
         
         if df.empty:
             st.warning("Graf nedostupný (žádná data).")
@@ -283,9 +302,8 @@ def ukaz_profi_graf(ticker):
     Stáhne historii za 1 rok, vypočítá SMA 20 a SMA 50 a vykreslí interaktivní graf.
     """
     try:
-        # 1. Stáhneme data
-        stock = yf.Ticker(ticker)
-        df = stock.history(period="1y") # 1 rok historie
+        # 1. Data ze skladu cen (z Yahoo jen chybějící svíčky)
+        df = ziskej_sklad().historie(ticker, "1y") # 1 rok historie
         
         if df.empty:
             st.warning("Graf nedostupný (žádná data).")
@@ -338,28 +356,27 @@ def ukaz_profi_graf(ticker):
 
 def aktualizuj_graf_vyvoje(user, aktualni_hodnota_usd):
     if pd.isna(aktualni_hodnota_usd): return pd.DataFrame(columns=["Date", "TotalUSD", "Owner"])
-    full_hist = nacti_csv(SOUBOR_VYVOJ)
     today = datetime.now().strftime("%Y-%m-%d")
-    user_hist = full_hist[full_hist['Owner'] == str(user)].copy()
+    user_hist = nacti_csv_uzivatele(SOUBOR_VYVOJ, user)
     dnes_zapsano = False
 
     if not user_hist.empty:
         last_date = user_hist.iloc[-1]['Date']
         if pd.notnull(last_date) and last_date.strftime("%Y-%m-%d") == today:
             dnes_zapsano = True
-            full_hist.at[user_hist.index[-1], 'TotalUSD'] = aktualni_hodnota_usd
+            user_hist.at[user_hist.index[-1], 'TotalUSD'] = aktualni_hodnota_usd
 
     if not dnes_zapsano:
         new_row = pd.DataFrame([{"Date": datetime.now(), "TotalUSD": aktualni_hodnota_usd, "Owner": str(user)}])
-        full_hist = pd.concat([full_hist, new_row], ignore_index=True)
+        user_hist = pd.concat([user_hist, new_row], ignore_index=True)
 
-    uloz_csv(full_hist, SOUBOR_VYVOJ, "Daily snapshot")
-    return full_hist[full_hist['Owner'] == str(user)]
+    # Zapíše se jen dnešní řádek (delta), ne celá historie všech uživatelů
+    uloz_data_uzivatele(user_hist, user, SOUBOR_VYVOJ)
+    return user_hist
 
 def get_user_stats(user):
     """Načte nebo inicializuje statistiky hráče s podporou perzistence questů."""
-    df_s = nacti_csv(SOUBOR_STATS)
-    user_row = df_s[df_s['Owner'] == str(user)]
+    user_row = nacti_csv_uzivatele(SOUBOR_STATS, user)
     if user_row.empty:
         return {"Owner": user, "XP": 0, "Level": 1, "CompletedQuests": ""}
     return user_row.iloc[0].to_dict()
@@ -371,7 +388,7 @@ def add_xp(user, amount):
     """
     # 1. Kontrola existence dat v paměti
     if 'df_stats' not in st.session_state or st.session_state['df_stats'] is None:
-        st.session_state['df_stats'] = nacti_csv(SOUBOR_STATS).query(f"Owner=='{user}'").copy()
+        st.session_state['df_stats'] = nacti_csv_uzivatele(SOUBOR_STATS, user)
 
     # 2. Zavoláme engine (Teď vrací jen: ok, n_level, df_stats_new)
     # Odstranili jsme proměnnou lvl_up, protože nový engine ji v returnu nemá
@@ -548,7 +565,7 @@ def render_dividendy_page(USER, df, df_div, kurzy, viz_data_list):
         if not df_div.empty:
             plot_df = df_div.copy()
             plot_df['Datum_Den'] = pd.to_datetime(plot_df['Datum']).dt.strftime('%Y-%m-%d')
-            plot_df_grouped = plot_df.groupby(['Datum_Den', 'Ticker'])['Castka'].sum().reset_index().sort_values('Datum_Den')
+            plot_df_grouped = plot_df.groupby(['Datum_Den', 'Ticker'], observed=True)['Castka'].sum().reset_index().sort_values('Datum_Den')
 
             fig_div = px.bar(plot_df_grouped, x='Datum_Den', y='Castka', color='Ticker', title="Historie výplat", template="plotly_dark")
             fig_div.update_xaxes(type='category')
@@ -613,8 +630,7 @@ def render_dividendy_page(USER, df, df_div, kurzy, viz_data_list):
                     for ticker in unique_tickers:
                         try:
                             # Získáme data
-                            stock = yf.Ticker(ticker)
-                            info = stock.info
+                            info = yahoo_info(ticker)
                             
                             # Výplata dividend
                             div_rate = info.get('dividendRate', 0)
@@ -813,6 +829,11 @@ def send_daily_telegram_report(USER, data_core, alerts, kurzy):
         
         # Hotovost
         summary_text += f"Volná hotovost: ${cash_usd:,.0f}\n"
+
+        # Realizovaný zisk a dividendy (hotové součty z knihy toků)
+        toky = ziskej_knihu_toku().souhrn(kurzy)
+        summary_text += f"Realizovaný zisk: <b>{toky['realizovano_czk']:+,.0f} CZK</b>\n"
+        summary_text += f"Dividendy celkem: {toky['dividendy_czk']:,.0f} CZK\n"
         summary_text += f"Nálada trhu: <b>{rating}</b> ({score}/100)\n"
         summary_text += "--------------------------------------\n"
         
@@ -867,9 +888,10 @@ def calculate_all_data(USER, df, df_watch, zustatky, kurzy):
     # Odebereme duplicity a prázdné hodnoty
     all_tickers = list(set([t for t in all_tickers if str(t).strip() != '']))
 
-    # Stáhneme živá data a kurzy (BATCH DOWNLOAD - TOTO JE TO ZRYCHLENÍ)
+    # Živá data a kurzy: poslední známé ceny hned, zastaralé se obnoví na pozadí (stale-while-revalidate)
     with st.spinner("🚀 Bleskové načítání tržních dat..."):
         LIVE_DATA = cached_ceny_hromadne(all_tickers)
+        verze_cen = ziskej_tabuli_cen().verze_pro(all_tickers)
     
     # Aktualizace kurzů, pokud je Yahoo poslalo
     if LIVE_DATA:
@@ -879,111 +901,24 @@ def calculate_all_data(USER, df, df_watch, zustatky, kurzy):
     # Uložíme do session state pro použití v jiných částech appky (např. Obchod)
     st.session_state['LIVE_DATA'] = LIVE_DATA if LIVE_DATA else {}
     
-    # Krok 2: Fundamentální data (Cached)
+    # Krok 2: Fundamentální data (jedno .info na ticker, chybějící souběžně ve vláknech)
     fundament_data = {}
     if not df.empty:
-        tickers_in_portfolio = df['Ticker'].unique().tolist()
-        for tkr in tickers_in_portfolio:
-            # Fundamenty se mění málo, cache zde funguje dobře
-            info, _ = cached_detail_akcie(tkr) 
-            fundament_data[tkr] = info
-
-    # Krok 3: Výpočet portfolia
-    viz_data = []
-    celk_hod_usd = 0
-    celk_inv_usd = 0
+        fundament_data = ziskej_fundamenty_hromadne(df['Ticker'].unique().tolist())
 
+    # Krok 3: Výpočet portfolia (vektorově - ocenovani.py)
+    kotace = dict(LIVE_DATA) if LIVE_DATA else {}
     if not df.empty:
-        # Seskupíme nákupy téže akcie
-        df_g = df.groupby('Ticker').agg({'Pocet': 'sum', 'Cena': 'mean'}).reset_index()
-        # Přesnější výpočet investice (suma: pocet * nákupka pro každou transakci)
-        df_g['Investice'] = df.groupby('Ticker').apply(lambda x: (x['Pocet'] * x['Cena']).sum()).values
-        
-        # Iterace přes portfolio
-        for i, (idx, row) in enumerate(df_g.iterrows()):
-            tkr = row['Ticker']
-            
-            # --- ZDE BYLA TA CHYBA (N+1 Problém) ---
-            # Původně: p, m, d_zmena = ziskej_info(tkr)  <-- TOTO ZPOMALOVALO
-            
-            # NOVĚ: Okamžitý lookup v paměti
-            p = 0
-            m = "USD"
-            d_zmena = 0
-            
-            if tkr in LIVE_DATA:
-                p = LIVE_DATA[tkr].get('price', 0)
-                m = LIVE_DATA[tkr].get('curr', 'USD')
-                # Pokud hromadná data nemají změnu (utils.py vrací jen price/curr), 
-                # necháme 0, abychom nezpomalovali. Rychlost > Detail na dashboardu.
-                d_zmena = LIVE_DATA[tkr].get('change', 0) 
-            else:
-                # Fallback: Jen pokud ticker chybí v balíku, zavoláme pomalou funkci
-                p, m, d_zmena = ziskej_info(tkr)
-            
-            # Záchrana, pokud cena stále chybí (např. delisted)
-            if p is None or p == 0: 
-                p = row['Cena'] # Použijeme nákupní cenu, aby to nebylo 0
-
-            # Zbytek logiky zůstává stejný...
-            fundamenty = fundament_data.get(tkr, {})
-            pe_ratio = fundamenty.get('trailingPE', 0)
-            market_cap = fundamenty.get('marketCap', 0)
-
-            try:
-                raw_sektor = df[df['Ticker'] == tkr]['Sektor'].iloc[0]
-                sektor = str(raw_sektor) if not pd.isna(raw_sektor) and str(raw_sektor).strip() != "" else "Doplnit"
-            except Exception: sektor = "Doplnit"
-
-            # Daňový test (beze změny)
-            nakupy_data = df[df['Ticker'] == tkr]['Datum']
-            dnes = datetime.now()
-            limit_dni = 1095
-            vsechny_ok = True
-            vsechny_fail = True
-
-            for d in nakupy_data:
-                # Ošetření, pokud datum není datetime
-                if not isinstance(d, datetime):
-                    d = pd.to_datetime(d)
-                if (dnes - d).days < limit_dni: vsechny_ok = False
-                else: vsechny_fail = False
-
-            if vsechny_ok: dan_status = "🟢 Free"
-            elif vsechny_fail: dan_status = "🔴 Zdanit"
-            else: dan_status = "🟠 Mix"
-
-            country = "United States"
-            tkr_upper = str(tkr).upper()
-            if tkr_upper.endswith(".PR"): country = "Czechia"
-            elif tkr_upper.endswith(".DE"): country = "Germany"
-            elif tkr_upper.endswith(".L"): country = "United Kingdom"
-            elif tkr_upper.endswith(".PA"): country = "France"
-
-            div_vynos = ziskej_yield(tkr)
-            hod = row['Pocet'] * p
-            inv = row['Investice']
-            z = hod - inv
-
-            # Konverze měny pro celkový součet v USD
-            try:
-                if m == "CZK": k = 1.0 / kurzy.get("CZK", 20.85)
-                elif m == "EUR": k = kurzy.get("EUR", 1.16)
-                else: k = 1.0
-            except Exception: k = 1.0
-
-            celk_hod_usd += hod * k
-            celk_inv_usd += inv * k
-
-            viz_data.append({
-                "Ticker": tkr, "Sektor": sektor, "HodnotaUSD": hod*k, "Zisk": z, "Měna": m,
-                "Hodnota": hod, "Cena": p, "Kusy": row['Pocet'], "Průměr": row['Cena'], "Dan": dan_status, "Investice": inv, "Divi": div_vynos, "Dnes": d_zmena,
-                "Země": country,
-                "P/E": pe_ratio,
-                "Kapitalizace": market_cap / 1e9 if market_cap else 0
-            })
-
-    vdf = pd.DataFrame(viz_data) if viz_data else pd.DataFrame()
+        for tkr in set(df['Ticker'].unique()) - set(kotace):
+            # Fallback: Jen pokud ticker chybí v balíku, zavoláme pomalou funkci
+            p, m, d_zmena = ziskej_info(tkr)
+            kotace[tkr] = {"price": p or 0, "curr": m, "change": d_zmena}
+
+    registr = ziskej_registr()
+    vdf, celk_hod_usd, celk_inv_usd, vahy = ocen_portfolio(
+        df, kotace, kurzy, fundament_data, sektor_funkce=registr.sektor, zeme_funkce=registr.zeme
+    )
+    viz_data = vdf.to_dict('records')
 
     # Krok 4: Výpočet denní změny
     hist_vyvoje = aktualizuj_graf_vyvoje(USER, celk_hod_usd)
@@ -1002,6 +937,7 @@ def calculate_all_data(USER, df, df_watch, zustatky, kurzy):
     data_core = {
         'vdf': vdf,
         'viz_data_list': viz_data,
+        'vahy': vahy,  # Podíl tickerů na hodnotě portfolia (USD)
         'celk_hod_usd': celk_hod_usd,
         'celk_inv_usd': celk_inv_usd,
         'hist_vyvoje': hist_vyvoje,
@@ -1010,6 +946,8 @@ def calculate_all_data(USER, df, df_watch, zustatky, kurzy):
         'cash_usd': cash_usd,
         'fundament_data': fundament_data,
         'kurzy': kurzy,
+        'verze_cen': verze_cen,  # Stáří cen tickerů na tabuli kurzů, ze kterých se počítalo
+        'tickery_cen': all_tickers,
         'timestamp': datetime.now()
     }
     st.session_state['data_core'] = data_core
@@ -1307,7 +1245,7 @@ def main():
 
             elif cmd == "/price" and len(cmd_parts) > 1:
                 t_cli = cmd_parts[1].upper()
-                p_cli, m_cli, z_cli = ziskej_info(t_cli)
+                p_cli, m_cli, z_cli = ziskej_kotaci(t_cli)
                 if p_cli:
                     msg_text = f"💰 {t_cli}: {p_cli:,.2f} {m_cli} ({z_cli*100:+.2f}%)"
                     msg_icon = "📈"
@@ -1326,20 +1264,11 @@ def main():
             elif cmd == "/buy" and len(cmd_parts) >= 3:
                 t_cli = cmd_parts[1].upper()
                 k_cli = float(cmd_parts[2])
-                p_cli, m_cli, _ = ziskej_info(t_cli)
+                p_cli, m_cli, _ = ziskej_kotaci(t_cli)
                 if p_cli:
-                    # TADY VOLÁME ENGINE MÍSTO SMAZANÉ FUNKCE
-                    soubory_nakup = {'data': SOUBOR_DATA, 'cash': SOUBOR_CASH}
-                    ok, msg, nove_p, nova_c = engine.proved_nakup_engine(
-                        t_cli, k_cli, p_cli, USER, 
-                        st.session_state['df'], st.session_state['df_cash'], 
-                        get_zustatky(USER), ziskej_info, uloz_data_uzivatele, 
-                        soubory_nakup
-                    )
+                    # Stejná cesta jako tlačítko KOUPIT (session_state + jeden zápis)
+                    ok, msg = proved_nakup(t_cli, k_cli, p_cli, USER)
                     if ok:
-                        st.session_state['df'] = nove_p
-                        st.session_state['df_cash'] = nova_c
-                        invalidate_data_core()
                         add_xp(USER, 50)
                     msg_text = msg
                     msg_icon = "✅" if ok else "❌"
@@ -1350,20 +1279,10 @@ def main():
             elif cmd == "/sell" and len(cmd_parts) >= 3:
                 t_cli = cmd_parts[1].upper()
                 k_cli = float(cmd_parts[2])
-                p_cli, m_cli, _ = ziskej_info(t_cli)
+                p_cli, m_cli, _ = ziskej_kotaci(t_cli)
                 if p_cli:
-                    # TADY VOLÁME ENGINE MÍSTO SMAZANÉ FUNKCE
-                    soubory_prodej = {'data': SOUBOR_DATA, 'historie': SOUBOR_HISTORIE, 'cash': SOUBOR_CASH}
-                    ok, msg, nove_df, nova_hist, nova_cash = engine.proved_prodej_engine(
-                        t_cli, k_cli, p_cli, USER, m_cli,
-                        st.session_state['df'], st.session_state['df_hist'], st.session_state['df_cash'],
-                        st.session_state.get('LIVE_DATA', {}), uloz_data_uzivatele, soubory_prodej
-                    )
-                    if ok:
-                        st.session_state['df'] = nove_df
-                        st.session_state['df_hist'] = nova_hist
-                        st.session_state['df_cash'] = nova_cash
-                        invalidate_data_core()
+                    # Stejná cesta jako tlačítko PRODAT (session_state + jeden zápis)
+                    ok, msg = proved_prodej(t_cli, k_cli, p_cli, USER, m_cli)
                     msg_text = msg
                     msg_icon = "✅" if ok else "❌"
                 else:
@@ -1385,19 +1304,28 @@ def main():
     # --- 5. NAČTENÍ ZÁKLADNÍCH DAT A JÁDRA ---
     if 'df' not in st.session_state:
         with st.spinner("NAČÍTÁM DATA..."):
-            st.session_state['df'] = nacti_csv(SOUBOR_DATA).query(f"Owner=='{USER}'").copy()
-            st.session_state['df_hist'] = nacti_csv(SOUBOR_HISTORIE).query(f"Owner=='{USER}'").copy()
-            st.session_state['df_cash'] = nacti_csv(SOUBOR_CASH).query(f"Owner=='{USER}'").copy()
-            st.session_state['df_div'] = nacti_csv(SOUBOR_DIVIDENDY).query(f"Owner=='{USER}'").copy()
-            st.session_state['df_watch'] = nacti_csv(SOUBOR_WATCHLIST).query(f"Owner=='{USER}'").copy()
-            st.session_state['df_stats'] = nacti_csv(SOUBOR_STATS).query(f"Owner=='{USER}'").copy()
-            # Hist. vyvoje se necha na 0, aby se spravne inicializoval v calculate_all_data
-            st.session_state['hist_vyvoje'] = aktualizuj_graf_vyvoje(USER, 0)
+            # Všechny soubory paralelně -> čekáme jen na ten nejpomalejší
+            data_uzivatele, casy_nacteni = nacti_data_uzivatele_paralelne(USER, {
+                'df': SOUBOR_DATA,
+                'df_hist': SOUBOR_HISTORIE,
+                'df_cash': SOUBOR_CASH,
+                'df_div': SOUBOR_DIVIDENDY,
+                'df_watch': SOUBOR_WATCHLIST,
+                'df_stats': SOUBOR_STATS,
+                # Hist. vývoje jen načteme (zahřeje cache), zápis dnešní hodnoty udělá calculate_all_data
+                'hist_vyvoje': SOUBOR_VYVOJ,
+            })
+            st.session_state.update(data_uzivatele)
+            st.session_state['casy_nacteni'] = casy_nacteni
     
     df = st.session_state['df']
     df_cash = st.session_state['df_cash']
     df_div = st.session_state['df_div']
     df_watch = st.session_state['df_watch']
+
+    # Nově viděné tickery (nákup / watchlist) -> jednorázově hluboká historie do skladu cen na pozadí
+    # (jedno vlákno na proces; co se právě stahuje nebo nedávno selhalo, se znovu neplánuje)
+    ziskej_sklad().naplanuj_nove(df['Ticker'].astype(str).tolist() + df_watch['Ticker'].astype(str).tolist())
     zustatky = get_zustatky(USER)
     kurzy = cached_kurzy() # Inicializace, hodnoty se upřesní v jádru
 
@@ -1405,8 +1333,10 @@ def main():
     # Zkontrolujeme cache (např. platnost 5 minut)
     cache_timeout = timedelta(minutes=5)
     
+    # Nové ceny z obnovy na pozadí = přepočet hned (bez síťového čekání, ceny už jsou v paměti)
     if ('data_core' not in st.session_state or 
-        (datetime.now() - st.session_state['data_core']['timestamp']) > cache_timeout):
+        (datetime.now() - st.session_state['data_core']['timestamp']) > cache_timeout or
+        st.session_state['data_core'].get('verze_cen') != ziskej_tabuli_cen().verze_pro(st.session_state['data_core'].get('tickery_cen', []))):
         
         with st.spinner("🔄 Aktualizuji datové jádro (LIVE data)..."):
             data_core = calculate_all_data(USER, df, df_watch, zustatky, kurzy)
@@ -1425,6 +1355,12 @@ def main():
     cash_usd = data_core['cash_usd']
     fundament_data = data_core['fundament_data']
     LIVE_DATA = st.session_state['LIVE_DATA'] # Vždy musíme vytáhnout z SS, protože ho cachuje calculate_all_data
+
+    # Stáří cen: zastaralé hodnoty (snapshot / čekají na obnovu) dostanou viditelnou značku
+    stari_cen = max([LIVE_DATA[t].get('stari_s', 0) for t in df['Ticker'].unique() if t in LIVE_DATA] or [0])
+    if stari_cen > TTL_CEN:
+        st.caption(f"⏱️ Ceny jsou staré {formatuj_stari(stari_cen)}, obnovují se na pozadí...")
+        hlidac_cen(data_core.get('tickery_cen', []), data_core.get('verze_cen'))
     
     # OPRAVA: Přepisujeme lokální kurzy z data_core pro použití ve všech podřízených funkcích.
     kurzy = data_core['kurzy'] 
@@ -1676,8 +1612,6 @@ def main():
             # ==================================================
             # 🕵️‍♂️ AUTOPILOT S INTERNETEM (DOPLNĚNÍ CEN)
             # ==================================================
-            import yfinance as yf # Pro jistotu importujeme
-            
             # 1. Uděláme si pracovní kopii dat, abychom nerozbili aplikaci
             df_pdf = df.copy()
             
@@ -1689,9 +1623,9 @@ def main():
             # Rychlé stažení cen z Yahoo
             for t in unikátní_tickery:
                 try:
-                    stock = yf.Ticker(t)
+                    info = yahoo_info(t)
                     # Zkusíme 'currentPrice', když není, tak 'regularMarketPrice'
-                    cena = stock.info.get('currentPrice') or stock.info.get('regularMarketPrice') or 0
+                    cena = info.get('currentPrice') or info.get('regularMarketPrice') or 0
                     aktualni_ceny[t] = cena
                 except:
                     aktualni_ceny[t] = 0
@@ -1733,7 +1667,8 @@ def main():
                 cash=cash_usd, 
                 profit=(celk_hod_czk - celk_inv_czk),
                 best_stock=best_txt,  # <--- TADY UŽ BUDOU REÁLNÁ DATA!
-                worst_stock=worst_txt
+                worst_stock=worst_txt,
+                toky=ziskej_knihu_toku().souhrn(kurzy)
             )
             
             st.download_button(
@@ -1808,7 +1743,7 @@ def main():
             if tickers_to_compare:
                 try:
                     with st.spinner(f"Stahuji historická data pro {len(tickers_to_compare)} tickerů..."):
-                        raw_data = yf.download(tickers_to_compare, period="1y", interval="1d", progress=False)['Close']
+                        raw_data = ziskej_sklad().close(tickers_to_compare, "1y")
 
                     if raw_data.empty:
                         st.warning("Nepodařilo se načíst historická data pro vybrané tickery.")
@@ -2003,15 +1938,12 @@ def main():
                     try:
                         from prophet import Prophet
                         with st.spinner(f"Trénuji model na datech {pred_ticker}..."):
-                            hist_train = yf.download(pred_ticker, period="2y", progress=False)
+                            hist_train = ziskej_sklad().historie(pred_ticker, "2y")
 
                             if not hist_train.empty:
-                                if isinstance(hist_train.columns, pd.MultiIndex):
-                                    y_data = hist_train['Close'].iloc[:, 0]
-                                else:
-                                    y_data = hist_train['Close']
+                                y_data = hist_train['Close'].dropna()
 
-                                df_prophet = pd.DataFrame({'ds': y_data.index.tz_localize(None), 'y': y_data.values})
+                                df_prophet = pd.DataFrame({'ds': y_data.index, 'y': y_data.values})
                                 m = Prophet(daily_seasonality=True)
                                 m.fit(df_prophet)
                                 future = m.make_future_dataframe(periods=pred_days)
@@ -2055,9 +1987,9 @@ def main():
                     with st.spinner("Počítám..."):
                         try:
                             start = datetime.now() - timedelta(days=dca_years*365)
-                            hist = yf.download(dca_ticker, start=start, interval="1mo", progress=False)['Close']
-                            if isinstance(hist, pd.DataFrame): hist = hist.iloc[:, 0]
-                            hist = hist.dropna()
+                            # Měsíční svíčky = poslední denní Close v měsíci (ze skladu cen)
+                            hist = ziskej_sklad().close([dca_ticker], start)[dca_ticker]
+                            hist = hist.dropna().resample('MS').last().dropna()
                             
                             rate = 1.0 if ".PR" in dca_ticker else kurzy.get("CZK", 21)
                             inv_total = 0; shares = 0; evol = []
@@ -2092,7 +2024,7 @@ def main():
                     if st.button("📈 Vypočítat optimální portfolio"):
                         with st.spinner("Simuluji 5000 portfolií..."):
                             try:
-                                data = yf.download(tickers_ef, period="2y", progress=False)['Close']
+                                data = ziskej_sklad().close(tickers_ef, "2y")
                                 returns = np.log(data / data.shift(1)).dropna()
                                 results = np.zeros((3, 5000))
                                 for i in range(5000):
@@ -2213,10 +2145,9 @@ def main():
                 if pd.isna(my_sharpe) or np.isinf(my_sharpe): my_sharpe = 0.0
 
                 try:
-                    sp500 = yf.download("^GSPC", start=start_date, progress=False)
-                    if not sp500.empty:
-                        if isinstance(sp500.columns, pd.MultiIndex): close_col = sp500['Close'].iloc[:, 0]
-                        else: close_col = sp500['Close']
+                    sp500 = ziskej_sklad().close(["^GSPC"], start_date)
+                    if not sp500.dropna().empty:
+                        close_col = sp500["^GSPC"].dropna()
                         sp500_start = close_col.iloc[0]
                         sp500_norm = ((close_col / sp500_start) - 1) * 100
                         sp500_returns = close_col.pct_change().dropna()
@@ -2311,7 +2242,7 @@ def main():
                     
                             if not advice.startswith("Strategické spojení přerušeno"):
                                 # --- NOVINKA: ULOŽENÍ DO HISTORIE ---
-                                df_s = nacti_csv(SOUBOR_STRATEGIE)
+                                df_s = nacti_csv_uzivatele(SOUBOR_STRATEGIE, USER)
                                 new_row = pd.DataFrame([{
                                     "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
                                     "Owner": USER,
@@ -2319,7 +2250,7 @@ def main():
                                     "Advice": advice
                                 }])
                                 df_s = pd.concat([df_s, new_row], ignore_index=True)
-                                uloz_csv(df_s, SOUBOR_STRATEGIE, f"Strategy save for {USER}")
+                                uloz_data_uzivatele(df_s, USER, SOUBOR_STRATEGIE)
                         
                                 st.markdown("---")
                                 st.markdown(advice)
@@ -2331,10 +2262,10 @@ def main():
 
                 with col_hist:
                     st.write("📜 **Poslední rady**")
-                    df_h = nacti_csv(SOUBOR_STRATEGIE)
+                    df_h = nacti_csv_uzivatele(SOUBOR_STRATEGIE, USER)
                     if not df_h.empty:
-                        # Filtrujeme pro aktuálního uživatele a vezmeme poslední 3
-                        user_h = df_h[df_h['Owner'] == str(USER)].tail(3)[::-1]
+                        # Poslední 3 rady aktuálního uživatele
+                        user_h = df_h.tail(3)[::-1]
                         for _, row in user_h.iterrows():
                             with st.expander(f"📅 {row['Timestamp']}"):
                                 st.caption(f"Trh: {row['Sentiment']}")
@@ -2500,13 +2431,9 @@ def main():
                 # Live Data Fetch
                 current_price, menu, denni_zmena = 0, "USD", 0
                 if ticker_input:
-                    info = LIVE_DATA.get(ticker_input)
-                    if info:
-                        current_price = info.get('price', 0)
-                        menu = info.get('curr', 'USD')
-                    else:
-                        p, m, z = ziskej_info(ticker_input)
-                        if p: current_price, menu, denni_zmena = p, m, z
+                    # LIVE_DATA -> tabule kurzů -> registr (bez čekání na Yahoo)
+                    p, m, z = ziskej_kotaci(ticker_input)
+                    if p: current_price, menu, denni_zmena = p, m, z
 
                 if current_price > 0:
                     with c2:
@@ -2550,7 +2477,6 @@ def main():
                         if st.button(f"KOUPIT {qty}x {ticker_input}", type="primary", use_container_width=True, key="btn_buy_action"):
                             ok, msg = proved_nakup(ticker_input, qty, limit_price, USER)
                             if ok:
-                                invalidate_data_core()
                                 add_xp(USER, 50)
                                 st.balloons()
                                 st.success(msg)
@@ -2585,13 +2511,9 @@ def main():
                 # Live Data Fetch
                 current_price, menu, denni_zmena = 0, "USD", 0
                 if ticker_input:
-                    info = LIVE_DATA.get(ticker_input)
-                    if info:
-                        current_price = info.get('price', 0)
-                        menu = info.get('curr', 'USD')
-                    else:
-                        p, m, z = ziskej_info(ticker_input)
-                        if p: current_price, menu, denni_zmena = p, m, z
+                    # LIVE_DATA -> tabule kurzů -> registr (bez čekání na Yahoo)
+                    p, m, z = ziskej_kotaci(ticker_input)
+                    if p: current_price, menu, denni_zmena = p, m, z
 
                 if current_price > 0:
                     with c2:
@@ -2613,6 +2535,7 @@ def main():
                     qty = st.number_input("Počet kusů", min_value=0.0, step=1.0, format="%.2f", key="input_sell_qty")
                 with col_price:
                     limit_price = st.number_input("Cena za kus", min_value=0.0, step=0.1, key="input_sell_price")
+                metoda_lotu = st.selectbox("Výběr lotů", list(METODY_LOTU), format_func=METODY_LOTU.get, key="input_sell_lots")
 
                 # 3. VÝPOČET A TLAČÍTKA
                 holding = 0
@@ -2628,9 +2551,8 @@ def main():
                     if holding >= qty:
                         c_info2.success(f"Máš: {holding} ks")
                         if st.button(f"PRODAT {qty}x {ticker_input}", type="primary", use_container_width=True, key="btn_sell_action"):
-                            ok, msg = proved_prodej(ticker_input, qty, limit_price, USER, menu)
+                            ok, msg = proved_prodej(ticker_input, qty, limit_price, USER, menu, metoda_lotu)
                             if ok:
-                                invalidate_data_core()
                                 add_xp(USER, 50)
                                 st.balloons()
                                 st.success(msg)
@@ -2663,9 +2585,8 @@ def main():
                     ok, msg = proved_smenu(am, fr, to, USER) 
         
                     if ok:
-                        # Nemusíš ručně nastavovat session_state['df_cash'], 
-                        # motor to udělal za tebe. Stačí jen invalidovat cache a refresh.
-                        invalidate_data_core()
+                        # Nemusíš ručně nastavovat session_state['df_cash'] ani jádro,
+                        # motor to udělal za tebe (jádro upravil jen o hotovost). Stačí refresh.
                         st.success(msg)
                         time.sleep(1)
                         st.rerun()
@@ -2701,7 +2622,7 @@ def main():
                         # Uložení
                         uloz_data_uzivatele(df_cash_new, USER, SOUBOR_CASH)
                         st.session_state['df_cash'] = df_cash_new
-                        invalidate_data_core() # Refresh dat
+                        aktualizuj_jadro() # Jen hotovost, bez plného přepočtu
                         
                         st.success(f"✅ {op} proveden!"); 
                         time.sleep(1); 
@@ -2761,14 +2682,14 @@ def main():
         st.subheader("💾 DATA & SPRÁVA")
         t1, t2 = st.tabs(["PORTFOLIO", "HISTORIE"])
         with t1:
-            new_df = st.data_editor(df, num_rows="dynamic", use_container_width=True)
+            new_df = st.data_editor(bez_kategorii(df), num_rows="dynamic", use_container_width=True)
             if st.button("Uložit Portfolio"): 
                 st.session_state['df'] = new_df
                 uloz_data_uzivatele(new_df, USER, SOUBOR_DATA)
                 invalidate_data_core()
                 st.success("Uloženo"); time.sleep(1); st.rerun()
         with t2:
-            new_h = st.data_editor(st.session_state['df_hist'], num_rows="dynamic", use_container_width=True)
+            new_h = st.data_editor(bez_kategorii(st.session_state['df_hist']), num_rows="dynamic", use_container_width=True)
             if st.button("Uložit Historii"): 
                 st.session_state['df_hist'] = new_h
                 uloz_data_uzivatele(new_h, USER, SOUBOR_HISTORIE)
@@ -2781,6 +2702,46 @@ def main():
             for n, d in [(SOUBOR_DATA, 'df'), (SOUBOR_HISTORIE, 'df_hist'), (SOUBOR_CASH, 'df_cash'), (SOUBOR_DIVIDENDY, 'df_div'), (SOUBOR_WATCHLIST, 'df_watch')]:
                 if d in st.session_state: zf.writestr(n, st.session_state[d].to_csv(index=False))
         st.download_button("Stáhnout Data", buf.getvalue(), f"backup_{datetime.now().strftime('%Y%m%d')}.zip", "application/zip")
+
+        # --- VÝKON DATOVÉ VRSTVY ---
+        st.divider(); st.subheader("📊 VÝKON DATOVÉ VRSTVY")
+        cs = statistiky_cache()
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Cache HIT", cs['hit'])
+        m2.metric("Cache MISS", cs['miss'])
+        m3.metric("Hit rate", f"{cs['hit_rate']*100:.0f}%")
+        m4.metric("GitHub 304", cs['revalidace_304'], help="Revalidace bez stažení dat (nečerpá API limit)")
+        casy_nacteni = st.session_state.get('casy_nacteni')
+        if casy_nacteni:
+            st.caption(f"⏱️ Studený start: {max(casy_nacteni.values())*1000:.0f} ms (součet jednotlivých souborů {sum(casy_nacteni.values())*1000:.0f} ms)")
+            st.dataframe(
+                pd.DataFrame([{"Dataset": k, "ms": v * 1000} for k, v in casy_nacteni.items()]).sort_values("ms", ascending=False),
+                column_config={"ms": st.column_config.NumberColumn("Doba načtení (ms)", format="%.0f")},
+                use_container_width=True, hide_index=True
+            )
+        gl = stav_github_limitu()
+        if gl and gl['limit']:
+            g1, g2, g3 = st.columns(3)
+            g1.metric("GitHub API kvóta", f"{gl['zbyva']}/{gl['limit']}")
+            g2.metric("Reset za", f"{(gl['reset_za_s'] or 0)/60:.0f} min")
+            g3.metric("Zpomaleno", f"{gl['zpomaleni']}×", f"{gl['cekani_s']:.1f} s", delta_color="off",
+                      help="Kolikrát klient předem zpomalil, aby nevyčerpal limit")
+        lat = histogram_latence()
+        if lat:
+            st.caption("⏱️ Latence obchodů (od kliknutí po uložení)")
+            st.dataframe(
+                pd.DataFrame([{"Typ": typ, "Počet": h["pocet"], "Průměr (ms)": h["prumer_ms"], "Z toho zápis (ms)": h["zapis_ms"],
+                               "Max (ms)": h["max_ms"], **h["kose"]} for typ, h in lat.items()]),
+                use_container_width=True, hide_index=True
+            )
+        yb = ziskej_branu().stav()
+        y1, y2, y3, y4 = st.columns(4)
+        y1.metric("Yahoo požadavky", yb['pozadavku'], f"{yb['sdilenych']} sdílených", delta_color="off",
+                  help="Sdílené = stejný požadavek už běžel, výsledek se převzal (single-flight)")
+        y2.metric("Yahoo zpomaleno", f"{yb['zpomaleni']}×", f"{yb['cekani_s']:.1f} s", delta_color="off")
+        y3.metric("Yahoo 429 / chyby", f"{yb['limit_chyb']} / {yb['chyb']}")
+        y4.metric("Jistič", "ROZPOJEN" if yb['jistic_rozpojen_za_s'] > 0 else "OK", f"{yb['ze_zalohy']} ze zálohy", delta_color="off",
+                  help="Po sérii chyb se Yahoo chvíli nevolá a použijí se poslední úspěšná data")
         st.divider()
         st.subheader("📲 NOTIFIKACE(Telegram)")
         st.caption("Otestuj spojení s tvým mobilem.")
@@ -0,0 +1,332 @@
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from http_klient import HTTP_CACHE_CESTA, EXPIRACE_YAHOO
+
+# --- KONFIGURACE ---
+RYCHLOST = 2.0           # Tokenů (požadavků na Yahoo) za sekundu v celém procesu
+KAPACITA = 5             # Největší dávka požadavků naráz (velikost vědra)
+MAX_CEKANI = 30          # Nejdelší čekání na token (s), pak se požadavek vzdá
+MAX_POKUSU = 3           # Pokusy při 429 (Too Many Requests)
+PRAH_SELHANI = 5         # Po tolika selháních za sebou se jistič rozpojí
+PAUZA_JISTICE = 60       # Jak dlouho (s) je jistič rozpojený, než zkusí jeden požadavek
+MAX_ZALOH = 2000         # Kolik posledních úspěšných odpovědí držet pro fallback
+
+
+class YahooNedostupne(Exception):
+    """Jistič je rozpojený (nebo došel čas na token) a pro požadavek není záložní odpověď."""
+
+
+def je_limit(chyba):
+    """429 / 'Too Many Requests' z yfinance (YFRateLimitError nebo text chyby)."""
+    if type(chyba).__name__ == "YFRateLimitError":
+        return True
+    text = str(chyba)
+    return "Too Many Requests" in text or "Rate limited" in text or "429" in text
+
+
+class DiskovaCache:
+    """
+    Odpovědi Yahoo na disku (pickle v SQLite vedle HTTP cache), aby restart webu
+    i boti spouštění cronem začínali s teplými daty. Klíč = klíč volání brány.
+    """
+
+    def __init__(self, db_cesta=HTTP_CACHE_CESTA):
+        self.db_cesta = db_cesta
+        con = self._pripoj()
+        try:
+            with con:
+                con.execute("CREATE TABLE IF NOT EXISTS yahoo_odpovedi (klic TEXT PRIMARY KEY, cas REAL, hodnota BLOB)")
+        finally:
+            con.close()
+
+    def _pripoj(self):
+        con = sqlite3.connect(self.db_cesta, timeout=30, check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    def nacti(self, klic):
+        """(unix čas uložení, hodnota) nebo None."""
+        con = self._pripoj()
+        try:
+            radek = con.execute("SELECT cas, hodnota FROM yahoo_odpovedi WHERE klic = ?", (repr(klic),)).fetchone()
+        finally:
+            con.close()
+        if radek is None:
+            return None
+        try:
+            return radek[0], pickle.loads(radek[1])
+        except Exception:
+            return None  # Jiná verze knihovny / poškozený záznam = jako by nebyl
+
+    def uloz(self, klic, hodnota):
+        con = self._pripoj()
+        try:
+            with con:
+                con.execute("INSERT OR REPLACE INTO yahoo_odpovedi VALUES (?, ?, ?)",
+                            (repr(klic), time.time(), pickle.dumps(hodnota)))
+        finally:
+            con.close()
+
+
+class _Let:
+    """Jeden probíhající požadavek; souběžní volající se stejným klíčem čekají na jeho výsledek."""
+
+    def __init__(self):
+        self.hotovo = threading.Event()
+        self.vysledek = None
+        self.chyba = None
+
+
+class YahooBrana:
+    """
+    Jedna brána na proces, přes kterou jde každé volání yfinance:
+    - token bucket (RYCHLOST / KAPACITA) pro všechny sessions i vlákna,
+    - single-flight: stejný požadavek, který už běží, se nestahuje podruhé,
+    - při 429 exponenciální backoff s jitterem,
+    - jistič: po PRAH_SELHANI chybách za sebou se na PAUZA_JISTICE přestane volat
+      a vrací se poslední úspěšná odpověď (nebo YahooNedostupne),
+    - s DiskovaCache: odpovědi mladší než expirace druhu volání (EXPIRACE_YAHOO)
+      jdou z disku, a to i po restartu procesu,
+    - metriky pro UI / logy.
+    """
+
+    def __init__(self, rychlost=RYCHLOST, kapacita=KAPACITA, disk=None, expirace=None):
+        self.disk = disk  # DiskovaCache nebo None (jen paměť)
+        self.expirace = EXPIRACE_YAHOO if expirace is None else expirace
+        self.rychlost = rychlost
+        self.kapacita = kapacita
+        self._tokeny = float(kapacita)
+        self._doplneno = time.monotonic()
+        self._zamek = threading.Lock()
+        self._probihajici = {}  # klíč -> _Let
+        self._zalohy = {}       # klíč -> poslední úspěšná odpověď
+        self._selhani_za_sebou = 0
+        self._rozpojeno_do = 0.0
+        self.statistiky = {"volani": 0, "pozadavku": 0, "sdilenych": 0, "zpomaleni": 0, "cekani_s": 0.0,
+                           "limit_chyb": 0, "chyb": 0, "ze_zalohy": 0, "jistic_rozpojen": 0, "z_disku": 0}
+
+    # --- TOKEN BUCKET ---
+    def _vezmi_token(self):
+        """Počká na volný token (nejdéle MAX_CEKANI). False = nedočkal se."""
+        cekano = 0.0
+        while True:
+            with self._zamek:
+                ted = time.monotonic()
+                self._tokeny = min(self.kapacita, self._tokeny + (ted - self._doplneno) * self.rychlost)
+                self._doplneno = ted
+                if self._tokeny >= 1:
+                    self._tokeny -= 1
+                    if cekano:
+                        self.statistiky["zpomaleni"] += 1
+                        self.statistiky["cekani_s"] += cekano
+                    return True
+                cekani = (1 - self._tokeny) / self.rychlost
+            if cekano + cekani > MAX_CEKANI:
+                return False
+            time.sleep(cekani)
+            cekano += cekani
+
+    # --- JISTIČ ---
+    def _jistic_rozpojen(self):
+        with self._zamek:
+            if time.monotonic() < self._rozpojeno_do:
+                return True
+            if self._rozpojeno_do:
+                # Pauza vypršela -> pustíme jeden zkušební požadavek, další ho počkají (single-flight jen pro klíč)
+                self._rozpojeno_do = time.monotonic() + 1.0 / self.rychlost
+            return False
+
+    def _uspech(self, klic, vysledek, zalohovat):
+        with self._zamek:
+            self._selhani_za_sebou = 0
+            self._rozpojeno_do = 0.0
+            if zalohovat:
+                self._zalohy.pop(klic, None)
+                self._zalohy[klic] = vysledek
+                if len(self._zalohy) > MAX_ZALOH:
+                    self._zalohy.pop(next(iter(self._zalohy)))
+        if zalohovat and self.disk is not None and self.expirace.get(klic[0]):
+            try:
+                self.disk.uloz(klic, vysledek)
+            except Exception as e:
+                print(f"⚠️ Yahoo cache: zápis na disk selhal ({e})")
+
+    def _selhani(self):
+        with self._zamek:
+            self.statistiky["chyb"] += 1
+            self._selhani_za_sebou += 1
+            if self._selhani_za_sebou >= PRAH_SELHANI:
+                if time.monotonic() >= self._rozpojeno_do:
+                    self.statistiky["jistic_rozpojen"] += 1
+                self._rozpojeno_do = time.monotonic() + PAUZA_JISTICE
+
+    def _z_disku(self, klic, max_stari=None):
+        """Odpověď z disku (max_stari=None = libovolně stará) nebo None."""
+        if self.disk is None or not self.expirace.get(klic[0]):
+            return None
+        try:
+            zaznam = self.disk.nacti(klic)
+        except Exception:
+            return None
+        if zaznam is None or (max_stari is not None and time.time() - zaznam[0] >= max_stari):
+            return None
+        return zaznam
+
+    def _zaloha(self, klic, chyba=None):
+        with self._zamek:
+            if klic in self._zalohy:
+                self.statistiky["ze_zalohy"] += 1
+                return self._zalohy[klic]
+        zaznam = self._z_disku(klic)
+        if zaznam is not None:
+            with self._zamek:
+                self.statistiky["ze_zalohy"] += 1
+            return zaznam[1]
+        if chyba is not None:
+            raise chyba
+        raise YahooNedostupne(f"Yahoo je dočasně nedostupné ({klic[0]})")
+
+    # --- VOLÁNÍ ---
+    def _proved(self, klic, funkce, zalohovat):
+        if self._jistic_rozpojen():
+            return self._zaloha(klic)
+        for pokus in range(MAX_POKUSU):
+            if not self._vezmi_token():
+                return self._zaloha(klic)
+            with self._zamek:
+                self.statistiky["pozadavku"] += 1
+            try:
+                vysledek = funkce()
+            except Exception as e:
+                if je_limit(e):
+                    with self._zamek:
+                        self.statistiky["limit_chyb"] += 1
+                    self._selhani()
+                    if pokus + 1 < MAX_POKUSU and not self._jistic_rozpojen():
+                        cekani = min(8.0, 1.0 * 2 ** pokus) * random.uniform(0.8, 1.2)
+                        with self._zamek:
+                            self.statistiky["cekani_s"] += cekani
+                        time.sleep(cekani)
+                        continue
+                else:
+                    self._selhani()
+                return self._zaloha(klic, e)
+            self._uspech(klic, vysledek, zalohovat)
+            return vysledek
+        return self._zaloha(klic)
+
+    def zavolej(self, klic, funkce, zalohovat=True):
+        """
+        Provede funkce() přes bránu. 'klic' (hashovatelný, první prvek = druh volání)
+        určuje single-flight a záložní odpověď pro jistič.
+        """
+        zaznam = self._z_disku(klic, self.expirace.get(klic[0]))
+        with self._zamek:
+            self.statistiky["volani"] += 1
+            if zaznam is not None:
+                # Čerstvá odpověď z disku (expirace podle druhu volání) - na Yahoo se nesahá
+                self.statistiky["z_disku"] += 1
+                return zaznam[1]
+            let = self._probihajici.get(klic)
+            vedouci = let is None
+            if vedouci:
+                let = self._probihajici[klic] = _Let()
+            else:
+                self.statistiky["sdilenych"] += 1
+        if not vedouci:
+            let.hotovo.wait()
+            if let.chyba is not None:
+                raise let.chyba
+            return let.vysledek
+        try:
+            let.vysledek = self._proved(klic, funkce, zalohovat)
+            return let.vysledek
+        except Exception as e:
+            let.chyba = e
+            raise
+        finally:
+            with self._zamek:
+                self._probihajici.pop(klic, None)
+            let.hotovo.set()
+
+    def stav(self):
+        """Metriky pro UI / logy."""
+        with self._zamek:
+            stav = dict(self.statistiky)
+            stav["jistic_rozpojen_za_s"] = max(0.0, self._rozpojeno_do - time.monotonic())
+            stav["tokenu"] = self._tokeny
+        return stav
+
+
+# --- SINGLETON (web i boti sdílí jednu bránu na proces) ---
+_BRANA = None
+_BRANA_ZAMEK = threading.Lock()
+
+
+def ziskej_branu():
+    """Jedna YahooBrana na proces."""
+    global _BRANA
+    with _BRANA_ZAMEK:
+        if _BRANA is None:
+            try:
+                disk = DiskovaCache(HTTP_CACHE_CESTA)
+            except Exception as e:
+                print(f"⚠️ Yahoo cache na disku nejde otevřít ({e}), jen paměť.")
+                disk = None
+            _BRANA = YahooBrana(disk=disk)
+        return _BRANA
+
+
+# --- VOLÁNÍ YFINANCE PŘES BRÁNU ---
+def yahoo_info(ticker):
+    """Ticker.info (dict)."""
+    import yfinance as yf
+    return ziskej_branu().zavolej(("info", str(ticker)), lambda: yf.Ticker(str(ticker)).info)
+
+
+def yahoo_fast_info(ticker):
+    """
+    Ticker.fast_info jako dict (fast_info je líné - stahuje až při čtení atributu,
+    proto se čte celé uvnitř brány).
+    """
+    import yfinance as yf
+
+    def stahni():
+        fi = yf.Ticker(str(ticker)).fast_info
+        data = {"last_price": fi.last_price, "previous_close": fi.previous_close, "currency": fi.currency}
+        try:
+            data["market_cap"] = fi.market_cap
+        except Exception:
+            data["market_cap"] = None
+        return data
+
+    return ziskej_branu().zavolej(("fast_info", str(ticker)), stahni)
+
+
+def yahoo_atribut(ticker, nazev):
+    """Libovolná vlastnost Tickeru (calendar, insider_transactions, earnings_dates ...)."""
+    import yfinance as yf
+    return ziskej_branu().zavolej((nazev, str(ticker)), lambda: getattr(yf.Ticker(str(ticker)), nazev))
+
+
+def yahoo_download(tickery, **kwargs):
+    """
+    yf.download přes bránu. Bez zálohy (historii drží sklad cen) - jen limit, single-flight a jistič.
+    yf.download chyby nevyhazuje, jen je vypíše; 429 se proto pozná z yf.shared._ERRORS.
+    """
+    import yfinance as yf
+    tickery = list(tickery)
+
+    def stahni():
+        data = yf.download(tickery, **kwargs)
+        chyby = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+        if (data is None or data.empty) and any(je_limit(Exception(str(c))) for c in chyby.values()):
+            raise RuntimeError("Too Many Requests (yf.download)")
+        return data
+
+    klic = ("download", tuple(sorted(tickery)), tuple(sorted((k, str(v)) for k, v in kwargs.items())))
+    return ziskej_branu().zavolej(klic, stahni, zalohovat=False)